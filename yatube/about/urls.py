@@ -1,10 +1,11 @@
 from django.urls import path
-from . import views
+
+from core.lazy_urls import lazy_view
 
 
 app_name = 'about'
 
 urlpatterns = [
-    path('author/', views.AboutAuthorView.as_view(), name='author'),
-    path('tech/', views.AboutTechView.as_view(), name='tech'),
+    path('author/', lazy_view('about.views.AboutAuthorView'), name='author'),
+    path('tech/', lazy_view('about.views.AboutTechView'), name='tech'),
 ]
@@ -0,0 +1,141 @@
+"""Режим производительности для списков в админке на больших таблицах."""
+from django.contrib import admin
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import OutboxMessage
+
+
+def estimate_count(queryset):
+    """Оценка числа строк таблицы по статистике планировщика или None.
+
+    PostgreSQL хранит её в ``pg_class``, SQLite — в ``sqlite_stat1``
+    после ``ANALYZE``. Без статистики оценки нет.
+    """
+    table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s', [table]
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            # первое число stat — строк в таблице
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return int(float(str(row[0]).split()[0]))
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который не считает COUNT(*) на всей большой таблице.
+
+    Оценка берётся только для запроса без условий: она описывает всю
+    таблицу. Отфильтрованные запросы, небольшие таблицы и таблицы без
+    статистики считаются точно.
+    """
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if (
+            query is None or query.where or query.distinct
+            or not query.can_filter()
+        ):
+            return super().count
+        estimate = estimate_count(queryset)
+        if estimate is None or estimate < self.exact_count_limit:
+            return super().count
+        return estimate
+
+
+class CachedRawIdWidget(ForeignKeyRawIdWidget):
+    """Виджет raw_id, который не ищет одну и ту же подпись дважды.
+
+    Копии виджета в строках list_editable делят один словарь подписей,
+    поэтому запросов столько, сколько разных значений на странице,
+    а не строк.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels = {}
+
+    def label_and_url_for_value(self, value):
+        if value not in self.labels:
+            self.labels[value] = super().label_and_url_for_value(value)
+        return self.labels[value]
+
+
+class PerformanceModelAdmin(admin.ModelAdmin):
+    """ModelAdmin для таблиц на миллионы строк.
+
+    * оценка числа строк вместо COUNT(*) и без второго полного подсчёта;
+    * внешние ключи из ``raw_id_fields`` выводятся ``CachedRawIdWidget``,
+      без выпадающего списка всех объектов в каждой строке.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.raw_id_fields:
+            kwargs['widget'] = CachedRawIdWidget(
+                db_field.remote_field,
+                self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'recipients',
+        'status',
+        'attempts',
+        'next_attempt',
+        'created',
+    )
+    list_filter = ('status',)
+    readonly_fields = (
+        'from_email',
+        'recipients',
+        'status',
+        'attempts',
+        'next_attempt',
+        'last_error',
+        'created',
+    )
+    exclude = ('message',)
+    actions = ('retry',)
+
+    def retry(self, request, queryset):
+        count = queryset.update(
+            status=OutboxMessage.PENDING,
+            attempts=0,
+            next_attempt=timezone.now(),
+        )
+        self.message_user(request, f'Писем снова в очереди: {count}')
+    retry.short_description = 'Отправить повторно'
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,420 @@
+"""ASGI-обработчик для Django 2.2.
+
+В Django 2.2 нет ни ASGI, ни асинхронных представлений, поэтому
+обработчик устроен так:
+
+* маршруты из ``settings.ASYNC_VIEWS`` обслуживаются асинхронными
+  представлениями; вся синхронная работа (ORM, сессии, рендер)
+  выполняется в ограниченном пуле потоков через ``run_sync``,
+  и поток занят только на время конкретного запроса к базе;
+* все остальные запросы целиком отдаются WSGI-приложению в том же пуле;
+* потоковые ответы (и WSGI, и ``AsyncStreamingHttpResponse``) отдаются
+  клиенту по частям, пока поток не закончится или клиент не отключится.
+"""
+import asyncio
+import functools
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from wsgiref.util import FileWrapper
+
+from django import db
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import response_for_exception
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import StreamingHttpResponse
+from django.urls import Resolver404, get_resolver, set_urlconf
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# FileResponse читает файл по 4 КБ, а каждая часть — переход в пул потоков
+FILE_CHUNK_SIZE = 64 * 1024
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'ASGI_THREADS', 8),
+            thread_name_prefix='asgi-sync',
+        )
+    return _executor
+
+
+def _call_with_connections(func, *args, **kwargs):
+    """Вызов в потоке пула с проверкой соединений до и после него.
+
+    Соединения с базой у каждого потока пула свои, а поток выполняет
+    части разных запросов вперемешку, поэтому сигналов начала и конца
+    запроса, на которых их проверяет WSGI, здесь нет. Вместо них
+    устаревшие соединения закрываются вокруг каждой задачи: с
+    ``CONN_MAX_AGE = 0`` задача открывает своё соединение и закрывает
+    его после себя, с ``CONN_MAX_AGE > 0`` следующие задачи того же
+    потока берут его заново, пока оно не устареет.
+    """
+    db.close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        db.close_old_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """Выполняет синхронную функцию в пуле потоков и ждёт результат."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(_call_with_connections, func, *args, **kwargs),
+    )
+
+
+def file_wrapper(filelike, block_size=FILE_CHUNK_SIZE):
+    return FileWrapper(filelike, max(block_size, FILE_CHUNK_SIZE))
+
+
+def build_environ(scope, body):
+    """Собирает WSGI environ из ASGI scope."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'wsgi.file_wrapper': file_wrapper,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = str(scope['client'][0])
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE' or name == 'CONTENT_LENGTH':
+            key = name
+        else:
+            key = f'HTTP_{name}'
+        if key in environ:
+            value = f'{environ[key]},{value}'
+        environ[key] = value
+    return environ
+
+
+class MiddlewareChain:
+    """Старый протокол middleware поверх асинхронного представления.
+
+    Методы middleware на основе ``MiddlewareMixin`` (это все middleware
+    Django и проекта) вызываются в пуле потоков в том же порядке, что
+    и в обработчике Django: сначала все process_request, затем все
+    process_view, после представления — process_response в обратном
+    порядке. Исключения превращаются в ответ ``response_for_exception``
+    там же, где это сделал бы Django. Middleware других видов оборачивают
+    синхронный ``get_response`` и на асинхронном пути работать не могут:
+    они попадают в ``unsupported``.
+    """
+
+    def __init__(self, paths):
+        self.middleware = []
+        self.unsupported = []
+        for path in paths:
+            middleware_class = import_string(path)
+            if not issubclass(middleware_class, MiddlewareMixin):
+                self.unsupported.append(path)
+                continue
+            try:
+                self.middleware.append(middleware_class())
+            except MiddlewareNotUsed:
+                pass
+
+    def process_request(self, request, view, args, kwargs):
+        for index, middleware in enumerate(self.middleware):
+            if not hasattr(middleware, 'process_request'):
+                continue
+            try:
+                response = middleware.process_request(request)
+            except Exception as exc:
+                return self.process_response(
+                    request,
+                    response_for_exception(request, exc),
+                    self.middleware[:index],
+                )
+            if response is not None:
+                return self.process_response(
+                    request, response, self.middleware[:index + 1]
+                )
+        return self.process_view(request, view, args, kwargs)
+
+    def process_view(self, request, view, args, kwargs):
+        for middleware in self.middleware:
+            if not hasattr(middleware, 'process_view'):
+                continue
+            try:
+                response = middleware.process_view(
+                    request, view, args, kwargs
+                )
+            except Exception as exc:
+                response = response_for_exception(request, exc)
+            if response is not None:
+                return self.process_response(request, response)
+        return None
+
+    def process_exception(self, request, exc):
+        """Ответ на исключение представления или его рендера."""
+        try:
+            for middleware in reversed(self.middleware):
+                if hasattr(middleware, 'process_exception'):
+                    response = middleware.process_exception(request, exc)
+                    if response is not None:
+                        return response
+        except Exception as error:
+            exc = error
+        return response_for_exception(request, exc)
+
+    def process_response(self, request, response, middleware=None):
+        if middleware is None:
+            middleware = self.middleware
+        for item in reversed(middleware):
+            if not hasattr(item, 'process_response'):
+                continue
+            try:
+                response = item.process_response(request, response)
+            except Exception as exc:
+                response = response_for_exception(request, exc)
+        return response
+
+
+class AsyncStreamingHttpResponse(StreamingHttpResponse):
+    """Потоковый ответ из асинхронного генератора (только ASGI-путь)."""
+
+    def __init__(self, async_content, *args, **kwargs):
+        super().__init__((), *args, **kwargs)
+        self.async_content = async_content
+
+    async def iterate(self):
+        async for chunk in self.async_content:
+            yield self.make_bytes(chunk)
+
+    async def aclose(self):
+        await self.async_content.aclose()
+        self.close()
+
+
+class ASGIHandler:
+    def __init__(self, wsgi_application, async_views=None):
+        self.wsgi_application = wsgi_application
+        if async_views is None:
+            async_views = getattr(settings, 'ASYNC_VIEWS', {})
+        self.middleware = MiddlewareChain(settings.MIDDLEWARE)
+        if self.middleware.unsupported and async_views:
+            # пропустить такие middleware нельзя, поэтому все запросы
+            # уходят в WSGI-приложение, где они работают как обычно
+            logger.warning(
+                'Асинхронные представления отключены: middleware %s '
+                'не основаны на MiddlewareMixin',
+                ', '.join(self.middleware.unsupported),
+            )
+            async_views = {}
+        self.async_views = {
+            name: import_string(path) for name, path in async_views.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+        body = await self.read_body(receive)
+        environ = build_environ(scope, body)
+        head = scope['method'] == 'HEAD'
+        response = None
+        if scope['method'] in ('GET', 'HEAD'):
+            response = await self.get_async_response(environ)
+        if response is None:
+            status, headers, result = await run_sync(
+                self.start_wsgi, environ
+            )
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': headers,
+            })
+            close = getattr(result, 'close', None)
+            if head:
+                await self.close_body(close, send)
+            else:
+                await self.send_chunks(iter(result), close, receive, send)
+            return
+        headers = [
+            (key.lower().encode('latin-1'), value.encode('latin-1'))
+            for key, value in response.items()
+        ]
+        for cookie in response.cookies.values():
+            headers.append(
+                (b'set-cookie', cookie.output(header='').strip().encode())
+            )
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        if isinstance(response, AsyncStreamingHttpResponse):
+            await self.send_stream(response, receive, send, head)
+        elif head:
+            await self.close_body(response.close, send)
+        elif response.streaming:
+            await self.send_chunks(
+                iter(response.streaming_content), response.close,
+                receive, send,
+            )
+        else:
+            await send({
+                'type': 'http.response.body',
+                'body': response.content,
+            })
+            await run_sync(response.close)
+
+    async def close_body(self, close, send):
+        if close is not None:
+            await run_sync(close)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def send_stream(self, response, receive, send, head=False):
+        """Отдаёт части асинхронного ответа, пока клиент не отключится."""
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            if not head:
+                async for chunk in response.iterate():
+                    if disconnected.done():
+                        break
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            client_gone = disconnected.done()
+            disconnected.cancel()
+            await response.aclose()
+        if not client_gone:
+            await send({'type': 'http.response.body', 'body': b''})
+
+    async def send_chunks(self, chunks, close, receive, send):
+        """Отдаёт части синхронного итератора, пока клиент не отключится.
+
+        Каждая часть читается в пуле потоков: генератор потокового
+        рендера или событий может ходить в базу и ждать.
+        """
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            while not disconnected.done():
+                chunk = await run_sync(next, chunks, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            client_gone = disconnected.done()
+            disconnected.cancel()
+            if close is not None:
+                await run_sync(close)
+        if not client_gone:
+            await send({'type': 'http.response.body', 'body': b''})
+
+    async def wait_disconnect(self, receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            # тело запроса уже прочитано, лишние сообщения пропускаем
+            await asyncio.sleep(0)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        return b''.join(chunks)
+
+    def start_wsgi(self, environ):
+        """Статус, заголовки и итератор тела ответа WSGI-приложения."""
+        state = {}
+
+        def start_response(status, headers, exc_info=None):
+            state['status'] = int(status.split(' ', 1)[0])
+            state['headers'] = [
+                (key.lower().encode('latin-1'), value.encode('latin-1'))
+                for key, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        return state['status'], state['headers'], result
+
+    async def get_async_response(self, environ):
+        """Ответ асинхронного представления или None для WSGI-пути."""
+        if not self.async_views:
+            return None
+        set_urlconf(settings.ROOT_URLCONF)
+        request = WSGIRequest(environ)
+        try:
+            match = get_resolver().resolve(request.path_info)
+        except Resolver404:
+            return None
+        view = self.async_views.get(match.view_name)
+        if view is None:
+            return None
+        request.resolver_match = match
+        response = await run_sync(
+            self.middleware.process_request,
+            request, match.func, match.args, match.kwargs,
+        )
+        if response is not None:
+            return response
+        try:
+            response = await view(request, *match.args, **match.kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = await run_sync(response.render)
+        except Exception as exc:
+            response = await run_sync(
+                self.middleware.process_exception, request, exc
+            )
+        return await run_sync(
+            self.middleware.process_response, request, response
+        )
+
+
+def get_asgi_application():
+    """Аналог get_wsgi_application для ASGI-серверов."""
+    from django.core.wsgi import get_wsgi_application
+
+    return ASGIHandler(get_wsgi_application())
@@ -0,0 +1,38 @@
+"""Бэкенд аутентификации с кэшем пользователей.
+
+``AuthenticationMiddleware`` загружает пользователя на каждом запросе.
+``CachedModelBackend`` держит его в кэше ``AUTH_USER_CACHE_TIMEOUT``
+секунд; запись сбрасывается при любом сохранении или удалении
+пользователя (смена пароля, профиля, ``last_login``), см.
+``core.signals``. Проверка хеша сессии после смены пароля остаётся
+на месте: ``django.contrib.auth.get_user`` сверяет его с кэшированным
+объектом, а тот после смены пароля уже сброшен.
+
+Сброс работает только с общим для всех воркеров кэшем, поэтому бэкенд
+подключается в ``prod.py`` лишь при заданном ``MEMCACHED_LOCATION``.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(
+                key, user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300)
+            )
+        return user if self.user_can_authenticate(user) else None
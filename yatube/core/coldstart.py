@@ -0,0 +1,47 @@
+"""Замер холодного старта воркера.
+
+Запускается отдельным процессом: ``python -m core.coldstart /about/author/``.
+Печатает JSON с временем импорта ``yatube.wsgi.application``
+и задержкой первого запроса к указанному пути.
+"""
+import json
+import sys
+import time
+
+
+def first_request(application, path):
+    from wsgiref.util import setup_testing_defaults
+
+    environ = {'PATH_INFO': path, 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(environ)
+    status = {}
+
+    def start_response(value, headers, exc_info=None):
+        status['value'] = value
+
+    start = time.perf_counter()
+    response = application(environ, start_response)
+    body = b''.join(response)
+    if hasattr(response, 'close'):
+        response.close()
+    elapsed = time.perf_counter() - start
+    return status.get('value', ''), len(body), elapsed
+
+
+def measure(path):
+    start = time.perf_counter()
+    from yatube.wsgi import application
+    import_time = time.perf_counter() - start
+    status, size, latency = first_request(application, path)
+    return {
+        'import_ms': import_time * 1000,
+        'first_request_ms': latency * 1000,
+        'status': status,
+        'bytes': size,
+        'modules': len(sys.modules),
+    }
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else '/'
+    print(json.dumps(measure(path)))
@@ -0,0 +1,81 @@
+"""Ленивые обёртки над стандартными контекст-процессорами.
+
+Процессор вызывается только тогда, когда шаблон действительно
+обращается к одной из его переменных, и не более одного раза
+за рендер. Время работы процессора записывается в запрос
+и выводится ``core.middleware.ContextProcessorTimingMiddleware``.
+"""
+import time
+
+from django.utils.functional import SimpleLazyObject
+from django.utils.module_loading import import_string
+
+TIMINGS_ATTR = '_context_processor_timings'
+
+
+def record_timing(request, name, elapsed):
+    """Добавляет время работы процессора к статистике запроса."""
+    if request is None:
+        return
+    timings = getattr(request, TIMINGS_ATTR, None)
+    if timings is None:
+        timings = {}
+        setattr(request, TIMINGS_ATTR, timings)
+    timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def get_timings(request):
+    return getattr(request, TIMINGS_ATTR, {})
+
+
+def lazy_processor(path, keys):
+    """Возвращает процессор, который откладывает вызов ``path``."""
+    name = path.rsplit('.', 1)[-1]
+
+    def processor(request):
+        state = {}
+
+        def load():
+            if 'result' not in state:
+                start = time.perf_counter()
+                state['result'] = import_string(path)(request)
+                record_timing(request, name, time.perf_counter() - start)
+            return state['result']
+
+        def make_value(key):
+            return SimpleLazyObject(lambda: load().get(key))
+
+        return {key: make_value(key) for key in keys}
+
+    processor.__name__ = name
+    return processor
+
+
+def timed_processor(path):
+    """Возвращает процессор, который вызывается сразу, но с замером."""
+    name = path.rsplit('.', 1)[-1]
+
+    def processor(request):
+        start = time.perf_counter()
+        result = import_string(path)(request)
+        record_timing(request, name, time.perf_counter() - start)
+        return result
+
+    processor.__name__ = name
+    return processor
+
+
+debug = lazy_processor(
+    'django.template.context_processors.debug',
+    ('debug', 'sql_queries'),
+)
+auth = lazy_processor(
+    'django.contrib.auth.context_processors.auth',
+    ('user', 'perms'),
+)
+messages = lazy_processor(
+    'django.contrib.messages.context_processors.messages',
+    ('messages', 'DEFAULT_MESSAGE_LEVELS'),
+)
+request = timed_processor('django.template.context_processors.request')
+year = timed_processor('core.context_processors.year.year')
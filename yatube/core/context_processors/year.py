@@ -1,8 +1,15 @@
+import time
 from datetime import datetime
 
+_year_cache = {'year': None, 'expires': 0.0}
+
 
 def year(request):
-    dt = datetime.now().year
+    """Текущий год; пересчитывается только после смены года."""
+    if time.time() >= _year_cache['expires']:
+        now = datetime.now()
+        _year_cache['year'] = now.year
+        _year_cache['expires'] = datetime(now.year + 1, 1, 1).timestamp()
     return {
-        'year': dt
+        'year': _year_cache['year']
     }
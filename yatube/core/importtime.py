@@ -0,0 +1,47 @@
+"""Разбор вывода ``python -X importtime``."""
+import re
+from collections import namedtuple
+
+ImportRecord = namedtuple(
+    'ImportRecord', ('module', 'self_us', 'cumulative_us', 'depth')
+)
+
+LINE_RE = re.compile(
+    r'^import time:\s+(?P<self>\d+)\s+\|\s+(?P<cumulative>\d+)\s+\|'
+    r'(?P<indent>\s*)(?P<module>\S+)\s*$'
+)
+
+
+def parse_importtime(output):
+    """Возвращает список ImportRecord из stderr ``-X importtime``.
+
+    Строки, которые не относятся к importtime, пропускаются.
+    Модули, загруженные через ``importlib.import_module`` (например,
+    приложения из INSTALLED_APPS), интерпретатор в этот вывод
+    не пишет, видны только их вложенные импорты.
+    Глубина вложенности считается по отступу: два пробела на уровень.
+    """
+    records = []
+    for line in output.splitlines():
+        match = LINE_RE.match(line)
+        if match is None:
+            continue
+        records.append(ImportRecord(
+            module=match.group('module'),
+            self_us=int(match.group('self')),
+            cumulative_us=int(match.group('cumulative')),
+            depth=max(len(match.group('indent')) - 1, 0) // 2,
+        ))
+    return records
+
+
+def slowest(records, limit=20, key='cumulative_us', top_level=None):
+    """Самые медленные импорты; ``top_level`` — только модули-корни пакетов."""
+    if top_level is not None:
+        records = [
+            record for record in records
+            if record.module.split('.')[0] in top_level
+        ]
+    return sorted(
+        records, key=lambda record: getattr(record, key), reverse=True
+    )[:limit]
@@ -0,0 +1,57 @@
+"""Ленивый импорт представлений и URLconf.
+
+Модуль с представлением импортируется при первом запросе к нему,
+а вложенный URLconf — при первом resolve/reverse в его пространстве
+имён. Так тяжёлые модули (админка, формы с картинками) не попадают
+в память воркера, пока их никто не открыл.
+"""
+from django.urls import URLResolver
+from django.urls.resolvers import RoutePattern
+from django.utils.module_loading import import_string
+
+
+class LazyView:
+    """Представление, которое импортируется при первом вызове.
+
+    Если по пути ``path`` лежит класс, вызывается ``as_view(**initkwargs)``.
+    """
+
+    def __init__(self, path, **initkwargs):
+        self.path = path
+        self.initkwargs = initkwargs
+        self._view = None
+
+    @property
+    def view(self):
+        if self._view is None:
+            view = import_string(self.path)
+            if hasattr(view, 'as_view'):
+                view = view.as_view(**self.initkwargs)
+            self._view = view
+        return self._view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.view(request, *args, **kwargs)
+
+    def __getattr__(self, name):
+        # атрибуты вроде csrf_exempt читаются у настоящего представления
+        if name.startswith('__') or name in ('_view', 'path', 'initkwargs'):
+            raise AttributeError(name)
+        return getattr(self.view, name)
+
+    def __repr__(self):
+        return f'<LazyView {self.path}>'
+
+
+def lazy_view(path, **initkwargs):
+    return LazyView(path, **initkwargs)
+
+
+def lazy_include(route, urlconf, namespace=None, app_name=None):
+    """Аналог ``path(route, include(urlconf))`` без импорта модуля."""
+    return URLResolver(
+        RoutePattern(route, is_endpoint=False),
+        urlconf,
+        app_name=app_name or namespace,
+        namespace=namespace,
+    )
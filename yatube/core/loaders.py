@@ -0,0 +1,51 @@
+import re
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.loaders import filesystem
+
+INCLUDE_RE = re.compile(
+    r"""{%\s*include\s+(?P<quote>['"])(?P<name>[^'"]+)(?P=quote)\s*%}"""
+)
+MAX_INLINE_DEPTH = 3
+
+
+class Loader(filesystem.Loader):
+    """Загрузчик шаблонов, который подставляет мелкие include в родителя.
+
+    Шаблоны из ``TEMPLATES_INLINE_INCLUDES`` вставляются в текст
+    родительского шаблона ещё до компиляции, поэтому при рендере
+    не создаётся отдельный IncludeNode и не ищется вложенный шаблон.
+    Подставляются только include без ``with`` и ``only``.
+    """
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        return self.inline_includes(contents)
+
+    def inline_includes(self, contents, depth=0):
+        inline = getattr(settings, 'TEMPLATES_INLINE_INCLUDES', ())
+        if not inline or depth >= MAX_INLINE_DEPTH:
+            return contents
+
+        def replace(match):
+            name = match.group('name')
+            if name not in inline:
+                return match.group(0)
+            source = self.get_partial(name)
+            if source is None:
+                return match.group(0)
+            return self.inline_includes(source, depth + 1)
+
+        return INCLUDE_RE.sub(replace, contents)
+
+    def get_partial(self, template_name):
+        for origin in self.get_template_sources(template_name):
+            try:
+                source = super().get_contents(origin)
+            except TemplateDoesNotExist:
+                continue
+            if '{% extends' in source or '{% block' in source:
+                return None
+            return source.rstrip('\n')
+        return None
@@ -0,0 +1,172 @@
+"""Очередь исходящих писем.
+
+``QueuedEmailBackend`` — почтовый бэкенд, который не отправляет письма,
+а складывает их готовыми MIME-сообщениями в таблицу ``OutboxMessage``.
+Запрос (например, сброс пароля) завершается сразу после записи; если
+его транзакция откатится, письмо не уйдёт. Отправкой занимается
+``send_pending`` в зависимости от ``EMAIL_OUTBOX_MODE``:
+
+* ``thread`` — в фоновом потоке после коммита транзакции запроса;
+* ``worker`` — командой ``send_queued_mail`` в отдельном процессе.
+
+Письма отправляются пачками по ``EMAIL_OUTBOX_BATCH_SIZE`` через одно
+соединение настоящего бэкенда ``EMAIL_OUTBOX_BACKEND``. Взятая пачка
+откладывается на ``EMAIL_OUTBOX_LEASE`` секунд, поэтому два воркера не
+пошлют одно письмо дважды, а письма упавшего воркера вернутся в работу.
+После ошибки следующая попытка откладывается экспоненциально, после
+``EMAIL_OUTBOX_MAX_ATTEMPTS`` попыток письмо помечается неотправленным.
+"""
+import logging
+import threading
+import uuid
+from datetime import timedelta
+from email import message_from_bytes
+from email.message import Message
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import MIMEMixin
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+class RawMessage(MIMEMixin, Message):
+    """Разобранное сохранённое письмо с ``as_bytes(linesep=...)``."""
+
+
+class StoredMessage:
+    """Письмо из очереди в виде, понятном почтовым бэкендам Django."""
+    encoding = None
+
+    def __init__(self, outbox_message):
+        self.from_email = outbox_message.from_email
+        self.to = outbox_message.recipients.splitlines()
+        self.raw = bytes(outbox_message.message)
+
+    def recipients(self):
+        return self.to
+
+    def message(self):
+        return message_from_bytes(self.raw, _class=RawMessage)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        now = timezone.now()
+        queued = [
+            OutboxMessage(
+                from_email=message.from_email,
+                recipients='\n'.join(message.recipients()),
+                message=message.message().as_bytes(),
+                next_attempt=now,
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxMessage.objects.bulk_create(queued)
+        mode = getattr(settings, 'EMAIL_OUTBOX_MODE', 'thread')
+        if queued and mode == 'thread':
+            transaction.on_commit(start_thread)
+        return len(queued)
+
+
+def start_thread():
+    def target():
+        try:
+            send_pending()
+        finally:
+            connection.close()
+
+    threading.Thread(target=target, name='outbox', daemon=True).start()
+
+
+def retry_delay(attempts):
+    """Пауза перед повторной попыткой, вдвое длиннее после каждой ошибки."""
+    delay = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    delay *= 2 ** (attempts - 1)
+    limit = getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600)
+    return timedelta(seconds=min(delay, limit))
+
+
+def claim_batch(size):
+    """Берёт пачку писем, которым пора уйти, на время отправки."""
+    now = timezone.now()
+    due = OutboxMessage.objects.filter(
+        status=OutboxMessage.PENDING, next_attempt__lte=now
+    )
+    ids = list(due.values_list('pk', flat=True)[:size])
+    if not ids:
+        return []
+    claim = uuid.uuid4().hex
+    lease = getattr(settings, 'EMAIL_OUTBOX_LEASE', 300)
+    due.filter(pk__in=ids).update(
+        claim=claim, next_attempt=now + timedelta(seconds=lease)
+    )
+    return list(OutboxMessage.objects.filter(claim=claim))
+
+
+def mark_failed(outbox_message, error):
+    outbox_message.attempts += 1
+    outbox_message.last_error = repr(error)
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    if outbox_message.attempts >= max_attempts:
+        outbox_message.status = OutboxMessage.FAILED
+    else:
+        outbox_message.next_attempt = (
+            timezone.now() + retry_delay(outbox_message.attempts)
+        )
+    outbox_message.claim = ''
+    outbox_message.save(update_fields=(
+        'attempts', 'last_error', 'status', 'next_attempt', 'claim',
+    ))
+
+
+def send_batch(batch):
+    """Отправляет пачку через одно соединение. Возвращает число писем."""
+    backend = get_connection(
+        getattr(
+            settings,
+            'EMAIL_OUTBOX_BACKEND',
+            'django.core.mail.backends.smtp.EmailBackend',
+        ),
+        fail_silently=False,
+    )
+    sent = []
+    try:
+        backend.open()
+    except Exception as error:
+        logger.exception('Не удалось подключиться к почтовому серверу')
+        for outbox_message in batch:
+            mark_failed(outbox_message, error)
+        return 0
+    try:
+        for outbox_message in batch:
+            try:
+                backend.send_messages([StoredMessage(outbox_message)])
+            except Exception as error:
+                logger.warning(
+                    'Письмо #%s не отправлено: %r', outbox_message.pk, error
+                )
+                mark_failed(outbox_message, error)
+            else:
+                sent.append(outbox_message.pk)
+    finally:
+        backend.close()
+        OutboxMessage.objects.filter(pk__in=sent).delete()
+    return len(sent)
+
+
+def send_pending():
+    """Отправляет все письма, которым пора уйти. Возвращает их число."""
+    size = getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+    count = 0
+    while True:
+        batch = claim_batch(size)
+        if not batch:
+            return count
+        count += send_batch(batch)
@@ -0,0 +1,62 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ('dev', 'prod')
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет холодный старт воркера: импорт wsgi.application '
+        'и первый запрос для каждого профиля настроек'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/about/author/')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument(
+            '--profile',
+            action='append',
+            choices=PROFILES,
+            help='Профиль для замера, по умолчанию все',
+        )
+
+    def run_once(self, profile, path):
+        env = dict(os.environ)
+        env['DJANGO_PROFILE'] = profile
+        env['DJANGO_SETTINGS_MODULE'] = 'yatube.settings'
+        # prod не стартует без ключа; для замера подходит любой
+        env.setdefault('SECRET_KEY', settings.SECRET_KEY)
+        result = subprocess.run(
+            [sys.executable, '-m', 'core.coldstart', path],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        for profile in options['profile'] or PROFILES:
+            runs = [
+                self.run_once(profile, options['path'])
+                for _ in range(options['runs'])
+            ]
+            import_ms = statistics.median(run['import_ms'] for run in runs)
+            request_ms = statistics.median(
+                run['first_request_ms'] for run in runs
+            )
+            self.stdout.write(
+                f'{profile:<5} import={import_ms:8.1f} ms '
+                f'first_request={request_ms:8.1f} ms '
+                f'status={runs[-1]["status"]} '
+                f'modules={runs[-1]["modules"]}'
+            )
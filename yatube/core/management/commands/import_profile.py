@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importtime import parse_importtime, slowest
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает импорт модуля (по умолчанию yatube.wsgi) '
+        'с -X importtime и выводит самые медленные импорты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='yatube.wsgi')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--self',
+            action='store_true',
+            dest='by_self',
+            help='Сортировать по собственному времени модуля',
+        )
+        parser.add_argument(
+            '--package',
+            action='append',
+            help='Показывать только модули указанных пакетов',
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+        result = subprocess.run(
+            [
+                sys.executable, '-X', 'importtime',
+                '-c', f'import {options["module"]}',
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        records = parse_importtime(result.stderr)
+        key = 'self_us' if options['by_self'] else 'cumulative_us'
+        top = slowest(
+            records, options['limit'], key=key, top_level=options['package']
+        )
+        for record in top:
+            self.stdout.write(
+                f'{record.cumulative_us / 1000:9.1f} ms '
+                f'{record.self_us / 1000:9.1f} ms  {record.module}'
+            )
+        self.stdout.write(
+            f'Модулей: {len(records)}, всего: '
+            f'{sum(record.self_us for record in records) / 1000:.1f} ms'
+        )
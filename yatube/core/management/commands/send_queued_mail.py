@@ -0,0 +1,15 @@
+from core.mail import send_pending
+from core.management.periodic import PeriodicCommand
+
+
+class Command(PeriodicCommand):
+    help = 'Отправляет письма из очереди'
+    label = 'Отправлено писем'
+    interval_help = 'Проверять очередь каждые N секунд (0 — один проход)'
+
+    def run_once(self):
+        return send_pending()
+
+    def report(self, count, elapsed):
+        if count:
+            self.stdout.write(f'{self.label}: {count}')
@@ -0,0 +1,99 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from core import asgi
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI и ASGI при одинаковом числе потоков '
+        '(то есть при одинаковом бюджете памяти воркера)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Потоков у WSGI-воркера и в пуле ASGI',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, action='append',
+            help='Одновременных запросов у ASGI (можно несколько)',
+        )
+
+    def wsgi_request(self, application, path):
+        environ = {'PATH_INFO': path, 'HTTP_HOST': 'localhost'}
+        setup_testing_defaults(environ)
+        start = time.perf_counter()
+        response = application(environ, lambda status, headers: None)
+        b''.join(response)
+        response.close()
+        return time.perf_counter() - start
+
+    def bench_wsgi(self, path, requests, threads):
+        application = get_wsgi_application()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            start = time.perf_counter()
+            latencies = list(executor.map(
+                lambda _: self.wsgi_request(application, path),
+                range(requests),
+            ))
+        return time.perf_counter() - start, latencies
+
+    async def bench_asgi(self, path, requests, concurrency):
+        application = asgi.get_asgi_application()
+        semaphore = asyncio.Semaphore(concurrency)
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': b'', 'headers': [(b'host', b'localhost')],
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            pass
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                await application(dict(scope), receive, send)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(requests)))
+        return time.perf_counter() - start, latencies
+
+    def report(self, name, elapsed, latencies):
+        self.stdout.write(
+            f'{name:<24} rps={len(latencies) / elapsed:8.1f} '
+            f'p50={statistics.median(latencies) * 1000:7.1f} ms '
+            f'p95={percentile(latencies, 0.95) * 1000:7.1f} ms'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        requests = options['requests']
+        threads = options['threads']
+        self.report(
+            f'wsgi threads={threads}',
+            *self.bench_wsgi(path, requests, threads),
+        )
+        asgi._executor = ThreadPoolExecutor(max_workers=threads)
+        for concurrency in options['concurrency'] or [threads, threads * 4]:
+            self.report(
+                f'asgi concurrency={concurrency}',
+                *asyncio.run(self.bench_asgi(path, requests, concurrency)),
+            )
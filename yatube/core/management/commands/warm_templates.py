@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = 'Компилирует все шаблоны и выводит тайминги компиляции и рендера'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--render',
+            action='store_true',
+            help='Дополнительно отрендерить каждый шаблон с пустым контекстом',
+        )
+
+    def handle(self, *args, **options):
+        report = warm_templates(render=options['render'])
+        for row in sorted(
+            report, key=lambda row: row['compile'] or 0, reverse=True
+        ):
+            compile_ms = (
+                '-' if row['compile'] is None else f'{row["compile"]:.2f}'
+            )
+            render_ms = (
+                '-' if row['render'] is None else f'{row["render"]:.2f}'
+            )
+            self.stdout.write(
+                f'{row["name"]:<45} compile={compile_ms:>8} ms '
+                f'render={render_ms:>8} ms {row["error"]}'
+            )
+        total = sum(row['compile'] or 0 for row in report)
+        self.stdout.write(
+            f'Шаблонов: {len(report)}, компиляция всего: {total:.2f} ms'
+        )
@@ -0,0 +1,39 @@
+"""Команды, которые запускаются из cron или работают циклом."""
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class PeriodicCommand(BaseCommand):
+    """Выполняет ``run_once`` один раз или каждые ``--interval`` секунд.
+
+    ``run_once`` возвращает число обработанных объектов, ``report``
+    пишет его в вывод с подписью ``label`` и временем прохода.
+    """
+    label = 'Обработано'
+    interval_help = (
+        'Повторять расчёт каждые N секунд (0 — один раз, для cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help=self.interval_help,
+        )
+
+    def run_once(self):
+        raise NotImplementedError
+
+    def report(self, count, elapsed):
+        self.stdout.write(f'{self.label}: {count} за {elapsed:.2f} с')
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            count = self.run_once()
+            self.report(count, time.perf_counter() - start)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
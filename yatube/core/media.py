@@ -0,0 +1,174 @@
+"""Отдача медиафайлов: картинки постов, их варианты и миниатюры.
+
+Способ отдачи выбирается настройкой ``MEDIA_SERVE_MODE``:
+
+* ``sendfile`` — ``FileResponse`` с объектом файла; WSGI-серверы
+  с ``wsgi.file_wrapper`` (gunicorn, uWSGI) передают его через
+  ``os.sendfile`` без копирования в Python;
+* ``x-accel`` — пустой ответ с ``X-Accel-Redirect``, файл отдаёт nginx
+  из internal-локации ``MEDIA_ACCEL_PREFIX``;
+* ``x-sendfile`` — заголовок ``X-Sendfile`` для Apache и lighttpd.
+
+В режиме ``sendfile`` представление само обрабатывает ``Range`` и
+``If-None-Match``, в режимах offload это делает прокси. Каталоги из
+``MEDIA_PRIVATE_DIRS`` доступны только вошедшим пользователям.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.http import HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class RangeFile:
+    """Файл, из которого читается не больше ``length`` байт.
+
+    ``fileno`` отдаётся серверу для sendfile: позиция уже выставлена
+    на начало диапазона, а длину сервер берёт из ``Content-Length``.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header):
+    """Границы диапазона ``bytes=a-b`` как ``(start, end)`` или None.
+
+    Несколько диапазонов и неразборчивый заголовок игнорируются — клиент
+    получит файл целиком. ``end`` может быть None: до конца файла;
+    ``start`` None означает последние ``end`` байт.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    return (
+        int(first) if first else None,
+        int(last) if last else None,
+    )
+
+
+def resolve_range(byte_range, size):
+    """Абсолютные границы диапазона или None, если он невыполним."""
+    first, last = byte_range
+    if first is None:
+        start, end = max(size - last, 0), size - 1
+        if last == 0:
+            return None
+    else:
+        start = first
+        end = size - 1 if last is None else min(last, size - 1)
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+def get_etag(stat):
+    return '"{}"'.format(hashlib.md5(
+        f'{stat.st_mtime_ns}-{stat.st_size}'.encode()
+    ).hexdigest())
+
+
+def cache_control(path):
+    # картинки и варианты, названные по хешу содержимого, не меняются
+    digest = getattr(default_storage, 'digest', None)
+    if digest is not None and any(
+        digest(part) for part in (path, posixpath.dirname(path))
+    ):
+        return IMMUTABLE
+    return 'public, max-age=3600'
+
+
+def is_private(path):
+    private_dirs = getattr(settings, 'MEDIA_PRIVATE_DIRS', ())
+    return any(path.startswith(f'{directory}/') for directory in private_dirs)
+
+
+def serve(request, path):
+    """Отдаёт файл из ``MEDIA_ROOT``."""
+    path = posixpath.normpath(path).lstrip('/')
+    if is_private(path) and not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Файл не найден')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден')
+    content_type = mimetypes.guess_type(full_path)[0]
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', 'sendfile')
+    if mode == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix + path
+    elif mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        response = file_response(request, full_path, stat, content_type)
+    response['Cache-Control'] = cache_control(path)
+    return response
+
+
+def file_response(request, full_path, stat, content_type):
+    etag = get_etag(stat)
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    size = stat.st_size
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if 'HTTP_RANGE' in request.META and if_range in (None, etag):
+        byte_range = parse_range(request.META['HTTP_RANGE'])
+    if byte_range is not None:
+        byte_range = resolve_range(byte_range, size)
+        if byte_range is None:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            RangeFile(file, start, length), content_type=content_type,
+            status=206,
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
@@ -0,0 +1,149 @@
+import logging
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from core.context_processors.lazy import get_timings
+
+logger = logging.getLogger(__name__)
+
+
+class ContextProcessorTimingMiddleware(MiddlewareMixin):
+    """Отчёт о стоимости контекст-процессоров для каждого запроса.
+
+    Время пишется в лог ``core.middleware`` и в заголовок
+    ``Server-Timing``, чтобы его было видно в devtools браузера.
+    """
+
+    def process_response(self, request, response):
+        if not getattr(settings, 'CONTEXT_PROCESSOR_TIMING', False):
+            return response
+        timings = get_timings(request)
+        if timings:
+            response['Server-Timing'] = ', '.join(
+                f'cp-{name};dur={elapsed * 1000:.3f}'
+                for name, elapsed in timings.items()
+            )
+            logger.debug(
+                '%s %s context processors: %s',
+                request.method,
+                request.path,
+                timings,
+            )
+        return response
+
+
+def accepted_encodings(header):
+    """``{кодировка: q}`` из заголовка Accept-Encoding."""
+    accepted = {}
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def encoding_quality(accepted, encoding):
+    """q кодировки с учётом ``*``; 0 — клиент от неё отказался."""
+    quality = accepted.get(encoding, accepted.get('*', 0.0))
+    # q=nan не больше нуля и тоже считается отказом
+    return quality if quality > 0 else 0.0
+
+
+COMPRESSIBLE_TYPES = (
+    'text/html',
+    'text/plain',
+    'text/css',
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+)
+
+
+def gzip_stream(chunks, level):
+    """Сжимает поток, сбрасывая zlib после каждой части.
+
+    Без сброса части копились бы в компрессоре и потоковый рендер
+    терял бы смысл: браузер не получил бы шапку страницы раньше.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Gzip для ответов нужного типа и размера.
+
+    Сжимаются ответы с типом из ``COMPRESSION_TYPES`` длиннее
+    ``COMPRESSION_MIN_SIZE`` байт; потоковые ответы сжимаются по частям.
+    Уже сжатые ответы и поток событий (``text/event-stream``, где каждый
+    пинг пришлось бы сбрасывать отдельно) не трогаются.
+    """
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.types = tuple(
+            getattr(settings, 'COMPRESSION_TYPES', COMPRESSIBLE_TYPES)
+        )
+        self.level = getattr(settings, 'COMPRESSION_LEVEL', 6)
+
+    def process_response(self, request, response):
+        if not self.should_compress(request, response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            response.streaming_content = gzip_stream(
+                response.streaming_content, self.level
+            )
+            del response['Content-Length']
+        else:
+            compressed = zlib.compressobj(
+                self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+            content = compressed.compress(response.content)
+            content += compressed.flush()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # тело изменилось, сильный ETag становится слабым
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'gzip'
+        return response
+
+    def should_compress(self, request, response):
+        # частичные ответы и редиректы не сжимаются
+        if response.status_code != 200:
+            return False
+        if response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type not in self.types:
+            return False
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if not encoding_quality(accepted, 'gzip'):
+            return False
+        if response.streaming:
+            length = response.get('Content-Length')
+            return length is None or int(length) >= self.min_size
+        return len(response.content) >= self.min_size
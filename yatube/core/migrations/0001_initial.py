@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_email', models.CharField(max_length=254, verbose_name='Отправитель')),
+                ('recipients', models.TextField(help_text='По одному в строке', verbose_name='Получатели')),
+                ('message', models.BinaryField(verbose_name='Сообщение')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('failed', 'Не отправлено')], default='pending', max_length=16, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('next_attempt', models.DateTimeField(verbose_name='Следующая попытка')),
+                ('claim', models.CharField(blank=True, editable=False, max_length=32)),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Письмо в очереди',
+                'verbose_name_plural': 'Очередь писем',
+                'ordering': ('pk',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['status', 'next_attempt'], name='core_outbox_due_idx'),
+        ),
+    ]
@@ -11,3 +11,43 @@ class CreatedModel(models.Model):
     class Meta:
         # Это абстрактная модель:
         abstract = True
+
+
+class OutboxMessage(models.Model):
+    """Письмо в очереди на отправку, см. ``core.mail``.
+
+    Хранится готовым MIME-сообщением; отправленные письма удаляются,
+    в таблице остаются ожидающие и те, что не ушли после всех попыток.
+    """
+    PENDING = 'pending'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipients = models.TextField('Получатели', help_text='По одному в строке')
+    message = models.BinaryField('Сообщение')
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    next_attempt = models.DateTimeField('Следующая попытка')
+    claim = models.CharField(max_length=32, blank=True, editable=False)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+
+    class Meta:
+        ordering = ('pk',)
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt'],
+                name='core_outbox_due_idx',
+            ),
+        ]
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+
+    def __str__(self):
+        return f'#{self.pk} → {self.recipients.replace(chr(10), ", ")}'
@@ -0,0 +1,38 @@
+"""Сессии в подписанной куке с ротацией ключа подписи.
+
+Подключается как ``SESSION_ENGINE = 'core.sessions'``: сессия не читается
+из базы вовсе. Кука, подписанная одним из старых ключей
+``SESSION_SIGNING_FALLBACK_KEYS``, принимается и в том же ответе
+переподписывается текущим ``SECRET_KEY``, поэтому смена ключа не
+разлогинивает пользователей. Отозвать такую сессию на сервере нельзя —
+только дождаться ``SESSION_COOKIE_AGE`` или сменить ключ без fallback.
+"""
+from django.conf import settings
+from django.contrib.sessions.backends import signed_cookies
+from django.core import signing
+
+SALT = 'django.contrib.sessions.backends.signed_cookies'
+
+
+class SessionStore(signed_cookies.SessionStore):
+    def load(self):
+        keys = [settings.SECRET_KEY] + list(
+            getattr(settings, 'SESSION_SIGNING_FALLBACK_KEYS', ())
+        )
+        for key in keys:
+            try:
+                data = signing.loads(
+                    self.session_key,
+                    key=key,
+                    serializer=self.serializer,
+                    max_age=settings.SESSION_COOKIE_AGE,
+                    salt=SALT,
+                )
+            except Exception:
+                # BadSignature, ValueError или ошибка десериализации
+                continue
+            if key != settings.SECRET_KEY:
+                self.modified = True
+            return data
+        self.create()
+        return {}
@@ -0,0 +1,14 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import invalidate_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Сбрасывает кэш пользователя для ``CachedModelBackend``."""
+    invalidate_user(instance.pk)
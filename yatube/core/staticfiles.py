@@ -0,0 +1,161 @@
+"""Статика с отпечатками в именах, предсжатием и долгим кэшированием.
+
+``CompressedManifestStaticFilesStorage`` при ``collectstatic`` добавляет
+хеш содержимого в имена файлов (манифест ``staticfiles.json``) и рядом
+с текстовыми файлами кладёт сжатые копии ``.gz`` и, если установлен
+пакет ``brotli``, ``.br``.
+
+``StaticFilesMiddleware`` — запасной сервер статики для окружений без
+фронтового прокси. Список файлов ``STATIC_ROOT`` читается один раз при
+первом запросе, поэтому обслуживание не обращается к диску за ``stat``;
+файлы с отпечатком отдаются с ``Cache-Control: immutable``. После нового
+``collectstatic`` воркеры нужно перезапустить.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import http_date
+
+from core.middleware import accepted_encodings, encoding_quality
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен, без него пишется только gzip
+    brotli = None
+
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.txt', '.json', '.xml', '.html', '.ico',
+)
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def compress_file(path):
+    """Пишет сжатые копии файла, если они меньше исходника."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    compressed = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compressed.append(('.br', brotli.compress(data)))
+    written = []
+    for suffix, content in compressed:
+        if len(content) >= len(data):
+            continue
+        with open(path + suffix, 'wb') as target:
+            target.write(content)
+        written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files.values()) | set(paths)
+        for name in names:
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                compress_file(self.path(name))
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        self.path = path
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.last_modified = http_date(stat.st_mtime)
+        self.etag = '"{}"'.format(hashlib.md5(
+            f'{stat.st_mtime_ns}-{stat.st_size}'.encode()
+        ).hexdigest())
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        self.cache_control = (
+            IMMUTABLE if immutable else 'public, max-age=60'
+        )
+        self.encodings = [
+            (encoding, path + suffix, os.path.getsize(path + suffix))
+            for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+        ]
+
+    def choose(self, accept_encoding):
+        """Сжатая копия с наибольшим q; при равных — в порядке
+        ``ENCODINGS``."""
+        accepted = accepted_encodings(accept_encoding)
+        best, best_quality = (None, self.path, self.size), 0.0
+        for variant in self.encodings:
+            quality = encoding_quality(accepted, variant[0])
+            if quality > best_quality:
+                best, best_quality = variant, quality
+        return best
+
+    def respond(self, request):
+        if self.etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+        else:
+            encoding, path, size = self.choose(
+                request.META.get('HTTP_ACCEPT_ENCODING', '')
+            )
+            if request.method == 'HEAD':
+                response = FileResponse(iter(()))
+            else:
+                response = FileResponse(open(path, 'rb'))
+            response['Content-Type'] = self.content_type
+            response['Content-Length'] = size
+            response['Last-Modified'] = self.last_modified
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = self.etag
+        response['Cache-Control'] = self.cache_control
+        if self.encodings:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+
+def scan_static_root(root):
+    """Словарь ``имя -> StaticFile`` по содержимому ``STATIC_ROOT``."""
+    try:
+        with open(os.path.join(root, 'staticfiles.json')) as manifest:
+            hashed = set(json.load(manifest)['paths'].values())
+    except (OSError, ValueError, KeyError):
+        hashed = set()
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            files[name] = StaticFile(path, name in hashed)
+    return files
+
+
+class StaticFilesMiddleware(MiddlewareMixin):
+    """Отдаёт файлы ``STATIC_ROOT`` до остальных middleware."""
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.prefix = settings.STATIC_URL
+        self.files = None
+
+    def process_request(self, request):
+        if request.method in ('GET', 'HEAD') and request.path.startswith(
+            self.prefix
+        ):
+            if self.files is None:
+                self.files = scan_static_root(settings.STATIC_ROOT)
+            static_file = self.files.get(request.path[len(self.prefix):])
+            if static_file is not None:
+                return static_file.respond(request)
+        return None
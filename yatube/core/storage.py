@@ -0,0 +1,84 @@
+"""Хранилище медиафайлов с адресацией по содержимому.
+
+Файлы из каталогов ``MEDIA_HASHED_DIRS`` сохраняются под SHA-256
+своего содержимого: ``posts/ab/cd/abcd….png``. Хеш считается по ходу
+записи во временный файл, поэтому загрузка читается один раз. Если
+такой файл уже есть, временный удаляется и возвращается имя
+существующего — повторно загруженная картинка не занимает места,
+а у файла обновляется время изменения. Файлы в остальных каталогах
+сохраняются как обычно.
+
+Удалять общий файл можно только когда на него не ссылается ни одна
+запись и его давно не загружали: ссылка новой загрузки может быть ещё
+не закоммичена. Это делает команда ``collect_orphan_images``, см.
+``posts.images.collect_orphans``.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+INCOMING_DIR = '.incoming'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    @property
+    def hashed_dirs(self):
+        return set(getattr(settings, 'MEDIA_HASHED_DIRS', ()))
+
+    def is_hashed(self, name):
+        return os.path.dirname(name) in self.hashed_dirs
+
+    def digest(self, name):
+        """Хеш содержимого из имени файла или None для обычных файлов."""
+        stem = os.path.splitext(os.path.basename(name))[0]
+        return stem if DIGEST_RE.match(stem) else None
+
+    def get_available_name(self, name, max_length=None):
+        if self.is_hashed(name):
+            # итоговое имя зависит от содержимого и выбирается в _save
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if not self.is_hashed(name):
+            return super()._save(name, content)
+        digest, temp_path = self.write_incoming(content)
+        extension = os.path.splitext(name)[1].lower()
+        name = os.path.join(
+            os.path.dirname(name), digest[:2], digest[2:4],
+            digest + extension,
+        )
+        path = self.path(name)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            # файл снова нужен: сборщик не тронет его ещё IMAGE_GC_GRACE
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+            if self.file_permissions_mode is not None:
+                os.chmod(path, self.file_permissions_mode)
+        return name.replace('\\', '/')
+
+    def write_incoming(self, content):
+        """Пишет загрузку во временный файл и считает её хеш."""
+        directory = self.path(INCOMING_DIR)
+        os.makedirs(directory, exist_ok=True)
+        sha = hashlib.sha256()
+        descriptor, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as temp:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    sha.update(chunk)
+                    temp.write(chunk)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return sha.hexdigest(), temp_path
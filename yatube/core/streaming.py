@@ -0,0 +1,183 @@
+"""Потоковый рендер шаблонов.
+
+``stream_render`` отдаёт страницу частями: сначала всё, что идёт до
+блока ``content`` (``<head>`` и шапка из ``base.html``), затем каждую
+итерацию ``{% for %}`` внутри блока — карточки постов и комментарии —
+по мере их рендера. Браузер начинает грузить стили, пока сервер ещё
+выбирает посты из базы.
+
+Рендер повторяет ``ExtendsNode.render``, ``BlockNode.render``
+и ``ForNode.render`` из Django 2.2, но возвращает генератор: иначе
+итерации цикла не отдать до конца блока. Остальные теги рендерятся
+как обычно. Совпадение с обычным рендером проверяет
+``test_streamed_page_matches_render``; при обновлении Django эти три
+функции нужно сверить с исходниками. Включается настройкой
+``STREAMING_RENDER``; без неё ``stream_render`` равносилен
+``django.shortcuts.render``.
+
+Шапка рендерится до создания ответа, поэтому ошибка в ней — обычное
+исключение представления и ответ 500 из ``handler500``. После первой
+части статус 200 уже ушёл клиенту: ошибка пишется в лог
+``django.request`` и сигнал ``got_request_exception``, а страница
+заканчивается сообщением ``STREAM_ERROR`` вместо обрыва на полуслове.
+
+Ответ уходит после ``process_response`` всех middleware, поэтому
+CSRF-токен запрашивается заранее, чтобы кука успела попасть в ответ.
+"""
+import logging
+
+from django.conf import settings
+from django.core.signals import got_request_exception
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.template import loader
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.defaulttags import ForNode
+from django.template.loader_tags import (
+    BLOCK_CONTEXT_KEY, BlockContext, BlockNode, ExtendsNode,
+)
+
+logger = logging.getLogger('django.request')
+
+FLUSH = object()
+FLUSH_BLOCKS = ('content',)
+STREAM_ERROR = (
+    '<p class="alert alert-danger">Не удалось показать страницу целиком, '
+    'попробуйте обновить её.</p>'
+)
+
+
+def iter_nodelist(nodelist, context):
+    for node in nodelist:
+        if isinstance(node, ExtendsNode):
+            yield from iter_extends(node, context)
+        elif isinstance(node, BlockNode):
+            yield from iter_block(node, context)
+        elif isinstance(node, ForNode) and len(node.loopvars) == 1:
+            yield from iter_for(node, context)
+        else:
+            yield node.render_annotated(context)
+
+
+def iter_extends(node, context):
+    """``ExtendsNode.render``, отдающий части по узлам родителя."""
+    compiled_parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in compiled_parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks({
+                    block.name: block for block in
+                    compiled_parent.nodelist.get_nodes_by_type(BlockNode)
+                })
+            break
+    with context.render_context.push_state(
+        compiled_parent, isolated_context=False
+    ):
+        yield from iter_nodelist(compiled_parent.nodelist, context)
+
+
+def iter_block(node, context):
+    """``BlockNode.render``, отдающий части вложенных узлов."""
+    if node.name in FLUSH_BLOCKS:
+        yield FLUSH
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    with context.push():
+        if block_context is None:
+            context['block'] = node
+            yield from iter_nodelist(node.nodelist, context)
+            return
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = type(node)(block.name, block.nodelist)
+        block.context = context
+        context['block'] = block
+        yield from iter_nodelist(block.nodelist, context)
+        if push is not None:
+            block_context.push(node.name, push)
+
+
+def iter_for(node, context):
+    """``ForNode.render`` с одной переменной; после каждой итерации —
+    точка сброса."""
+    parentloop = context['forloop'] if 'forloop' in context else {}
+    with context.push():
+        values = node.sequence.resolve(context, ignore_failures=True)
+        if values is None:
+            values = []
+        if not hasattr(values, '__len__'):
+            values = list(values)
+        total = len(values)
+        if not total:
+            yield node.nodelist_empty.render(context)
+            return
+        if node.is_reversed:
+            values = reversed(values)
+        loop = context['forloop'] = {'parentloop': parentloop}
+        for index, item in enumerate(values):
+            loop.update(
+                counter0=index,
+                counter=index + 1,
+                revcounter=total - index,
+                revcounter0=total - index - 1,
+                first=index == 0,
+                last=index == total - 1,
+            )
+            context[node.loopvars[0]] = item
+            for child in node.nodelist_loop:
+                yield child.render_annotated(context)
+            yield FLUSH
+
+
+def iter_template(template, context, request):
+    """Части страницы; мелкие куски склеиваются до точки сброса."""
+    template = template.template
+    context = make_context(
+        context, request, autoescape=template.engine.autoescape
+    )
+    buffer = []
+    with context.render_context.push_state(template):
+        with context.bind_template(template):
+            context.template_name = template.name
+            for part in iter_nodelist(template.nodelist, context):
+                if part is not FLUSH:
+                    buffer.append(part)
+                elif buffer:
+                    yield ''.join(buffer)
+                    buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_response(head, parts, request):
+    yield head
+    try:
+        yield from parts
+    except Exception:
+        logger.error(
+            'Ошибка потокового рендера: %s', request.path,
+            exc_info=True,
+            extra={'status_code': 500, 'request': request},
+        )
+        got_request_exception.send(sender=None, request=request)
+        yield STREAM_ERROR
+
+
+def stream_render(request, template_name, context=None):
+    """Аналог ``render``, отдающий страницу по частям."""
+    if not getattr(settings, 'STREAMING_RENDER', False):
+        return render(request, template_name, context)
+    template = loader.get_template(template_name)
+    get_token(request)
+    parts = iter_template(template, context, request)
+    head = next(parts, '')
+    return StreamingHttpResponse(
+        iter_response(head, parts, request),
+        content_type='text/html; charset=utf-8',
+    )
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.signed_cookies import (
+    SessionStore as SignedCookieStore,
+)
+from django.core import signing
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.auth import user_cache_key
+from core.sessions import SessionStore
+
+User = get_user_model()
+
+
+SHARED_CACHE_AUTH = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+    'AUTHENTICATION_BACKENDS': [
+        'core.auth.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    ],
+}
+
+
+@override_settings(**SHARED_CACHE_AUTH)
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='auth', password='old-password'
+        )
+        self.client = Client()
+        self.client.login(username='auth', password='old-password')
+        self.url = reverse('posts:follow_index')
+
+    def test_logged_in_request_skips_session_and_user_queries(self):
+        """Сессия и пользователь берутся из кэша: остаются счётчики ленты
+        и блок рекомендаций."""
+        self.client.get(self.url)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_password_change_logs_out(self):
+        self.client.get(self.url)
+        self.user.set_password('new-password')
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_profile_change_is_visible(self):
+        self.client.get(self.url)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Новое имя'
+        user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].first_name, 'Новое имя')
+
+    def test_model_backend_sessions_survive(self):
+        """Сессии, открытые до включения кэша, не разлогиниваются."""
+        with self.settings(
+            AUTHENTICATION_BACKENDS=[
+                'django.contrib.auth.backends.ModelBackend'
+            ],
+        ):
+            client = Client()
+            client.login(username='auth', password='old-password')
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'], self.user)
+
+
+class SignedCookieRotationTests(SimpleTestCase):
+    def make_cookie(self, key):
+        return signing.dumps(
+            {'answer': 42},
+            key=key,
+            salt='django.contrib.sessions.backends.signed_cookies',
+            serializer=SignedCookieStore().serializer,
+            compress=True,
+        )
+
+    @override_settings(
+        SECRET_KEY='new-key', SESSION_SIGNING_FALLBACK_KEYS=['old-key']
+    )
+    def test_old_key_is_accepted_and_resigned(self):
+        session = SessionStore(self.make_cookie('old-key'))
+        self.assertEqual(session['answer'], 42)
+        self.assertTrue(session.modified)
+        session.save()
+        self.assertEqual(
+            SessionStore(session.session_key)['answer'], 42
+        )
+        self.assertNotIn('old-key', SessionStore(session.session_key).keys())
+
+    @override_settings(SECRET_KEY='new-key')
+    def test_unknown_key_resets_session(self):
+        session = SessionStore(self.make_cookie('old-key'))
+        self.assertNotIn('answer', session)
@@ -0,0 +1,67 @@
+import gzip
+import zlib
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import CompressionMiddleware
+
+BIG = 'Тестовый пост. ' * 200
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept='gzip, deflate'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_html_is_compressed(self):
+        response = self.process(HttpResponse(BIG))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content).decode(), BIG)
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+
+    def test_skipped_responses(self):
+        """Маленькие, нетекстовые и уже сжатые ответы не сжимаются."""
+        encoded = HttpResponse(BIG)
+        encoded['Content-Encoding'] = 'br'
+        cases = {
+            'small': (HttpResponse('маленький'), 'gzip'),
+            'image': (HttpResponse(BIG, content_type='image/png'), 'gzip'),
+            'events': (
+                StreamingHttpResponse(
+                    iter(['data: 1\n\n']), content_type='text/event-stream'
+                ),
+                'gzip',
+            ),
+            'encoded': (encoded, 'gzip'),
+            'no gzip': (HttpResponse(BIG), 'br'),
+            'refused': (HttpResponse(BIG), 'gzip;q=0, br'),
+        }
+        for name, (response, accept) in cases.items():
+            with self.subTest(name=name):
+                processed = self.process(response, accept)
+                self.assertNotEqual(
+                    processed.get('Content-Encoding'), 'gzip'
+                )
+
+    def test_streaming_is_flushed_per_chunk(self):
+        """Каждая часть потока сжимается и отправляется сразу."""
+        response = self.process(
+            StreamingHttpResponse(iter(['<head>', BIG, '</html>']))
+        )
+        chunks = list(response.streaming_content)
+        self.assertGreaterEqual(len(chunks), 3)
+        # первая часть уже раскрывается в начало страницы
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual(decompressor.decompress(chunks[0]), b'<head>')
+        self.assertEqual(
+            gzip.decompress(b''.join(chunks)).decode(),
+            '<head>' + BIG + '</html>',
+        )
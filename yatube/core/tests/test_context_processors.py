@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.test import Client, RequestFactory, TestCase, override_settings
+
+from core.context_processors import lazy, year
+
+
+class LazyContextProcessorTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+
+    def test_processor_is_not_called_until_used(self):
+        """Процессор вызывается только при обращении к переменной."""
+        inner = mock.Mock(return_value={'debug': True})
+        with mock.patch.object(lazy, 'import_string', return_value=inner):
+            processor = lazy.lazy_processor('x.debug', ('debug', 'other'))
+            context = processor(self.request)
+            inner.assert_not_called()
+            self.assertTrue(context['debug'])
+            self.assertFalse(context['other'])
+        inner.assert_called_once_with(self.request)
+        self.assertIn('debug', lazy.get_timings(self.request))
+
+    def test_year_is_memoized(self):
+        """Год не пересчитывается до его смены."""
+        year.year(self.request)
+        with mock.patch.object(year, 'datetime') as datetime_mock:
+            self.assertIn('year', year.year(self.request))
+        datetime_mock.now.assert_not_called()
+
+    @override_settings(CONTEXT_PROCESSOR_TIMING=True)
+    def test_server_timing_header(self):
+        """Стоимость процессоров попадает в заголовок Server-Timing."""
+        response = Client().get('/')
+        self.assertIn('cp-auth', response['Server-Timing'])
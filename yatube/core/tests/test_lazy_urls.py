@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.urls import resolve, reverse
+
+from core import lazy_urls
+from core.importtime import parse_importtime, slowest
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     django.utils
+import time:      3000 |       5000 |   PIL.Image
+something else
+import time:       500 |       9000 | yatube.wsgi
+"""
+
+
+class LazyUrlsTests(SimpleTestCase):
+    def test_view_is_imported_on_first_call(self):
+        """Модуль представления импортируется только при вызове."""
+        view = mock.Mock(spec=['__call__'], return_value='response')
+        with mock.patch.object(
+            lazy_urls, 'import_string', return_value=view
+        ) as import_string:
+            lazy = lazy_urls.lazy_view('app.views.index')
+            import_string.assert_not_called()
+            self.assertEqual(lazy('request', post_id=1), 'response')
+            lazy('request')
+        import_string.assert_called_once_with('app.views.index')
+        view.assert_called_with('request')
+
+    def test_class_based_view_uses_as_view(self):
+        """Для класса вызывается as_view с переданными аргументами."""
+        lazy = lazy_urls.lazy_view(
+            'about.views.AboutAuthorView', template_name='about/tech.html'
+        )
+        self.assertEqual(
+            lazy.view_class.template_name, 'about/author.html'
+        )
+        self.assertEqual(lazy.view_initkwargs['template_name'],
+                         'about/tech.html')
+
+    def test_lazy_include_resolves_and_reverses(self):
+        """Ленивые URLconf работают с resolve и reverse."""
+        self.assertEqual(reverse('about:author'), '/about/author/')
+        self.assertEqual(resolve('/admin/').namespace, 'admin')
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        """Из вывода -X importtime разбираются только строки импорта."""
+        records = parse_importtime(IMPORTTIME_OUTPUT)
+        self.assertEqual(
+            [record.module for record in records],
+            ['django.utils', 'PIL.Image', 'yatube.wsgi'],
+        )
+        self.assertEqual(records[1].depth, 1)
+        self.assertEqual(slowest(records, 1)[0].module, 'yatube.wsgi')
+        self.assertEqual(
+            slowest(records, key='self_us', top_level=['PIL'])[0].self_us,
+            3000,
+        )
+
+    def test_wsgi_boot_skips_heavy_modules(self):
+        """Старт WSGI-воркера не импортирует Pillow и ASGI-обработчик."""
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='yatube.settings')
+        modules = ('PIL', 'core.asgi')
+        result = subprocess.run(
+            [
+                sys.executable, '-c',
+                'import sys, yatube.wsgi; '
+                f'print([name for name in {modules!r} '
+                'if name in sys.modules])',
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), '[]')
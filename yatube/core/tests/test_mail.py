@@ -0,0 +1,140 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from core.mail import send_pending
+from core.models import OutboxMessage
+
+User = get_user_model()
+
+
+class RecordingBackend(BaseEmailBackend):
+    """Запоминает соединения и падает на адресах из ``broken``."""
+    opened = 0
+    broken = set()
+    refuse_connection = False
+    delivered = []
+
+    def open(self):
+        if self.refuse_connection:
+            raise ConnectionRefusedError('SMTP недоступен')
+        RecordingBackend.opened += 1
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.recipients()) & self.broken:
+                raise OSError('Отказ сервера')
+            self.delivered.append(message.message())
+        return len(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_OUTBOX_MODE='worker',
+    EMAIL_OUTBOX_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        RecordingBackend.opened = 0
+        RecordingBackend.broken = set()
+        RecordingBackend.refuse_connection = False
+        RecordingBackend.delivered = []
+
+    def enqueue(self, *recipients):
+        for recipient in recipients:
+            mail.send_mail('Тема', 'Текст', 'from@example.com', [recipient])
+
+    def test_password_reset_is_queued_and_sent_by_worker(self):
+        """Запрос только ставит письмо в очередь, отправляет воркер."""
+        User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass'
+        )
+        response = Client().post(
+            '/auth/password_reset/', {'email': 'auth@example.com'}
+        )
+        self.assertRedirects(response, '/auth/password_reset/done/')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+        out = StringIO()
+        call_command('send_queued_mail', stdout=out)
+        self.assertIn('Отправлено писем: 1', out.getvalue())
+        self.assertFalse(OutboxMessage.objects.exists())
+        message = mail.outbox[0].message()
+        self.assertEqual(message['To'], 'auth@example.com')
+        body = message.get_payload(decode=True).decode()
+        self.assertIn('/auth/reset/', body)
+
+    @override_settings(
+        EMAIL_OUTBOX_BACKEND='core.tests.test_mail.RecordingBackend',
+        EMAIL_OUTBOX_BATCH_SIZE=2,
+    )
+    def test_batches_reuse_connection(self):
+        """Одно соединение на пачку, письма уходят в порядке очереди."""
+        self.enqueue('a@example.com', 'b@example.com', 'c@example.com')
+        self.assertEqual(send_pending(), 3)
+        self.assertEqual(RecordingBackend.opened, 2)
+        self.assertEqual(
+            [message['To'] for message in RecordingBackend.delivered],
+            ['a@example.com', 'b@example.com', 'c@example.com'],
+        )
+
+    @override_settings(
+        EMAIL_OUTBOX_BACKEND='core.tests.test_mail.RecordingBackend',
+        EMAIL_OUTBOX_RETRY_DELAY=60,
+        EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    )
+    def test_failed_message_is_retried_with_backoff(self):
+        """После ошибки пауза удваивается, после всех попыток — отказ."""
+        RecordingBackend.broken = {'bad@example.com'}
+        self.enqueue('bad@example.com', 'good@example.com')
+        self.assertEqual(send_pending(), 1)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertIn('Отказ сервера', message.last_error)
+        delay = message.next_attempt - timezone.now()
+        self.assertAlmostEqual(delay.total_seconds(), 60, delta=5)
+
+        # повторная попытка ещё не наступила
+        self.assertEqual(send_pending(), 0)
+        self.assertEqual(OutboxMessage.objects.get().attempts, 1)
+
+        for attempts, expected in ((2, 120), (3, None)):
+            OutboxMessage.objects.update(next_attempt=timezone.now())
+            send_pending()
+            message = OutboxMessage.objects.get()
+            self.assertEqual(message.attempts, attempts)
+            if expected is None:
+                self.assertEqual(message.status, OutboxMessage.FAILED)
+            else:
+                delay = message.next_attempt - timezone.now()
+                self.assertAlmostEqual(
+                    delay.total_seconds(), expected, delta=5
+                )
+
+    @override_settings(
+        EMAIL_OUTBOX_BACKEND='core.tests.test_mail.RecordingBackend'
+    )
+    def test_connection_error_reschedules_batch(self):
+        RecordingBackend.refuse_connection = True
+        self.enqueue('a@example.com', 'b@example.com')
+        self.assertEqual(send_pending(), 0)
+        self.assertEqual(
+            list(OutboxMessage.objects.values_list('attempts', flat=True)),
+            [1, 1],
+        )
+
+    def test_claimed_messages_are_skipped(self):
+        """Пачку, взятую другим воркером, не отправляют повторно."""
+        self.enqueue('a@example.com')
+        OutboxMessage.objects.update(
+            claim='other', next_attempt=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertEqual(send_pending(), 0)
+        self.assertEqual(len(mail.outbox), 0)
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+
+from core.media import IMMUTABLE
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+DIGEST = 'ab' * 32
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in (f'posts/ab/ab/{DIGEST}.png', 'private/doc.txt',
+                     'cache/thumb.jpg'):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+        cls.url = f'/media/posts/ab/ab/{DIGEST}.png'
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_full_file(self):
+        """Картинка по хешу отдаётся целиком и кэшируется навсегда."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        response = self.client.get('/media/cache/thumb.jpg')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_range_requests(self):
+        cases = (
+            ('bytes=0-9', 0, 9),
+            ('bytes=1000-', 1000, 1023),
+            ('bytes=-24', 1000, 1023),
+            ('bytes=1000-5000', 1000, 1023),
+        )
+        for header, start, end in cases:
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {start}-{end}/1024'
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content),
+                    CONTENT[start:end + 1],
+                )
+
+    def test_unsatisfiable_and_ignored_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2000-')
+        self.assertEqual(response.status_code, 416)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        response = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_if_none_match(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        response.close()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside_paths(self):
+        for url in ('/media/posts/missing.png', '/media/../settings.py',
+                    '/media/posts'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel')
+    def test_x_accel_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            f'/protected-media/posts/ab/ab/{DIGEST}.png',
+        )
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_SERVE_MODE='x-sendfile')
+    def test_x_sendfile_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(TEMP_MEDIA_ROOT, f'posts/ab/ab/{DIGEST}.png'),
+        )
+
+    @override_settings(MEDIA_PRIVATE_DIRS=('private',))
+    def test_private_dir_requires_login(self):
+        response = self.client.get('/media/private/doc.txt')
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(User.objects.create_user(username='auth'))
+        response = self.client.get('/media/private/doc.txt')
+        self.assertEqual(response.status_code, 200)
+        response.close()
@@ -0,0 +1,43 @@
+from io import StringIO
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.management.periodic import PeriodicCommand
+
+
+class CountingCommand(PeriodicCommand):
+    label = 'Записано'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.runs = 0
+
+    def run_once(self):
+        self.runs += 1
+        return self.runs
+
+
+class PeriodicCommandTests(SimpleTestCase):
+    def test_runs_once_without_interval(self):
+        out = StringIO()
+        command = CountingCommand(stdout=out)
+        with mock.patch('time.sleep') as sleep:
+            command.run_from_argv(['manage.py', 'counting'])
+        self.assertEqual(command.runs, 1)
+        sleep.assert_not_called()
+        self.assertRegex(out.getvalue(), r'^Записано: 1 за \d+\.\d\d с')
+
+    def test_repeats_with_interval(self):
+        out = StringIO()
+        command = CountingCommand(stdout=out)
+        with mock.patch(
+            'time.sleep', side_effect=[None, KeyboardInterrupt]
+        ) as sleep:
+            with self.assertRaises(KeyboardInterrupt):
+                command.run_from_argv(
+                    ['manage.py', 'counting', '--interval', '30']
+                )
+        self.assertEqual(command.runs, 2)
+        sleep.assert_called_with(30)
+        self.assertIn('Записано: 2', out.getvalue())
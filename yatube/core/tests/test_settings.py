@@ -0,0 +1,79 @@
+import importlib
+import os
+import sys
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from yatube.settings import base
+
+
+def import_prod(**environ):
+    sys.modules.pop('yatube.settings.prod', None)
+    with mock.patch.dict(os.environ):
+        os.environ.pop('SECRET_KEY', None)
+        os.environ.update(environ)
+        return importlib.import_module('yatube.settings.prod')
+
+
+prod = import_prod(SECRET_KEY='test-secret-key')
+
+
+class ProductionSettingsTests(SimpleTestCase):
+    def test_prod_requires_secret_key(self):
+        """Без SECRET_KEY в окружении продакшен не стартует."""
+        with self.assertRaises(ImproperlyConfigured):
+            import_prod()
+        self.assertEqual(prod.SECRET_KEY, 'test-secret-key')
+
+    def test_prod_caches_sessions_only_with_shared_cache(self):
+        """Сессии и пользователи кэшируются только в общем memcached."""
+        self.assertEqual(
+            prod.SESSION_ENGINE, 'django.contrib.sessions.backends.db'
+        )
+        self.assertEqual(
+            prod.AUTHENTICATION_BACKENDS, base.AUTHENTICATION_BACKENDS
+        )
+        shared = import_prod(
+            SECRET_KEY='test-secret-key',
+            MEMCACHED_LOCATION='cache1:11211,cache2:11211',
+        )
+        self.assertEqual(
+            shared.CACHES['default']['LOCATION'],
+            ['cache1:11211', 'cache2:11211'],
+        )
+        self.assertEqual(
+            shared.SESSION_ENGINE,
+            'django.contrib.sessions.backends.cached_db',
+        )
+        self.assertEqual(
+            shared.AUTHENTICATION_BACKENDS[0], 'core.auth.CachedModelBackend'
+        )
+        self.assertIn(
+            'django.contrib.auth.backends.ModelBackend',
+            shared.AUTHENTICATION_BACKENDS,
+        )
+
+    def test_prod_has_no_dev_apps(self):
+        """В продакшен-профиле нет приложений и middleware для разработки."""
+        self.assertFalse(prod.DEBUG)
+        self.assertNotIn('debug_toolbar', prod.INSTALLED_APPS)
+        for middleware in prod.MIDDLEWARE:
+            with self.subTest(middleware=middleware):
+                self.assertFalse(middleware.startswith('debug_toolbar'))
+        self.assertEqual(
+            set(prod.MIDDLEWARE) - {'core.staticfiles.StaticFilesMiddleware'},
+            set(base.MIDDLEWARE),
+        )
+
+    def test_prod_uses_cached_loader(self):
+        """Продакшен-профиль кэширует шаблоны, базовый — нет."""
+        loaders = prod.TEMPLATES[0]['OPTIONS']['loaders']
+        self.assertEqual(
+            loaders[0][0], 'django.template.loaders.cached.Loader'
+        )
+        self.assertIsNot(prod.TEMPLATES, base.TEMPLATES)
+        self.assertEqual(
+            base.TEMPLATES[0]['OPTIONS']['loaders'], base.TEMPLATE_LOADERS
+        )
@@ -0,0 +1,103 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.staticfiles import IMMUTABLE, StaticFilesMiddleware
+
+CSS = 'body { background: url("../img/dot.png"); }\n' + (
+    '.card { margin: 0; }\n' * 50
+)
+
+
+class StaticPipelineTests(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.source, 'css'))
+        os.makedirs(os.path.join(self.source, 'img'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as css:
+            css.write(CSS)
+        with open(os.path.join(self.source, 'img', 'dot.png'), 'wb') as png:
+            png.write(b'\x89PNG fake')
+        self.settings = override_settings(
+            STATICFILES_DIRS=(self.source,),
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE=(
+                'core.staticfiles.CompressedManifestStaticFilesStorage'
+            ),
+        )
+        self.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(self.root, 'staticfiles.json')) as manifest:
+            self.paths = json.load(manifest)['paths']
+        self.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse('fallthrough', status=404)
+        )
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.source, ignore_errors=True)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def get(self, name, **headers):
+        return self.middleware(self.factory.get(f'/static/{name}', **headers))
+
+    def test_collectstatic_writes_hashed_and_gzip(self):
+        """Текстовые файлы получают отпечаток и сжатую копию."""
+        hashed = self.paths['css/site.css']
+        self.assertNotEqual(hashed, 'css/site.css')
+        with gzip.open(os.path.join(self.root, hashed + '.gz')) as packed:
+            self.assertIn(self.paths['img/dot.png'], packed.read().decode())
+        self.assertFalse(os.path.exists(
+            os.path.join(self.root, self.paths['img/dot.png'] + '.gz')
+        ))
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        response = self.get(
+            self.paths['css/site.css'], HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertTrue(response['Content-Type'].startswith('text/css'))
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertIn(b'.card', body)
+
+    def test_accept_encoding_qvalues(self):
+        """Кодировка выбирается по q; q=0 — отказ, а не согласие."""
+        name = self.paths['css/site.css']
+        cases = {
+            'gzip;q=0, identity': None,
+            'GZIP; q=0.5': 'gzip',
+            'xgzip': None,
+            'br;q=1, *;q=0.1': 'gzip',
+            '*;q=0': None,
+        }
+        for accept, encoding in cases.items():
+            with self.subTest(accept=accept):
+                response = self.get(name, HTTP_ACCEPT_ENCODING=accept)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                response.close()
+
+    def test_plain_name_is_revalidated(self):
+        response = self.get('css/site.css')
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response.close()
+
+    def test_etag_not_modified(self):
+        name = self.paths['img/dot.png']
+        etag = self.get(name)['ETag']
+        response = self.get(name, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_file_falls_through(self):
+        self.assertEqual(self.get('css/missing.css').content, b'fallthrough')
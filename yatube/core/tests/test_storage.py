@@ -0,0 +1,53 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, override_settings
+
+from core.storage import ContentAddressedStorage
+
+
+@override_settings(MEDIA_HASHED_DIRS=('posts',))
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковое содержимое под разными именами — один файл."""
+        digest = hashlib.sha256(b'meme').hexdigest()
+        first = self.storage.save('posts/a.PNG', ContentFile(b'meme'))
+        second = self.storage.save('posts/b.png', ContentFile(b'meme'))
+        self.assertEqual(
+            first, f'posts/{digest[:2]}/{digest[2:4]}/{digest}.png'
+        )
+        self.assertEqual(first, second)
+        self.assertEqual(self.storage.digest(first), digest)
+        self.assertEqual(os.listdir(self.storage.path('.incoming')), [])
+
+    def test_reupload_refreshes_modified_time(self):
+        """Повторная загрузка помечает файл как нужный сборщику."""
+        name = self.storage.save('posts/a.png', ContentFile(b'meme'))
+        os.utime(self.storage.path(name), (0, 0))
+        self.storage.save('posts/b.png', ContentFile(b'meme'))
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), 0)
+
+    def test_different_content(self):
+        first = self.storage.save('posts/a.png', ContentFile(b'one'))
+        second = self.storage.save('posts/a.png', ContentFile(b'two'))
+        self.assertNotEqual(first, second)
+        with self.storage.open(second) as stored:
+            self.assertEqual(stored.read(), b'two')
+
+    def test_other_dirs_keep_names(self):
+        """Файлы вне MEDIA_HASHED_DIRS сохраняются по-обычному."""
+        name = self.storage.save(
+            'posts/variants/x/320w.jpg', ContentFile(b'1')
+        )
+        self.assertEqual(name, 'posts/variants/x/320w.jpg')
+        self.assertIsNone(self.storage.digest(name))
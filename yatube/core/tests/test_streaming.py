@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import engines
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import NoReverseMatch, reverse
+
+from posts.models import Comment, Group, Post
+
+from .. import streaming, views
+
+User = get_user_model()
+
+
+class StreamingRenderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(3):
+            cls.post = Post.objects.create(
+                text=f'Пост {i}', author=cls.user, group=cls.group
+            )
+        for i in range(2):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {i}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get_chunks(self, url):
+        with self.settings(STREAMING_RENDER=True):
+            response = self.client.get(url)
+            self.assertTrue(response.streaming)
+            return [chunk.decode() for chunk in response.streaming_content]
+
+    def test_head_is_flushed_before_posts(self):
+        """Шапка уходит отдельной частью, посты — каждый своей."""
+        chunks = self.get_chunks(
+            reverse('posts:group_list', args=('test-slug',))
+        )
+        self.assertIn('<header>', chunks[0])
+        self.assertNotIn('Пост', chunks[0])
+        post_chunks = [chunk for chunk in chunks if 'Пост ' in chunk]
+        self.assertEqual(len(post_chunks), 3)
+        for number, chunk in enumerate(post_chunks):
+            with self.subTest(chunk=number):
+                self.assertEqual(chunk.count('Пост '), 1)
+
+    def test_streamed_page_matches_render(self):
+        """Потоковый и обычный рендер дают одинаковую страницу."""
+        urls = (
+            reverse('posts:group_list', args=('test-slug',)),
+            reverse('posts:profile', args=('auth',)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                streamed = ''.join(self.get_chunks(url))
+                cache.clear()
+                with override_settings(STREAMING_RENDER=False):
+                    rendered = self.client.get(url).content.decode()
+                self.assertEqual(streamed, rendered)
+
+    def test_csrf_cookie_is_set(self):
+        """Кука CSRF ставится до того, как рендерится форма."""
+        self.client.force_login(self.user)
+        with self.settings(STREAMING_RENDER=True):
+            response = self.client.get(
+                reverse('posts:post_detail', args=(self.post.pk,))
+            )
+        self.assertIn('csrftoken', response.cookies)
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('csrfmiddlewaretoken', body)
+        self.assertIn('Комментарий 1', body)
+
+
+@override_settings(STREAMING_RENDER=True)
+class StreamingErrorTests(TestCase):
+    def render(self, source):
+        template = engines['django'].from_string(source)
+        request = RequestFactory().get('/broken/')
+        with mock.patch.object(
+            streaming.loader, 'get_template', return_value=template
+        ):
+            return streaming.stream_render(request, 'broken.html')
+
+    def test_error_in_content_ends_page(self):
+        """Ошибка после первой части пишется в лог и видна на странице."""
+        response = self.render(
+            '{% extends "base.html" %}'
+            '{% block content %}{% url "no-such-route" %}{% endblock %}'
+        )
+        with self.assertLogs('django.request', 'ERROR') as logs:
+            chunks = [
+                chunk.decode() for chunk in response.streaming_content
+            ]
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('<header>', chunks[0])
+        self.assertEqual(chunks[-1], streaming.STREAM_ERROR)
+        self.assertIn('/broken/', logs.output[0])
+
+    def test_error_in_head_raises(self):
+        """Ошибка в шапке — обычное исключение, ответ отдаёт handler500."""
+        with self.assertRaises(NoReverseMatch):
+            self.render(
+                '{% extends "base.html" %}'
+                '{% block title %}{% url "no-such-route" %}{% endblock %}'
+            )
+
+    def test_server_error_page(self):
+        response = views.server_error(RequestFactory().get('/broken/'))
+        self.assertContains(response, 'Ошибка сервера', status_code=500)
@@ -0,0 +1,34 @@
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from core.warmup import warm_templates
+
+
+class TemplateLoaderTests(TestCase):
+    def test_small_includes_are_inlined(self):
+        """Мелкие include подставляются в текст родительского шаблона."""
+        engine = engines['django'].engine
+        template = engine.get_template('posts/index.html')
+        source = template.source
+        self.assertNotIn("include 'posts/includes/switcher.html'", source)
+        self.assertNotIn("include 'posts/includes/paginator.html'", source)
+        self.assertIn('page_obj.has_other_pages', source)
+
+    @override_settings(TEMPLATES_INLINE_INCLUDES=())
+    def test_inline_can_be_disabled(self):
+        """Без настройки include остаются как есть."""
+        engine = engines['django'].engine
+        template = engine.get_template('posts/index.html')
+        self.assertIn(
+            "include 'posts/includes/paginator.html'", template.source
+        )
+
+    def test_warm_templates_reports_timings(self):
+        """Прогрев компилирует все шаблоны и отдаёт тайминги."""
+        report = warm_templates(render=True)
+        names = [row['name'] for row in report]
+        self.assertIn('base.html', names)
+        self.assertIn('posts/index.html', names)
+        for row in report:
+            with self.subTest(name=row['name']):
+                self.assertIsNotNone(row['compile'])
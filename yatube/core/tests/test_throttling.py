@@ -0,0 +1,111 @@
+import threading
+import time
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from core.throttling import (
+    LocalBuckets, count_request, local_buckets, parse_rate,
+)
+from posts.models import Post
+
+User = get_user_model()
+
+
+class CountingCache:
+    """Кэш, который считает обращения."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        self.calls.append(name)
+        return getattr(cache, name)
+
+
+class RequestCounterTests(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('5/hour'), (5, 3600))
+
+    def test_limit_resets_in_next_window(self):
+        """После limit запросов окно закрыто до своего конца."""
+        store = LocalBuckets()
+        for _ in range(3):
+            allowed, _ = count_request(store, 'key', 3, 60, now=0)
+            self.assertTrue(allowed)
+        allowed, retry_after = count_request(store, 'key', 3, 60, now=20)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 40)
+        allowed, _ = count_request(store, 'key', 3, 60, now=60)
+        self.assertTrue(allowed)
+
+    def test_concurrent_requests_share_one_counter(self):
+        """Одновременные запросы не получают больше лимита."""
+        cache.clear()
+        now = time.time()
+        results = []
+
+        def hammer():
+            for _ in range(20):
+                results.append(
+                    count_request(cache, 'throttle:test', 50, 3600, now)[0]
+                )
+
+        threads = [threading.Thread(target=hammer) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 50)
+
+    def test_one_cache_call_per_request(self):
+        store = CountingCache()
+        count_request(store, 'throttle:calls', 5, 60, now=0)
+        store.calls.clear()
+        count_request(store, 'throttle:calls', 5, 60, now=1)
+        self.assertEqual(store.calls, ['incr'])
+
+    def test_local_counters_are_evicted(self):
+        store = LocalBuckets(max_size=3)
+        for number in range(10):
+            count_request(store, f'client{number}', 5, 60, now=0)
+        self.assertEqual(len(store), 3)
+        self.assertFalse(count_request(store, 'client9', 1, 60, now=0)[0])
+
+
+@override_settings(
+    THROTTLE_ENABLED=True,
+    THROTTLE_CACHE=None,
+    THROTTLE_RATES={'post_create': {'user': '2/m', 'ip': '100/m'}},
+)
+class ThrottleViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        local_buckets.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_post_create_is_throttled(self):
+        """Третий пост за минуту отклоняется с кодом 429 без записи в базу."""
+        for i in range(2):
+            self.authorized_client.post('/create/', {'text': f'Пост {i}'})
+        with self.assertNumQueries(1):
+            response = self.authorized_client.post(
+                '/create/', {'text': 'Лишний пост'}
+            )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_get_is_not_throttled(self):
+        """Форма создания поста открывается без ограничений."""
+        for _ in range(5):
+            response = self.authorized_client.get('/create/')
+            self.assertEqual(response.status_code, HTTPStatus.OK)
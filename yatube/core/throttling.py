@@ -0,0 +1,169 @@
+"""Ограничение частоты запросов счётчиком в окне фиксированной длины.
+
+Для каждого scope (``post_create``, ``add_comment`` и т. д.) заводятся
+два счётчика: по пользователю и по IP. Счётчик живёт в кэше
+(``THROTTLE_CACHE``) под ключом с номером текущего окна и растёт
+атомарным ``cache.incr``; первый запрос окна создаёт его через
+``cache.add`` со временем жизни в длину окна. Блокировок нет, обычно
+это один запрос к кэшу. На стыке окон клиент может успеть сделать
+до двух лимитов подряд — это цена отказа от блокировок. Если кэш
+не задан, счётчики хранятся в памяти процесса (``LocalBuckets``).
+Пользователь определяется по id из сессии, поэтому отказ с кодом 429
+отдаётся до загрузки пользователя и до любых запросов представления
+к базе.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import caches
+from django.http import HttpResponse
+
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# больше счётчиков в памяти процесса не держим: самые старые вытесняются
+LOCAL_MAX_KEYS = 10000
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    number, period = rate.split('/')
+    return int(number), RATE_PERIODS[period[0]]
+
+
+class LocalBuckets:
+    """Счётчики в памяти процесса, если THROTTLE_CACHE не задан.
+
+    Понимает ``add`` и ``incr`` как кэш Django. Запись живёт до конца
+    своего окна; сверх ``max_size`` записей вытесняются самые старые.
+    """
+
+    def __init__(self, max_size=LOCAL_MAX_KEYS):
+        self.max_size = max_size
+        self.counters = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, key, value, timeout):
+        with self.lock:
+            now = time.monotonic()
+            entry = self.counters.get(key)
+            if entry is not None and entry[1] > now:
+                return False
+            self.counters[key] = [value, now + timeout]
+            self.counters.move_to_end(key)
+            while len(self.counters) > self.max_size:
+                self.counters.popitem(last=False)
+            return True
+
+    def incr(self, key, delta=1):
+        with self.lock:
+            entry = self.counters.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                raise ValueError(f'Ключ {key} не найден')
+            entry[0] += delta
+            return entry[0]
+
+    def __len__(self):
+        return len(self.counters)
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+
+
+local_buckets = LocalBuckets()
+
+
+def get_store():
+    alias = getattr(settings, 'THROTTLE_CACHE', None)
+    if alias is None:
+        return local_buckets
+    return caches[alias]
+
+
+def count_request(store, key, limit, period, now=None):
+    """Засчитывает запрос в текущем окне.
+
+    Возвращает ``(разрешено, секунд до конца окна)``.
+    """
+    if now is None:
+        now = time.time()
+    window = int(now // period)
+    key = f'{key}:{window}'
+    try:
+        count = store.incr(key)
+    except ValueError:
+        # первый запрос окна; если ключ успел создать другой запрос,
+        # add вернёт False и счётчик увеличится как обычно
+        if store.add(key, 1, period):
+            count = 1
+        else:
+            count = store.incr(key)
+    return count <= limit, (window + 1) * period - now
+
+
+def get_user_ident(request):
+    user = getattr(request, '_cached_user', None)
+    if user is not None:
+        return user.pk
+    session = getattr(request, 'session', None)
+    if session is None:
+        return None
+    return session.get(SESSION_KEY)
+
+
+def get_idents(request):
+    idents = {'ip': request.META.get('REMOTE_ADDR', '')}
+    user_ident = get_user_ident(request)
+    if user_ident is not None:
+        idents['user'] = user_ident
+    return idents
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.',
+        content_type='text/plain; charset=utf-8',
+        status=429,
+    )
+    response['Retry-After'] = str(int(retry_after) + 1)
+    return response
+
+
+def check_throttle(request, scope):
+    """Возвращает ответ 429 или None, если запрос разрешён."""
+    if not getattr(settings, 'THROTTLE_ENABLED', True):
+        return None
+    rates = getattr(settings, 'THROTTLE_RATES', {}).get(scope, {})
+    store = get_store()
+    for kind, ident in get_idents(request).items():
+        rate = rates.get(kind)
+        if rate is None:
+            continue
+        limit, period = parse_rate(rate)
+        allowed, retry_after = count_request(
+            store, f'throttle:{scope}:{kind}:{ident}', limit, period
+        )
+        if not allowed:
+            return too_many_requests(retry_after)
+    return None
+
+
+def throttle(scope, methods=('POST',)):
+    """Декоратор представления: ограничивает частоту запросов ``methods``.
+
+    Ставится снаружи ``login_required``, чтобы отказ не требовал
+    загрузки пользователя.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            if request.method in methods:
+                response = check_throttle(request, scope)
+                if response is not None:
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,62 @@
+import os
+import time
+
+from django.conf import settings
+from django.template import engines
+
+
+def get_template_names(engine):
+    """Список всех шаблонов из DIRS движка (без шаблонов приложений)."""
+    names = []
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if not filename.endswith('.html'):
+                    continue
+                path = os.path.join(root, filename)
+                names.append(os.path.relpath(path, directory))
+    return sorted(name.replace(os.sep, '/') for name in names)
+
+
+def warm_templates(render=False):
+    """Компилирует все шаблоны проекта заранее.
+
+    При кэширующем загрузчике скомпилированные шаблоны остаются
+    в памяти воркера, и первые запросы после деплоя не тратят время
+    на разбор шаблонов. Возвращает список словарей с таймингами
+    компиляции (и рендера, если ``render=True``) в миллисекундах.
+    """
+    engine = engines['django']
+    request = None
+    if render:
+        from django.test import RequestFactory
+
+        request = RequestFactory().get('/')
+    report = []
+    for name in get_template_names(engine):
+        row = {'name': name, 'compile': None, 'render': None, 'error': ''}
+        start = time.perf_counter()
+        try:
+            template = engine.get_template(name)
+        except Exception as error:
+            row['error'] = repr(error)
+            report.append(row)
+            continue
+        row['compile'] = (time.perf_counter() - start) * 1000
+        if render:
+            start = time.perf_counter()
+            try:
+                template.render({}, request)
+            except Exception as error:
+                row['error'] = repr(error)
+            else:
+                row['render'] = (time.perf_counter() - start) * 1000
+        report.append(row)
+    return report
+
+
+def warm_templates_on_boot():
+    """Прогрев шаблонов при старте воркера, если он включён в настройках."""
+    if getattr(settings, 'TEMPLATES_WARMUP', False):
+        return warm_templates()
+    return []
@@ -1,9 +1,23 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.helpers import ActionForm
 
-from .models import Post, Group
+from core.admin import PerformanceModelAdmin
 
+from . import moderation
+from .models import Post, Group, ModerationJob
 
-class PostAdmin(admin.ModelAdmin):
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='Без группы',
+    )
+
+
+class PostAdmin(PerformanceModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -12,10 +26,113 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author', 'group')
+    # поле поиска; ищется только начало текста, см. get_search_results
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = ('bulk_delete', 'bulk_move_to_group', 'bulk_delete_by_author')
+
+    def get_actions(self, request):
+        # стандартное удаление грузит все объекты в одном запросе
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def enqueue(self, request, action, object_ids, group=None):
+        job = moderation.enqueue(action, object_ids, group)
+        self.message_user(
+            request,
+            f'Задание #{job.pk} «{job.get_action_display()}» '
+            f'поставлено в очередь, прогресс — в «Заданиях модерации».',
+        )
+
+    def bulk_delete(self, request, queryset):
+        self.enqueue(
+            request,
+            ModerationJob.DELETE,
+            queryset.values_list('pk', flat=True),
+        )
+    bulk_delete.short_description = 'Удалить выбранные посты (в фоне)'
+
+    def bulk_move_to_group(self, request, queryset):
+        group_id = request.POST.get('group')
+        group = Group.objects.filter(pk=group_id).first() if group_id else None
+        self.enqueue(
+            request,
+            ModerationJob.MOVE,
+            queryset.values_list('pk', flat=True),
+            group,
+        )
+    bulk_move_to_group.short_description = (
+        'Перенести выбранные посты в группу (в фоне)'
+    )
+
+    def bulk_delete_by_author(self, request, queryset):
+        self.enqueue(
+            request,
+            ModerationJob.DELETE_BY_AUTHOR,
+            queryset.values_list('author', flat=True).distinct(),
+        )
+    bulk_delete_by_author.short_description = (
+        'Удалить все посты авторов выбранных постов (в фоне)'
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по индексам вместо LIKE '%x%' там, где это возможно.
+
+        ``id:123`` — пост по id, ``@name`` — посты автора,
+        ``#slug`` — посты группы; остальное, в том числе просто числа,
+        ищется по началу текста: ``LIKE 'x%'`` может идти по индексу,
+        а ``'%x%'`` из стандартного поиска — никогда. Слова из середины
+        текста так не находятся: для этого нужен полнотекстовый индекс.
+        """
+        term = search_term.strip()
+        if term.startswith('id:') and term[3:].strip().isdigit():
+            return queryset.filter(pk=int(term[3:])), False
+        if term.startswith('@') and len(term) > 1:
+            return queryset.filter(author__username=term[1:]), False
+        if term.startswith('#') and len(term) > 1:
+            return queryset.filter(group__slug=term[1:]), False
+        if not term:
+            return queryset, False
+        return queryset.filter(text__istartswith=term), False
+
+
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'action',
+        'status',
+        'progress_display',
+        'created',
+        'finished',
+    )
+    list_filter = ('status', 'action')
+    readonly_fields = (
+        'action',
+        'status',
+        'object_ids',
+        'group',
+        'total',
+        'processed',
+        'error',
+        'created',
+        'heartbeat',
+        'finished',
+    )
+
+    def progress_display(self, job):
+        return f'{job.processed}/{job.total} ({job.progress}%)'
+    progress_display.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
+admin.site.register(ModerationJob, ModerationJobAdmin)
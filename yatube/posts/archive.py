@@ -0,0 +1,82 @@
+"""Перенос старых постов в архив.
+
+Посты старше ``ARCHIVE_AFTER_DAYS`` дней вместе с комментариями
+переносятся из ``Post`` и ``Comment`` в ``ArchivedPost`` и
+``ArchivedComment`` с теми же id. Рабочая таблица остаётся маленькой,
+и её индексы помещаются в память; ленты и ``post_detail`` дочитывают
+архив сами (см. ``posts.feeds``). Архивные посты только читаются:
+их нельзя править и комментировать.
+
+Перенос идёт пачками по ``ARCHIVE_BATCH_SIZE`` постов, каждая в своей
+транзакции, от самых старых, в каждом шарде (см. ``posts.sharding``);
+архив лежит в ``default``. Запускается командой ``archive_posts``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from .invalidation import batched, invalidate_feeds
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+from .sharding import get_shards
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image',
+    'image_variants',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def get_cutoff(days=None):
+    if days is None:
+        days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 365)
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(cutoff, size, using=DEFAULT_DB_ALIAS):
+    """Переносит пачку постов шарда ``using`` старше ``cutoff``.
+
+    Возвращает число перенесённых постов.
+    """
+    with transaction.atomic(), transaction.atomic(using=using), batched():
+        posts = list(
+            Post.objects.using(using).filter(pub_date__lt=cutoff)
+            .order_by('pub_date').values(*POST_FIELDS)[:size]
+        )
+        if not posts:
+            return 0
+        post_ids = [post['id'] for post in posts]
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**post) for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**comment)
+            for comment in Comment.objects.using(using).filter(
+                post__in=post_ids
+            ).values(*COMMENT_FIELDS)
+        )
+        # комментарии и позиции в рейтинге удаляются каскадом;
+        # картинки остаются: на них ссылается архив
+        Post.objects.using(using).filter(pk__in=post_ids).delete()
+    invalidate_feeds(
+        group_ids={post['group_id'] for post in posts},
+        author_ids={post['author_id'] for post in posts},
+        index=False,
+    )
+    return len(posts)
+
+
+def archive_old_posts(days=None, batch_size=None):
+    """Переносит в архив все старые посты. Возвращает их число."""
+    cutoff = get_cutoff(days)
+    if batch_size is None:
+        batch_size = getattr(settings, 'ARCHIVE_BATCH_SIZE', 500)
+    total = 0
+    for alias in get_shards():
+        while True:
+            count = archive_batch(cutoff, batch_size, alias)
+            if not count:
+                break
+            total += count
+    return total
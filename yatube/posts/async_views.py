@@ -0,0 +1,55 @@
+"""Асинхронные представления для ASGI-пути (см. ``core.asgi``).
+
+Здесь только представления, которые ждут: long-poll и поток событий
+держат запрос открытым, не занимая поток пула. Обычные страницы
+целиком синхронны, и под ASGI их обслуживает WSGI-приложение.
+"""
+import asyncio
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from core.asgi import AsyncStreamingHttpResponse, run_sync
+
+from .views import (
+    event_stream_response, get_event_channels, get_updates_filter,
+)
+from . import events, updates
+
+
+async def feed_updates(request, feed, slug=None, username=None):
+    """Long-poll новых постов без занятого на время ожидания потока."""
+    if feed == updates.FOLLOW and not await run_sync(
+        lambda: request.user.is_authenticated
+    ):
+        return JsonResponse({'error': 'login required'}, status=403)
+    cursor, wait = updates.parse_params(request)
+    if cursor is None:
+        cursor = await run_sync(updates.current_cursor)
+        return JsonResponse(updates.serialize([], cursor))
+    feed_filter = await run_sync(
+        get_updates_filter, request, feed, slug, username
+    )
+    deadline = time.monotonic() + wait
+    interval = getattr(settings, 'LONGPOLL_INTERVAL', 1.0)
+    while True:
+        ids = await run_sync(updates.find_new_ids, cursor, feed_filter)
+        remaining = deadline - time.monotonic()
+        if ids or remaining <= 0:
+            break
+        await asyncio.sleep(min(interval, remaining))
+    posts = await run_sync(updates.load_posts, ids)
+    return JsonResponse(updates.serialize(posts, cursor))
+
+
+async def live_events(request, feed, slug=None, post_id=None):
+    channels = await run_sync(
+        get_event_channels, request, feed, slug, post_id
+    )
+    if channels is None:
+        return JsonResponse({'error': 'login required'}, status=403)
+    return event_stream_response(AsyncStreamingHttpResponse(
+        events.stream_async(channels, events.get_last_id(request)),
+        content_type='text/event-stream',
+    ))
@@ -0,0 +1,258 @@
+"""Поиск почти одинаковых постов и комментариев (MinHash + LSH).
+
+Текст приводится к нижнему регистру без знаков препинания и режется
+на пересекающиеся куски по ``SHINGLE_SIZE`` символов. Подпись — MinHash
+в варианте с одной перестановкой: хеш куска выбирает одну из
+``NUM_HASHES`` ячеек, в ячейке остаётся минимум, пустые ячейки
+заполняются из соседних. Доля совпавших ячеек двух подписей оценивает
+сходство Жаккара их наборов кусков, а подпись считается за один проход
+по тексту.
+
+Подписи режутся на ``BANDS`` полос; тексты, у которых совпала хотя бы
+одна полоса, — кандидаты, и для них сходство проверяется по всей
+подписи. Полосы недавних текстов процесса лежат в памяти
+(``MemoryIndex``), все — в таблицах ``TextSignature`` и ``TextBand``.
+Поэтому проверка — поиск в словаре и один индексный запрос.
+
+Проверку делают ``PostForm`` и ``CommentForm``: текст, похожий
+на уже опубликованный больше чем на ``DUPLICATE_THRESHOLD``, отклоняется
+(``DUPLICATE_ACTION = 'reject'``) или только записывается в лог
+(``'flag'``). Короткие тексты (меньше ``DUPLICATE_MIN_SHINGLES``
+кусков) не проверяются: «Спасибо!» пишут многие. Подписи удалённых
+постов и комментариев удаляются вместе с ними (``forget``), а перенос
+в архив и в другой шард их сохраняет; подписи уже опубликованных
+текстов строит команда ``backfill_signatures``.
+"""
+import hashlib
+import logging
+import re
+import struct
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import TextBand, TextSignature
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+EMPTY = -1
+MASK = (1 << 32) - 1
+# шаг для ячеек, заполненных из соседних: сдвиг отличает их от исходных
+FILL_STEP = 0x9E3779B1
+WORD_RE = re.compile(r'\w+')
+SIGNATURE_FORMAT = f'>{NUM_HASHES}I'
+
+
+def shingle_hashes(text):
+    normalized = ' '.join(WORD_RE.findall(text.lower()))
+    return {
+        int.from_bytes(hashlib.blake2b(
+            normalized[start:start + SHINGLE_SIZE].encode(), digest_size=8
+        ).digest(), 'big')
+        for start in range(len(normalized) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(text):
+    """MinHash-подпись текста или None, если текст слишком короткий."""
+    hashes = shingle_hashes(text)
+    if len(hashes) < getattr(settings, 'DUPLICATE_MIN_SHINGLES', 30):
+        return None
+    cells = [EMPTY] * NUM_HASHES
+    for value in hashes:
+        cell, value = value % NUM_HASHES, value // NUM_HASHES & MASK
+        if cells[cell] == EMPTY or value < cells[cell]:
+            cells[cell] = value
+    result = []
+    for cell in range(NUM_HASHES):
+        distance = 0
+        while cells[(cell + distance) % NUM_HASHES] == EMPTY:
+            distance += 1
+        value = cells[(cell + distance) % NUM_HASHES]
+        result.append((value + distance * FILL_STEP) & MASK)
+    return tuple(result)
+
+
+def similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / NUM_HASHES
+
+
+def band_keys(sig):
+    return [
+        int.from_bytes(hashlib.blake2b(
+            struct.pack(f'>B{ROWS}I', band, *sig[band * ROWS:][:ROWS]),
+            digest_size=8,
+        ).digest(), 'big', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def pack(sig):
+    return struct.pack(SIGNATURE_FORMAT, *sig)
+
+
+def unpack(data):
+    return struct.unpack(SIGNATURE_FORMAT, bytes(data))
+
+
+class MemoryIndex:
+    """LSH-индекс последних ``size`` подписей процесса."""
+
+    def __init__(self, size):
+        self.size = size
+        self.signatures = OrderedDict()
+        self.bands = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def add(self, target, sig):
+        with self.lock:
+            self.discard(target)
+            self.signatures[target] = sig
+            for key in band_keys(sig):
+                self.bands[key].add(target)
+            while len(self.signatures) > self.size:
+                self.discard(next(iter(self.signatures)))
+
+    def remove(self, targets):
+        with self.lock:
+            for target in targets:
+                self.discard(target)
+
+    def discard(self, target):
+        sig = self.signatures.pop(target, None)
+        if sig is None:
+            return
+        for key in band_keys(sig):
+            self.bands[key].discard(target)
+            if not self.bands[key]:
+                del self.bands[key]
+
+    def candidates(self, keys, exclude):
+        with self.lock:
+            targets = set().union(*(self.bands.get(key, ()) for key in keys))
+            targets.discard(exclude)
+            return [(target, self.signatures[target]) for target in targets]
+
+    def clear(self):
+        with self.lock:
+            self.signatures.clear()
+            self.bands.clear()
+
+
+memory_index = MemoryIndex(getattr(settings, 'DUPLICATE_MEMORY_SIZE', 10000))
+
+
+def stored_candidates(keys, exclude):
+    signatures = TextSignature.objects.filter(
+        bands__key__in=keys
+    ).distinct().values_list('kind', 'object_id', 'signature')
+    return [
+        ((kind, object_id), unpack(data))
+        for kind, object_id, data in signatures
+        if (kind, object_id) != exclude
+    ]
+
+
+def find_duplicate(sig, exclude=None):
+    """``((kind, object_id), сходство)`` самого похожего текста
+    не ниже порога или None. ``exclude`` — сам проверяемый текст."""
+    threshold = getattr(settings, 'DUPLICATE_THRESHOLD', 0.7)
+    keys = band_keys(sig)
+    for candidates in (memory_index.candidates, stored_candidates):
+        best = max(
+            ((similarity(sig, other), target)
+             for target, other in candidates(keys, exclude)),
+            default=None,
+        )
+        if best is not None and best[0] >= threshold:
+            return best[1], best[0]
+    return None
+
+
+def check(text, kind, object_id=None):
+    """Подпись текста и найденный дубликат (или None)."""
+    sig = signature(text)
+    if sig is None:
+        return None, None
+    exclude = None if object_id is None else (kind, object_id)
+    match = find_duplicate(sig, exclude)
+    if match is not None:
+        logger.warning(
+            'Текст похож на %s %s (%.2f)', *match[0], match[1]
+        )
+    return sig, match
+
+
+def rejects_duplicates():
+    return getattr(settings, 'DUPLICATE_ACTION', 'reject') == 'reject'
+
+
+def remember(kind, object_id, sig):
+    """Сохраняет подпись текста вместо прежней."""
+    TextSignature.objects.filter(kind=kind, object_id=object_id).delete()
+    if sig is None:
+        return
+    stored = TextSignature.objects.create(
+        kind=kind, object_id=object_id, signature=pack(sig)
+    )
+    TextBand.objects.bulk_create(
+        TextBand(signature=stored, key=key) for key in band_keys(sig)
+    )
+    # в памяти — только закоммиченные тексты
+    transaction.on_commit(
+        lambda: memory_index.add((kind, object_id), sig)
+    )
+
+
+def forget(kind, object_ids):
+    """Удаляет подписи удалённых текстов."""
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    TextSignature.objects.filter(
+        kind=kind, object_id__in=object_ids
+    ).delete()
+    transaction.on_commit(lambda: memory_index.remove(
+        (kind, object_id) for object_id in object_ids
+    ))
+
+
+def backfill(kind, rows, rebuild=False):
+    """Подписи для пар ``(id, текст)`` без подписи. Возвращает их число."""
+    ids = [object_id for object_id, _ in rows]
+    if not rebuild:
+        existing = set(TextSignature.objects.filter(
+            kind=kind, object_id__in=ids
+        ).values_list('object_id', flat=True))
+        rows = [row for row in rows if row[0] not in existing]
+    signatures = {}
+    for object_id, text in rows:
+        sig = signature(text)
+        if sig is not None:
+            signatures[object_id] = sig
+    with transaction.atomic():
+        TextSignature.objects.filter(
+            kind=kind, object_id__in=signatures
+        ).delete()
+        TextSignature.objects.bulk_create(
+            TextSignature(kind=kind, object_id=object_id, signature=pack(sig))
+            for object_id, sig in signatures.items()
+        )
+        stored = TextSignature.objects.filter(
+            kind=kind, object_id__in=signatures
+        ).values_list('object_id', 'pk')
+        TextBand.objects.bulk_create(
+            (
+                TextBand(signature_id=pk, key=key)
+                for object_id, pk in stored
+                for key in band_keys(signatures[object_id])
+            ),
+            batch_size=500,
+        )
+    return len(signatures)
@@ -0,0 +1,238 @@
+"""Server-sent events: новые посты групп и авторов, новые комментарии.
+
+Сигналы ``post_save`` публикуют события в каналы ``group:<id>``,
+``author:<id>`` и ``post:<id>``. Событие записывается в таблицу
+``LiveEvent`` — общий журнал для всех воркеров — и сразу будит
+подписчиков этого процесса через внутреннюю шину. Подписчики других
+воркеров забирают событие из таблицы, проверяя её раз в
+``LIVE_POLL_INTERVAL`` секунд. Поток всегда читает журнал по
+возрастанию id, поэтому события не теряются и не дублируются,
+а переподключение с ``Last-Event-ID`` продолжает поток с места обрыва.
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import LiveEvent
+
+MAX_EVENTS = 100
+PING = ': ping\n\n'
+PRUNE_EVERY = 60
+
+_last_prune = 0
+
+
+def group_channel(group_id):
+    return f'group:{group_id}'
+
+
+def author_channel(author_id):
+    return f'author:{author_id}'
+
+
+def post_channel(post_id):
+    return f'post:{post_id}'
+
+
+class Subscription:
+    """Подписка потока на каналы; ``notify`` будит ожидающий поток."""
+
+    def __init__(self, channels, loop=None):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.event = asyncio.Event() if loop else threading.Event()
+
+    def notify(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.event.set)
+        else:
+            self.event.set()
+
+    def wait(self, timeout):
+        woken = self.event.wait(timeout)
+        self.event.clear()
+        return woken
+
+    async def wait_async(self, timeout):
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.event.clear()
+        return True
+
+
+class Broker:
+    """Шина событий внутри процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+
+    def subscribe(self, channels, loop=None):
+        subscription = Subscription(channels, loop)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def notify(self, channels):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            if subscription.channels & channels:
+                subscription.notify()
+
+
+broker = Broker()
+
+
+def publish(channels, kind, data):
+    """Записывает событие в журнал и будит подписчиков процесса."""
+    payload = json.dumps(data, ensure_ascii=False)
+    LiveEvent.objects.bulk_create(
+        LiveEvent(channel=channel, kind=kind, payload=payload)
+        for channel in channels
+    )
+    broker.notify(set(channels))
+    prune()
+
+
+def prune():
+    """Удаляет события старше ``LIVE_EVENTS_RETENTION`` секунд.
+
+    Выполняется не чаще раза в ``PRUNE_EVERY`` секунд на процесс.
+    """
+    global _last_prune
+    if time.monotonic() - _last_prune < PRUNE_EVERY:
+        return
+    _last_prune = time.monotonic()
+    retention = getattr(settings, 'LIVE_EVENTS_RETENTION', 600)
+    LiveEvent.objects.filter(
+        created__lt=timezone.now() - timedelta(seconds=retention)
+    ).delete()
+
+
+def latest_id():
+    return LiveEvent.objects.aggregate(latest=Max('pk'))['latest'] or 0
+
+
+def read_events(channels, last_id):
+    return list(
+        LiveEvent.objects.filter(channel__in=channels, pk__gt=last_id)
+        .order_by('pk')[:MAX_EVENTS]
+    )
+
+
+def get_last_id(request):
+    """Id последнего полученного события из заголовка ``Last-Event-ID``.
+
+    Новое подключение начинает с текущего конца журнала.
+    """
+    value = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get(
+        'last_event_id'
+    )
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_event(event):
+    return (
+        f'id: {event.pk}\nevent: {event.kind}\ndata: {event.payload}\n\n'
+    )
+
+
+def get_timings():
+    return (
+        getattr(settings, 'LIVE_POLL_INTERVAL', 2.0),
+        getattr(settings, 'LIVE_HEARTBEAT', 15.0),
+        getattr(settings, 'LIVE_STREAM_DURATION', 300),
+    )
+
+
+def retry_line():
+    retry = getattr(settings, 'LIVE_RETRY', 3000)
+    return f'retry: {retry}\n\n'
+
+
+def stream(channels, last_id):
+    """Синхронный поток событий для ``StreamingHttpResponse``.
+
+    Поток закрывается через ``LIVE_STREAM_DURATION`` секунд, чтобы не
+    держать поток воркера вечно; клиент переподключается сам.
+    """
+    interval, heartbeat, duration = get_timings()
+    subscription = broker.subscribe(channels)
+    try:
+        if last_id is None:
+            last_id = latest_id()
+        yield retry_line()
+        deadline = time.monotonic() + duration
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline:
+            events = read_events(channels, last_id)
+            for event in events:
+                last_id = event.pk
+                yield format_event(event)
+            if events:
+                quiet_since = time.monotonic()
+                continue
+            if time.monotonic() - quiet_since >= heartbeat:
+                quiet_since = time.monotonic()
+                yield PING
+            subscription.wait(min(interval, deadline - time.monotonic()))
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def stream_async(channels, last_id):
+    """Асинхронный вариант ``stream``: ожидание не занимает поток."""
+    # сигналы импортируют модуль и под WSGI, где ASGI-обработчик не нужен
+    from core.asgi import run_sync
+
+    interval, heartbeat, duration = get_timings()
+    subscription = broker.subscribe(channels, asyncio.get_running_loop())
+    try:
+        if last_id is None:
+            last_id = await run_sync(latest_id)
+        yield retry_line()
+        deadline = time.monotonic() + duration
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline:
+            events = await run_sync(read_events, channels, last_id)
+            for event in events:
+                last_id = event.pk
+                yield format_event(event)
+            if events:
+                quiet_since = time.monotonic()
+                continue
+            if time.monotonic() - quiet_since >= heartbeat:
+                quiet_since = time.monotonic()
+                yield PING
+            await subscription.wait_async(
+                min(interval, deadline - time.monotonic())
+            )
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def comment_data(comment):
+    return {
+        'id': comment.pk,
+        'post': comment.post_id,
+        'text': comment.text,
+        'author': comment.author.username,
+        'created': comment.created.isoformat(),
+    }
@@ -0,0 +1,123 @@
+"""Ленты постов поверх рабочей таблицы и архива.
+
+Старые посты переносятся из ``Post`` в ``ArchivedPost`` (см.
+``posts.archive``), и каждый архивный пост старше любого рабочего.
+Поэтому лента, упорядоченная по дате, — это рабочие посты, за которыми
+идут архивные: ``TieredPosts`` склеивает два запроса так, что первые
+страницы читают только небольшую рабочую таблицу, а к архиву
+обращаются глубокие страницы. Рабочие посты при нескольких шардах
+собираются со всех шардов, см. ``posts.sharding``.
+"""
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from . import sharding
+from .models import ArchivedPost
+
+
+class TieredPosts:
+    """Последовательность постов для ``Paginator``: сначала рабочие,
+    затем архивные.
+
+    ``hot_count`` — число рабочих постов, если оно уже известно
+    (например, из кэша); иначе считается только когда срез выходит за
+    пределы рабочей таблицы.
+    """
+    ordered = True
+
+    def __init__(self, hot, cold, hot_count=None):
+        self.hot = hot
+        self.cold = cold
+        self.hot_count = hot_count
+
+    def select_related(self, *fields):
+        return TieredPosts(
+            self.hot.select_related(*fields),
+            self.cold.select_related(*fields),
+            self.hot_count,
+        )
+
+    def get_hot_count(self):
+        if self.hot_count is None:
+            self.hot_count = self.hot.count()
+        return self.hot_count
+
+    def count(self):
+        return self.get_hot_count() + self.cold.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return TieredSlice(self, key.start or 0, key.stop)
+        items = self.fetch(key, key + 1)
+        if not items:
+            raise IndexError(key)
+        return items[0]
+
+    def fetch(self, start, stop):
+        if self.hot_count is None or start < self.hot_count:
+            posts = list(self.hot[start:stop])
+            if stop is not None and len(posts) == stop - start:
+                return posts
+            if posts:
+                # рабочая таблица кончилась внутри среза
+                self.hot_count = start + len(posts)
+        else:
+            posts = []
+        offset = max(start - self.get_hot_count(), 0)
+        cold_stop = None if stop is None else stop - self.get_hot_count()
+        return posts + list(self.cold[offset:cold_stop])
+
+
+class TieredSlice:
+    """Срез ``TieredPosts``, который, как срез QuerySet, читается из
+    базы только при обращении к постам."""
+
+    def __init__(self, posts, start, stop):
+        self.posts = posts
+        self.start = start
+        self.stop = stop
+
+    @cached_property
+    def items(self):
+        return self.posts.fetch(self.start, self.stop)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, key):
+        return self.items[key]
+
+
+def posts_feed(**lookups):
+    """Лента постов, отобранных одинаковыми условиями в обеих таблицах."""
+    return TieredPosts(
+        sharding.posts(**lookups),
+        ArchivedPost.objects.filter(**lookups),
+    )
+
+
+def find_post(post_id):
+    """Пост по id из его шарда или архива; 404, если его нет."""
+    for queryset in (
+        sharding.post_queryset(post_id), ArchivedPost.objects.all()
+    ):
+        post = sharding.related(
+            queryset.filter(pk=post_id), 'author', 'group'
+        ).first()
+        if post is not None:
+            return post
+    raise Http404('Пост не найден')
+
+
+def is_archived(post):
+    return isinstance(post, ArchivedPost)
+
+
+def count_author_posts(author_id):
+    return (
+        sharding.posts(author=author_id).count()
+        + ArchivedPost.objects.filter(author=author_id).count()
+    )
@@ -1,9 +1,31 @@
 from django import forms
 
-from .models import Post, Comment
+from . import duplicates
+from .models import Post, Comment, TextSignature
 
 
-class PostForm(forms.ModelForm):
+class DuplicateTextMixin:
+    """Отклоняет текст, почти совпадающий с уже опубликованным,
+    см. ``posts.duplicates``."""
+    duplicate_kind = None
+
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        sig, match = duplicates.check(
+            text, self.duplicate_kind, self.instance.pk
+        )
+        if match is not None and duplicates.rejects_duplicates():
+            raise forms.ValidationError(
+                'Такой текст уже публиковали.', code='duplicate'
+            )
+        # подпись сохраняется после записи, без повторного расчёта
+        self.instance._text_signature = (text, sig)
+        return text
+
+
+class PostForm(DuplicateTextMixin, forms.ModelForm):
+    duplicate_kind = TextSignature.POST
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['group'].empty_label = "Группа не выбрана"
@@ -13,7 +35,9 @@ class PostForm(forms.ModelForm):
         fields = ('group', 'text', 'image')
 
 
-class CommentForm(forms.ModelForm):
+class CommentForm(DuplicateTextMixin, forms.ModelForm):
+    duplicate_kind = TextSignature.COMMENT
+
     class Meta:
         model = Comment
         fields = ('text',)
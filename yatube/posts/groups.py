@@ -0,0 +1,190 @@
+"""Кэш групп: метаданные, сводки для каталога и первые страницы лент.
+
+* группа по slug и каталог групп хранятся в кэше целиком;
+* первые ``GROUP_CACHED_PAGES`` страниц ленты каждой группы хранятся
+  в кэше вместе с числом постов, поэтому типичный запрос к странице
+  группы не обращается к базе;
+* при создании, правке, переносе и удалении поста кэш группы
+  сбрасывается (см. ``posts.signals`` и ``posts.invalidation``);
+* ``GroupSummary`` при изменении одного поста обновляется на месте
+  (``add_to_summary``, ``remove_from_summary``), после пакетных операций
+  и командой ``refresh_group_summaries`` — пересчитывается целиком.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, F, Max, Q
+from django.http import Http404
+
+from .feeds import posts_feed
+from .models import ArchivedPost, Group, GroupSummary, Post
+from .sharding import get_shards
+
+POSTS_PER_PAGE = 10
+DIRECTORY_KEY = 'groups:directory'
+GROUP_KEY = 'groups:slug:{slug}'
+FEED_KEY = 'groups:feed:{group_id}:{number}'
+COUNT_KEY = 'groups:feed:{group_id}:count'
+
+
+def get_cached_pages():
+    return getattr(settings, 'GROUP_CACHED_PAGES', 3)
+
+
+def get_timeout():
+    return getattr(settings, 'GROUP_CACHE_TIMEOUT', 300)
+
+
+def group_key(slug):
+    # slug приходит из адреса и может быть любым, а ключи memcached —
+    # только ASCII без пробелов
+    return GROUP_KEY.format(slug=hashlib.md5(slug.encode()).hexdigest())
+
+
+def get_group(slug):
+    """Группа по slug из кэша или из базы; 404, если её нет."""
+    key = group_key(slug)
+    group = cache.get(key)
+    if group is None:
+        group = Group.objects.filter(slug=slug).first()
+        if group is None:
+            raise Http404('Группа не найдена')
+        cache.set(key, group, get_timeout())
+    return group
+
+
+def get_page_number(request):
+    try:
+        return int(request.GET.get('page', 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def get_group_page(request, group):
+    """Страница ленты группы; первые страницы берутся из кэша."""
+    posts = posts_feed(group=group).select_related('author', 'group')
+    paginator = Paginator(posts, POSTS_PER_PAGE)
+    number = get_page_number(request)
+    if not 1 <= number <= get_cached_pages():
+        return paginator.get_page(request.GET.get('page'))
+
+    count_key = COUNT_KEY.format(group_id=group.pk)
+    feed_key = FEED_KEY.format(group_id=group.pk, number=number)
+    cached = cache.get_many([count_key, feed_key])
+    if count_key in cached:
+        paginator.count = cached[count_key]
+    else:
+        cache.set(count_key, paginator.count, get_timeout())
+    page_obj = paginator.get_page(number)
+    if page_obj.number != number:
+        return page_obj
+    if feed_key in cached:
+        page_obj.object_list = cached[feed_key]
+    else:
+        page_obj.object_list = list(page_obj.object_list)
+        cache.set(feed_key, page_obj.object_list, get_timeout())
+    return page_obj
+
+
+def get_directory():
+    """Список групп со сводками для каталога."""
+    groups = cache.get(DIRECTORY_KEY)
+    if groups is None:
+        groups = list(
+            Group.objects.select_related('summary').order_by('title')
+        )
+        cache.set(DIRECTORY_KEY, groups, get_timeout())
+    return groups
+
+
+def refresh_summaries(group_ids):
+    """Пересчитывает сводки указанных групп.
+
+    Посты в ``default`` считаются вместе с группами, посты других
+    шардов и архива — по агрегирующему запросу на таблицу.
+    """
+    group_ids = {group_id for group_id in group_ids if group_id}
+    if not group_ids:
+        return
+    totals = {
+        row['pk']: [row['post_count'], row['last_post_date']]
+        for row in Group.objects.filter(pk__in=group_ids).annotate(
+            post_count=Count('posts'), last_post_date=Max('posts__pub_date')
+        ).values('pk', 'post_count', 'last_post_date')
+    }
+    querysets = [
+        Post.objects.using(alias) for alias in get_shards()
+        if alias != DEFAULT_DB_ALIAS
+    ]
+    querysets.append(ArchivedPost.objects.all())
+    for queryset in querysets:
+        for row in queryset.filter(group__in=list(totals)).order_by().values(
+            'group'
+        ).annotate(count=Count('pk'), last=Max('pub_date')):
+            total = totals[row['group']]
+            total[0] += row['count']
+            total[1] = max(filter(None, (total[1], row['last'])), default=None)
+    for group_id, (post_count, last_post_date) in totals.items():
+        GroupSummary.objects.update_or_create(
+            group_id=group_id,
+            defaults={
+                'post_count': post_count,
+                'last_post_date': last_post_date,
+            },
+        )
+    cache.delete(DIRECTORY_KEY)
+
+
+def add_to_summary(group_id, pub_date):
+    """Учитывает в сводке группы новый пост."""
+    if not group_id:
+        return
+    GroupSummary.objects.filter(group_id=group_id).update(
+        post_count=F('post_count') + 1
+    )
+    GroupSummary.objects.filter(
+        Q(last_post_date=None) | Q(last_post_date__lt=pub_date),
+        group_id=group_id,
+    ).update(last_post_date=pub_date)
+    cache.delete(DIRECTORY_KEY)
+
+
+def remove_from_summary(group_id, pub_date):
+    """Убирает из сводки группы удалённый или перенесённый пост.
+
+    Дату последнего поста без полного пересчёта не узнать, поэтому
+    группа пересчитывается, только если ушёл её последний пост.
+    """
+    if not group_id:
+        return
+    GroupSummary.objects.filter(group_id=group_id, post_count__gt=0).update(
+        post_count=F('post_count') - 1
+    )
+    if GroupSummary.objects.filter(
+        group_id=group_id, last_post_date__lte=pub_date
+    ).exists():
+        refresh_summaries([group_id])
+    else:
+        cache.delete(DIRECTORY_KEY)
+
+
+def invalidate_group_feeds(group_ids):
+    """Сбрасывает кэш лент групп (но не сами группы)."""
+    keys = []
+    for group_id in {group_id for group_id in group_ids if group_id}:
+        keys.append(COUNT_KEY.format(group_id=group_id))
+        keys.extend(
+            FEED_KEY.format(group_id=group_id, number=number)
+            for number in range(1, get_cached_pages() + 1)
+        )
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_group(group):
+    """Сбрасывает кэш метаданных группы после её изменения."""
+    cache.delete_many([group_key(group.slug), DIRECTORY_KEY])
+    invalidate_group_feeds([group.pk])
@@ -0,0 +1,310 @@
+"""Адаптивные варианты картинок постов.
+
+При загрузке картинки строятся уменьшенные копии ширин
+``IMAGE_VARIANT_WIDTHS`` в форматах ``IMAGE_VARIANT_FORMATS``.
+Форматы, которые не поддерживает установленный Pillow (AVIF, WebP),
+пропускаются, JPEG строится всегда. Размеры и имена файлов
+сохраняются в ``Post.image_variants``, поэтому тег ``responsive_image``
+собирает ``srcset`` без обращений к файловой системе.
+
+Варианты названы по хешу исходника, поэтому для повторно загруженной
+картинки они не строятся заново. Строятся они не в запросе загрузки,
+а согласно ``IMAGE_VARIANTS_MODE``:
+
+* ``thread`` — в фоновом потоке после коммита транзакции запроса;
+* ``worker`` — командой ``build_image_variants`` по расписанию;
+* ``sync`` — сразу, в том же потоке (для тестов).
+
+Пока вариантов нет, шаблон показывает уменьшенную копию ширины самого
+узкого варианта из кэша sorl-thumbnail. Pillow
+импортируется только для сборки: модуль загружают сигналы при старте
+каждого процесса.
+
+Удалённый пост оставляет картинку на диске: её может в этот момент
+загрузить другой пост, чья транзакция ещё не закоммичена. Картинки
+без ссылок удаляет команда ``collect_orphan_images``.
+"""
+import hashlib
+import json
+import logging
+import threading
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import ArchivedPost, Post
+from .sharding import get_shards
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'AVIF': ('image/avif', 'avif'),
+    'WEBP': ('image/webp', 'webp'),
+    'JPEG': ('image/jpeg', 'jpg'),
+}
+FALLBACK_FORMAT = 'JPEG'
+VARIANTS_DIR = 'posts/variants'
+
+
+def is_supported(format_name):
+    from PIL import features
+
+    try:
+        return features.check_module(format_name.lower())
+    except ValueError:
+        # модуль неизвестен этой версии Pillow
+        return False
+
+
+def supported_formats():
+    """Настроенные форматы, доступные в установленном Pillow."""
+    formats = []
+    for name in getattr(settings, 'IMAGE_VARIANT_FORMATS', ('JPEG',)):
+        if name == FALLBACK_FORMAT or is_supported(name):
+            formats.append(name)
+    if FALLBACK_FORMAT not in formats:
+        formats.append(FALLBACK_FORMAT)
+    return formats
+
+
+def variant_widths(width):
+    """Ширины вариантов не больше исходной; хотя бы одна всегда есть."""
+    widths = sorted(getattr(settings, 'IMAGE_VARIANT_WIDTHS', (640,)))
+    result = [size for size in widths if size < width]
+    result.append(min(width, widths[-1]))
+    return sorted(set(result))
+
+
+def prepare(image, format_name):
+    from PIL import Image
+
+    if format_name == 'JPEG' and image.mode != 'RGB':
+        # JPEG без прозрачности: подкладываем белый фон
+        background = Image.new('RGB', image.size, 'white')
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    if image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA')
+    return image
+
+
+def encode(image, format_name):
+    buffer = BytesIO()
+    quality = getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+    image.save(buffer, format_name, quality=quality)
+    return buffer.getvalue()
+
+
+def get_digest(storage, name):
+    """Хеш содержимого из имени, если хранилище адресует по содержимому."""
+    return storage.digest(name) if hasattr(storage, 'digest') else None
+
+
+def source_key(storage, name):
+    """Хеш содержимого картинки, а для старых файлов — хеш имени."""
+    digest = get_digest(storage, name)
+    return digest or hashlib.sha1(name.encode()).hexdigest()
+
+
+def variants_dir(storage, name):
+    return f'{VARIANTS_DIR}/{source_key(storage, name)}'
+
+
+def build_variants(field_file):
+    """Строит варианты картинки и возвращает их описание.
+
+    Описание: ``{"width", "height", "formats": {mime: [[ширина, имя]]}}``,
+    форматы в порядке предпочтения. Варианты лежат в каталоге, названном
+    по хешу исходника, и уже построенные для такой же картинки файлы
+    используются повторно без декодирования. Для битой или отсутствующей
+    картинки возвращается пустой словарь — шаблон покажет уменьшенную
+    копию, если её удастся построить.
+    """
+    from PIL import Image
+
+    storage = field_file.storage
+    try:
+        with storage.open(field_file.name) as source:
+            original = Image.open(source)
+            width, height = original.size
+            directory = variants_dir(storage, field_file.name)
+            formats = {}
+            for format_name in supported_formats():
+                mime, extension = FORMATS[format_name]
+                prepared = None
+                sources = []
+                for size in variant_widths(width):
+                    name = f'{directory}/{size}w.{extension}'
+                    if not storage.exists(name):
+                        if prepared is None:
+                            prepared = prepare(original, format_name)
+                        resized = prepared.resize(
+                            (size, max(round(height * size / width), 1)),
+                            Image.LANCZOS,
+                        )
+                        name = storage.save(
+                            name, ContentFile(encode(resized, format_name))
+                        )
+                    sources.append([size, name])
+                formats[mime] = sources
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning('Не удалось открыть картинку %s', field_file.name)
+        return {}
+    return {'width': width, 'height': height, 'formats': formats}
+
+
+def update_variants(post):
+    """Пересчитывает варианты картинки поста и сохраняет описание.
+
+    Описание записывается, только если картинку поста за это время
+    не заменили.
+    """
+    variants = build_variants(post.image) if post.image else {}
+    post.image_variants = json.dumps(variants) if variants else ''
+    Post.objects.using(post._state.db).filter(
+        pk=post.pk, image=post.image.name or ''
+    ).update(image_variants=post.image_variants)
+    return variants
+
+
+def build_post_variants(alias, post_id):
+    post = Post.objects.using(alias).filter(pk=post_id).only(
+        'pk', 'image'
+    ).first()
+    if post is not None:
+        update_variants(post)
+
+
+def start_thread(alias, post_id):
+    def target():
+        try:
+            build_post_variants(alias, post_id)
+        except Exception:
+            logger.exception('Не удалось построить варианты поста %s', post_id)
+        finally:
+            connections.close_all()
+
+    threading.Thread(
+        target=target, name=f'image-variants-{post_id}', daemon=True
+    ).start()
+
+
+def schedule_variants(post):
+    """Строит варианты новой картинки поста согласно настройкам.
+
+    Описание старой картинки стирается сразу, чтобы шаблон не ссылался
+    на её варианты.
+    """
+    mode = getattr(settings, 'IMAGE_VARIANTS_MODE', 'thread')
+    if mode == 'sync':
+        update_variants(post)
+        return
+    alias = post._state.db
+    if post.image_variants:
+        post.image_variants = ''
+        Post.objects.using(alias).filter(pk=post.pk).update(image_variants='')
+    if mode == 'thread':
+        post_id = post.pk
+        transaction.on_commit(
+            lambda: start_thread(alias, post_id), using=alias
+        )
+
+
+def referenced_images(names):
+    """Имена из ``names``, на которые ссылаются посты шардов и архива."""
+    querysets = [Post.objects.using(alias) for alias in get_shards()]
+    querysets.append(ArchivedPost.objects.all())
+    referenced = set()
+    for queryset in querysets:
+        referenced.update(
+            queryset.filter(image__in=names).values_list('image', flat=True)
+        )
+    return referenced
+
+
+def is_recent(storage, name, grace):
+    try:
+        modified = storage.get_modified_time(name)
+    except OSError:
+        return False
+    return timezone.now() - modified < timedelta(seconds=grace)
+
+
+def get_grace():
+    return getattr(settings, 'IMAGE_GC_GRACE', 3600)
+
+
+def delete_image(storage, name, grace):
+    """Удаляет картинку и её варианты, если её давно не загружали."""
+    # время проверяется последним: загрузка обновляет его раньше коммита
+    if is_recent(storage, name, grace):
+        return False
+    storage.delete(name)
+    directory = variants_dir(storage, name)
+    try:
+        _, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return True
+    for filename in files:
+        storage.delete(f'{directory}/{filename}')
+    return True
+
+
+def release_image(name, grace=None):
+    """Удаляет картинку и её варианты, если на неё не ссылаются посты.
+
+    Одинаковые картинки хранятся одним файлом (см.
+    ``core.storage``), поэтому число ссылок — это число постов с таким
+    ``image`` во всех шардах и в архиве. Файлы, сохранённые не по
+    хешу, и файлы, загруженные за последние ``grace`` секунд,
+    не удаляются.
+    """
+    storage = Post._meta.get_field('image').storage
+    if not name or not get_digest(storage, name):
+        return False
+    if referenced_images([name]):
+        return False
+    return delete_image(
+        storage, name, get_grace() if grace is None else grace
+    )
+
+
+def iter_images(storage, directory):
+    """Имена картинок с хешем в ``directory`` и подкаталогах."""
+    try:
+        dirs, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        name = f'{directory}/{filename}'
+        if get_digest(storage, name):
+            yield name
+    for subdir in dirs:
+        if f'{directory}/{subdir}' != VARIANTS_DIR:
+            yield from iter_images(storage, f'{directory}/{subdir}')
+
+
+def collect_orphans(grace=None, batch_size=500):
+    """Удаляет картинки без ссылок. Возвращает число удалённых."""
+    storage = Post._meta.get_field('image').storage
+    if grace is None:
+        grace = get_grace()
+    names = [
+        name
+        for directory in sorted(getattr(storage, 'hashed_dirs', ()))
+        for name in iter_images(storage, directory)
+        if not is_recent(storage, name, grace)
+    ]
+    deleted = 0
+    for start in range(0, len(names), batch_size):
+        batch = names[start:start + batch_size]
+        referenced = referenced_images(batch)
+        for name in batch:
+            if name not in referenced and delete_image(storage, name, grace):
+                deleted += 1
+    return deleted
@@ -0,0 +1,56 @@
+"""Сброс кэшей лент после изменения постов.
+
+Единая точка, которую вызывают фоновые задания и сигналы:
+сюда добавляются все кэши, зависящие от состава лент.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from .groups import invalidate_group_feeds, refresh_summaries
+from .profiles import invalidate_profiles
+
+INDEX_FRAGMENT = 'index_page'
+
+_state = threading.local()
+
+
+@contextmanager
+def batched():
+    """Отключает сброс кэшей из сигналов на время пакетной операции.
+
+    Код внутри блока сам вызывает ``invalidate_feeds`` один раз на пачку.
+    """
+    previous = getattr(_state, 'batched', False)
+    _state.batched = True
+    try:
+        yield
+    finally:
+        _state.batched = previous
+
+
+def is_batched():
+    return getattr(_state, 'batched', False)
+
+
+def invalidate_feeds(group_ids=(), author_ids=(), index=True,
+                     summaries=True):
+    """Сбрасывает кэши лент, затронутых изменением постов.
+
+    ``index=False`` оставляет фрагмент главной страницы жить до конца
+    его короткого таймаута, ``summaries=False`` не пересчитывает сводки
+    групп (их уже обновил вызывающий).
+    """
+    if index:
+        pages = getattr(settings, 'INDEX_CACHED_PAGES', 5)
+        cache.delete_many([
+            make_template_fragment_key(INDEX_FRAGMENT, [number])
+            for number in range(1, pages + 1)
+        ])
+    invalidate_group_feeds(group_ids)
+    if summaries:
+        refresh_summaries(group_ids)
+    invalidate_profiles(author_ids)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_old_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Возраст постов в днях (по умолчанию ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Постов в одной транзакции (по умолчанию ARCHIVE_BATCH_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        count = archive_old_posts(options['days'], options['batch_size'])
+        self.stdout.write(f'Перенесено в архив постов: {count}')
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from posts.duplicates import backfill
+from posts.models import ArchivedPost, Comment, Post, TextSignature
+from posts.sharding import get_shards
+
+
+class Command(BaseCommand):
+    help = 'Строит подписи уже опубликованных текстов для поиска дубликатов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Текстов в одной транзакции',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Пересчитать и существующие подписи',
+        )
+
+    def handle(self, *args, **options):
+        sources = [
+            (TextSignature.POST, Post.objects.using(alias))
+            for alias in get_shards()
+        ] + [
+            (TextSignature.POST, ArchivedPost.objects.all()),
+        ] + [
+            (TextSignature.COMMENT, Comment.objects.using(alias))
+            for alias in get_shards()
+        ]
+        total = 0
+        for kind, queryset in sources:
+            last = 0
+            while True:
+                rows = list(
+                    queryset.filter(pk__gt=last).order_by('pk')
+                    .values_list('pk', 'text')[:options['batch_size']]
+                )
+                if not rows:
+                    break
+                total += backfill(kind, rows, options['rebuild'])
+                last = rows[-1][0]
+        self.stdout.write(f'Построено подписей: {total}')
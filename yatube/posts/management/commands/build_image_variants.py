@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import update_variants
+from posts.models import Post
+from posts.sharding import get_shards
+
+
+class Command(BaseCommand):
+    help = 'Строит адаптивные варианты картинок для уже загруженных постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить и посты, у которых варианты уже есть',
+        )
+
+    def handle(self, *args, **options):
+        built = 0
+        for alias in get_shards():
+            posts = Post.objects.using(alias).exclude(image='').only(
+                'pk', 'image'
+            )
+            if not options['all']:
+                posts = posts.filter(image_variants='')
+            for post in posts.iterator():
+                if update_variants(post):
+                    built += 1
+        self.stdout.write(f'Построены варианты для {built} постов')
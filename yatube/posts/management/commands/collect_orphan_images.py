@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import collect_orphans
+
+
+class Command(BaseCommand):
+    help = 'Удаляет картинки постов, на которые больше нет ссылок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=int,
+            default=None,
+            help='Не трогать файлы, загруженные за последние N секунд '
+                 '(по умолчанию IMAGE_GC_GRACE)',
+        )
+
+    def handle(self, *args, **options):
+        deleted = collect_orphans(options['grace'])
+        self.stdout.write(f'Удалено картинок: {deleted}')
@@ -0,0 +1,10 @@
+from core.management.periodic import PeriodicCommand
+from posts.ranking import rank_posts
+
+
+class Command(PeriodicCommand):
+    help = 'Пересчитывает ленты «в тренде» и «популярное»'
+    label = 'Записано позиций'
+
+    def run_once(self):
+        return rank_posts()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.rebalance import rebalance
+
+
+class Command(BaseCommand):
+    help = 'Переносит посты в шарды их авторов после изменения POST_SHARDS'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='sources',
+            action='append',
+            default=[],
+            help='Алиас базы, выведенной из POST_SHARDS (можно повторять)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Постов в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        moved = rebalance(options['sources'], options['batch_size'])
+        self.stdout.write(f'Перенесено постов: {moved}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.groups import refresh_summaries
+from posts.models import Group
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводки всех групп для каталога'
+
+    def handle(self, *args, **options):
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+        refresh_summaries(group_ids)
+        self.stdout.write(f'Пересчитано групп: {len(group_ids)}')
@@ -0,0 +1,10 @@
+from core.management.periodic import PeriodicCommand
+from posts.related import relate_posts
+
+
+class Command(PeriodicCommand):
+    help = 'Пересчитывает блок «похожие посты»'
+    label = 'Записано похожих постов'
+
+    def run_once(self):
+        return relate_posts()
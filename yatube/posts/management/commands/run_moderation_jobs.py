@@ -0,0 +1,15 @@
+from core.management.periodic import PeriodicCommand
+from posts.moderation import run_pending
+
+
+class Command(PeriodicCommand):
+    help = 'Выполняет задания массовой модерации из очереди'
+    label = 'Выполнено заданий'
+    interval_help = 'Проверять очередь каждые N секунд (0 — один проход)'
+
+    def run_once(self):
+        return run_pending()
+
+    def report(self, count, elapsed):
+        if count:
+            self.stdout.write(f'{self.label}: {count}')
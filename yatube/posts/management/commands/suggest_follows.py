@@ -0,0 +1,10 @@
+from core.management.periodic import PeriodicCommand
+from posts.suggestions import suggest_follows
+
+
+class Command(PeriodicCommand):
+    help = 'Пересчитывает рекомендации «кого почитать»'
+    label = 'Записано рекомендаций'
+
+    def run_once(self):
+        return suggest_follows()
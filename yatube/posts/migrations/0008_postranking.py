@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_auto_20220708_1426'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRanking',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('trending', 'В тренде'), ('popular', 'Популярное')], max_length=16, verbose_name='Тип ленты')),
+                ('position', models.PositiveIntegerField(verbose_name='Позиция')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='posts.Group', verbose_name='Группа')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Позиция в рейтинге',
+                'verbose_name_plural': 'Рейтинг постов',
+                'ordering': ('position',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postranking',
+            index=models.Index(fields=['kind', 'group', 'position'], name='posts_ranking_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('delete', 'Удалить посты'), ('move', 'Перенести в группу'), ('delete_by_author', 'Удалить все посты авторов')], max_length=32, verbose_name='Действие')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('object_ids', models.TextField(help_text='Через запятую', verbose_name='Id постов или авторов')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Всего постов')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group', verbose_name='Целевая группа')),
+            ],
+            options={
+                'verbose_name': 'Задание модерации',
+                'verbose_name_plural': 'Задания модерации',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
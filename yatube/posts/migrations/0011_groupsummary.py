@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:10
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def fill_summaries(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupSummary = apps.get_model('posts', 'GroupSummary')
+    GroupSummary.objects.bulk_create(
+        GroupSummary(
+            group_id=group['pk'],
+            post_count=group['post_count'],
+            last_post_date=group['last_post_date'],
+        )
+        for group in Group.objects.annotate(
+            post_count=Count('posts'), last_post_date=Max('posts__pub_date')
+        ).values('pk', 'post_count', 'last_post_date')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_moderationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupSummary',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+                ('last_post_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего поста')),
+            ],
+            options={
+                'verbose_name': 'Сводка группы',
+                'verbose_name_plural': 'Сводки групп',
+            },
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
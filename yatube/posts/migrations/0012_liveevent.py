@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_groupsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=64, verbose_name='Канал')),
+                ('kind', models.CharField(max_length=16, verbose_name='Тип')),
+                ('payload', models.TextField(verbose_name='Данные в JSON')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Создано')),
+            ],
+            options={
+                'verbose_name': 'Событие потока',
+                'verbose_name_plural': 'События потоков',
+                'ordering': ('pk',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='liveevent',
+            index=models.Index(fields=['channel', 'id'], name='posts_liveevent_feed_idx'),
+        ),
+    ]
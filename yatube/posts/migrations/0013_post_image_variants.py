@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_liveevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, editable=False, help_text='Размеры и файлы уменьшенных копий в JSON', verbose_name='Варианты картинки'),
+        ),
+    ]
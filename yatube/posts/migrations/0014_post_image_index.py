@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, upload_to='posts/', verbose_name='Картинка'),
+        ),
+    ]
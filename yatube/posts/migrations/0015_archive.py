@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_post_image_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('text', models.TextField(help_text='Введите текст поста', verbose_name='Текст поста')),
+                ('image', models.ImageField(blank=True, db_index=True, upload_to='posts/', verbose_name='Картинка')),
+                ('image_variants', models.TextField(blank=True, editable=False, help_text='Размеры и файлы уменьшенных копий в JSON', verbose_name='Варианты картинки')),
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('pub_date', models.DateTimeField(db_index=True, verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Пост в архиве',
+                'verbose_name_plural': 'Архив постов',
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('created', models.DateTimeField(verbose_name='Дата создания')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.ArchivedPost', verbose_name='Пост')),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_sharding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(verbose_name='Позиция')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация автора',
+                'verbose_name_plural': 'Рекомендации авторов',
+                'ordering': ('position',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='followsuggestion',
+            index=models.Index(fields=['user', 'position'], name='posts_suggestion_user_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_follow_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(verbose_name='Позиция')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='posts.Post', verbose_name='Пост')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_to', to='posts.Post', verbose_name='Похожий пост')),
+            ],
+            options={
+                'verbose_name': 'Похожий пост',
+                'verbose_name_plural': 'Похожие посты',
+                'ordering': ('position',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='relatedpost',
+            index=models.Index(fields=['post', 'position'], name='posts_related_post_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_related_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextBand',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, verbose_name='Хеш полосы')),
+            ],
+            options={
+                'verbose_name': 'Полоса подписи',
+                'verbose_name_plural': 'Полосы подписей',
+            },
+        ),
+        migrations.CreateModel(
+            name='TextSignature',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=8, verbose_name='Тип текста')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id поста или комментария')),
+                ('signature', models.BinaryField(verbose_name='Подпись')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Подпись текста',
+                'verbose_name_plural': 'Подписи текстов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='textsignature',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_text_signature'),
+        ),
+        migrations.AddField(
+            model_name='textband',
+            name='signature',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='posts.TextSignature', verbose_name='Подпись'),
+        ),
+    ]
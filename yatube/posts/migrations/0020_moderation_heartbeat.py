@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_text_signatures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moderationjob',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний прогресс'),
+        ),
+    ]
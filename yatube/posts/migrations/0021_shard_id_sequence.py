@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_moderation_heartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.DeleteModel(
+            name='CommentKey',
+        ),
+    ]
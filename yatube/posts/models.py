@@ -1,3 +1,5 @@
+import json
+
 from django.db import models
 
 from django.contrib.auth import get_user_model
@@ -5,20 +7,62 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
-class Post(models.Model):
+class ShardedQuerySet(models.QuerySet):
+    def create(self, **kwargs):
+        """Без явного ``using`` база выбирается по созданному объекту:
+        роутер отправляет пост в шард автора (см. ``posts.sharding``)."""
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+
+class BasePost(models.Model):
+    """Поля поста, общие для рабочей таблицы и архива."""
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+        db_index=True,
+    )
+    image_variants = models.TextField(
+        'Варианты картинки',
+        blank=True,
+        editable=False,
+        help_text='Размеры и файлы уменьшенных копий в JSON',
     )
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return self.text[:15]
+
+    @property
+    def variants(self):
+        """Описание вариантов картинки, см. ``posts.images``."""
+        return json.loads(self.image_variants) if self.image_variants else {}
+
+
+class Post(BasePost):
+    # посты могут лежать в другой базе, чем пользователи и группы,
+    # поэтому связи с ними не проверяются базой (см. posts.sharding)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='posts',
         verbose_name='Автор',
+        db_constraint=False,
     )
     group = models.ForeignKey(
         'Group', on_delete=models.SET_NULL,
@@ -26,22 +70,17 @@ class Post(models.Model):
         blank=True,
         null=True,
         verbose_name='Группа',
-        help_text='Выберите группу'
-    )
-    image = models.ImageField(
-        'Картинка',
-        upload_to='posts/',
-        blank=True
+        help_text='Выберите группу',
+        db_constraint=False,
     )
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
-    def __str__(self):
-        return self.text[:15]
-
 
 class Group(models.Model):
 
@@ -70,7 +109,8 @@ class Comment(models.Model):
         User,
         on_delete=models.CASCADE,
         verbose_name='Автор',
-        related_name='comments'
+        related_name='comments',
+        db_constraint=False,
     )
     text = models.TextField(
         verbose_name='Текст',
@@ -80,6 +120,8 @@ class Comment(models.Model):
         verbose_name='Дата создания',
         auto_now_add=True)
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ('-created',)
 
@@ -99,5 +141,367 @@ class Follow(models.Model):
         related_name='following',
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_follow'
+            ),
+        ]
+
     def __str__(self):
         return f'{self.user}-->{self.author}'
+
+
+class FollowSuggestion(models.Model):
+    """Предрассчитанный автор в блоке «кого почитать».
+
+    Заполняется командой ``suggest_follows``, см. ``posts.suggestions``.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    position = models.PositiveIntegerField('Позиция')
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('position',)
+        indexes = [
+            models.Index(
+                fields=('user', 'position'),
+                name='posts_suggestion_user_idx',
+            ),
+        ]
+        verbose_name = 'Рекомендация автора'
+        verbose_name_plural = 'Рекомендации авторов'
+
+    def __str__(self):
+        return f'{self.user} #{self.position}: {self.author}'
+
+
+class PostRanking(models.Model):
+    """Предрассчитанная позиция поста в ленте «в тренде» или «популярное».
+
+    Строки с ``group=None`` образуют общую ленту. Заполняется командой
+    ``rank_posts``, см. ``posts.ranking``.
+    """
+    TRENDING = 'trending'
+    POPULAR = 'popular'
+    KINDS = (
+        (TRENDING, 'В тренде'),
+        (POPULAR, 'Популярное'),
+    )
+
+    kind = models.CharField('Тип ленты', max_length=16, choices=KINDS)
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        blank=True,
+        null=True,
+        verbose_name='Группа',
+    )
+    position = models.PositiveIntegerField('Позиция')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Пост',
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('position',)
+        indexes = [
+            models.Index(
+                fields=('kind', 'group', 'position'),
+                name='posts_ranking_feed_idx',
+            ),
+        ]
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Рейтинг постов'
+
+    def __str__(self):
+        return f'{self.kind} #{self.position}: {self.post_id}'
+
+
+class RelatedPost(models.Model):
+    """Предрассчитанный похожий пост для блока на странице поста.
+
+    Заполняется командой ``relate_posts``, см. ``posts.related``.
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_links',
+        verbose_name='Пост',
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_to',
+        verbose_name='Похожий пост',
+    )
+    position = models.PositiveIntegerField('Позиция')
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        ordering = ('position',)
+        indexes = [
+            models.Index(
+                fields=('post', 'position'),
+                name='posts_related_post_idx',
+            ),
+        ]
+        verbose_name = 'Похожий пост'
+        verbose_name_plural = 'Похожие посты'
+
+    def __str__(self):
+        return f'{self.post_id} #{self.position}: {self.related_id}'
+
+
+class ModerationJob(models.Model):
+    """Фоновое задание массовой модерации постов из админки.
+
+    Выполняется пачками по ``MODERATION_CHUNK_SIZE`` постов,
+    см. ``posts.moderation``.
+    """
+    DELETE = 'delete'
+    MOVE = 'move'
+    DELETE_BY_AUTHOR = 'delete_by_author'
+    ACTIONS = (
+        (DELETE, 'Удалить посты'),
+        (MOVE, 'Перенести в группу'),
+        (DELETE_BY_AUTHOR, 'Удалить все посты авторов'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    action = models.CharField('Действие', max_length=32, choices=ACTIONS)
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=PENDING
+    )
+    object_ids = models.TextField(
+        'Id постов или авторов', help_text='Через запятую'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        blank=True,
+        null=True,
+        verbose_name='Целевая группа',
+    )
+    total = models.PositiveIntegerField('Всего постов', default=0)
+    processed = models.PositiveIntegerField('Обработано', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    heartbeat = models.DateTimeField(
+        'Последний прогресс', blank=True, null=True
+    )
+    finished = models.DateTimeField('Завершено', blank=True, null=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Задание модерации'
+        verbose_name_plural = 'Задания модерации'
+
+    def __str__(self):
+        return f'{self.get_action_display()} #{self.pk}'
+
+    @property
+    def ids(self):
+        return [int(pk) for pk in self.object_ids.split(',') if pk]
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100 if self.status == self.DONE else 0
+        return round(self.processed * 100 / self.total)
+
+
+class GroupSummary(models.Model):
+    """Предрассчитанные счётчики группы для каталога групп.
+
+    Обновляется при изменении постов группы, см. ``posts.groups``.
+    """
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary',
+        verbose_name='Группа',
+    )
+    post_count = models.PositiveIntegerField('Число постов', default=0)
+    last_post_date = models.DateTimeField(
+        'Дата последнего поста', blank=True, null=True
+    )
+
+    class Meta:
+        verbose_name = 'Сводка группы'
+        verbose_name_plural = 'Сводки групп'
+
+    def __str__(self):
+        return f'{self.group}: {self.post_count}'
+
+
+class LiveEvent(models.Model):
+    """Событие для потоков server-sent events.
+
+    Таблица служит общим журналом для всех воркеров: поток читает
+    события по возрастанию id, см. ``posts.events``.
+    """
+    channel = models.CharField('Канал', max_length=64)
+    kind = models.CharField('Тип', max_length=16)
+    payload = models.TextField('Данные в JSON')
+    created = models.DateTimeField(
+        'Создано', auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        ordering = ('pk',)
+        indexes = [
+            models.Index(
+                fields=('channel', 'id'), name='posts_liveevent_feed_idx'
+            ),
+        ]
+        verbose_name = 'Событие потока'
+        verbose_name_plural = 'События потоков'
+
+    def __str__(self):
+        return f'{self.channel} {self.kind} #{self.pk}'
+
+
+class ArchivedPost(BasePost):
+    """Старый пост, перенесённый из ``Post`` с тем же id.
+
+    См. ``posts.archive``.
+    """
+    id = models.IntegerField(primary_key=True)
+    # дата переносится из Post как есть, без auto_now_add
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор',
+    )
+    group = models.ForeignKey(
+        'Group',
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='Группа',
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Пост в архиве'
+        verbose_name_plural = 'Архив постов'
+
+
+class ArchivedComment(models.Model):
+    """Комментарий к посту из архива, перенесённый с тем же id."""
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_comments'
+    )
+    text = models.TextField(verbose_name='Текст')
+    created = models.DateTimeField(verbose_name='Дата создания')
+
+    class Meta:
+        ordering = ('-created',)
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class PostKey(models.Model):
+    """Автор поста, созданного до шардирования.
+
+    По автору находится шард такого поста, см. ``posts.sharding``.
+    """
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+
+
+class IdSequence(models.Model):
+    """Счётчик id постов и комментариев шарда, см. ``posts.sharding``."""
+
+
+class TextSignature(models.Model):
+    """MinHash-подпись текста поста или комментария.
+
+    По ней ищутся почти одинаковые тексты, см. ``posts.duplicates``.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField('Тип текста', max_length=8, choices=KINDS)
+    object_id = models.PositiveIntegerField('id поста или комментария')
+    signature = models.BinaryField('Подпись')
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('kind', 'object_id'), name='unique_text_signature'
+            ),
+        ]
+        verbose_name = 'Подпись текста'
+        verbose_name_plural = 'Подписи текстов'
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class TextBand(models.Model):
+    """Хеш полосы подписи: ключ LSH-индекса."""
+    signature = models.ForeignKey(
+        TextSignature,
+        on_delete=models.CASCADE,
+        related_name='bands',
+        verbose_name='Подпись',
+    )
+    key = models.BigIntegerField('Хеш полосы', db_index=True)
+
+    class Meta:
+        verbose_name = 'Полоса подписи'
+        verbose_name_plural = 'Полосы подписей'
+
+    def __str__(self):
+        return str(self.key)
@@ -0,0 +1,192 @@
+"""Массовая модерация постов пачками в фоне.
+
+Задание (``ModerationJob``) создаётся действием в админке и выполняется
+в зависимости от ``MODERATION_JOBS_MODE``:
+
+* ``thread`` — в фоновом потоке после коммита транзакции запроса;
+* ``worker`` — командой ``run_moderation_jobs`` в отдельном процессе;
+* ``sync`` — сразу, в том же потоке (для тестов).
+
+Каждая пачка из ``MODERATION_CHUNK_SIZE`` постов обрабатывается в своей
+транзакции, поэтому база не блокируется на всё время задания, а прогресс
+виден в админке. Посты ищутся во всех шардах ``POST_SHARDS``, пачка
+содержит посты одного шарда.
+
+После каждой пачки задание отмечает время в ``heartbeat``. Если процесс
+умер посреди задания, оно остаётся в статусе «выполняется» без новых
+отметок; через ``MODERATION_JOB_LEASE`` секунд ``run_pending`` (команда
+``run_moderation_jobs``) берёт его заново и доделывает оставшиеся посты.
+Поэтому и в режиме ``thread`` команду стоит запускать по расписанию.
+"""
+import logging
+import threading
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import duplicates, sharding
+from .invalidation import batched, invalidate_feeds
+from .models import Comment, ModerationJob, Post, PostRanking, TextSignature
+
+logger = logging.getLogger(__name__)
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def shard_chunks(post_ids, size):
+    """Пачки id постов одного шарда: ``(шард, [id, ...])``."""
+    for using, rows in groupby(post_ids, key=itemgetter(0)):
+        for chunk in chunked([pk for _, pk in rows], size):
+            yield using, chunk
+
+
+def enqueue(action, object_ids, group=None):
+    """Создаёт задание и запускает его согласно настройкам."""
+    job = ModerationJob.objects.create(
+        action=action,
+        object_ids=','.join(str(pk) for pk in object_ids),
+        group=group,
+    )
+    mode = getattr(settings, 'MODERATION_JOBS_MODE', 'thread')
+    if mode == 'sync':
+        run_job(job.pk)
+    elif mode == 'thread':
+        transaction.on_commit(lambda: start_thread(job.pk))
+    return job
+
+
+def start_thread(job_id):
+    def target():
+        try:
+            run_job(job_id)
+        finally:
+            connection.close()
+
+    threading.Thread(
+        target=target, name=f'moderation-{job_id}', daemon=True
+    ).start()
+
+
+def get_post_ids(job):
+    """Пары ``(шард, id поста)`` задания по всем шардам."""
+    post_ids = []
+    for alias in sharding.get_shards():
+        if job.action == ModerationJob.DELETE_BY_AUTHOR:
+            queryset = Post.objects.using(alias).filter(author__in=job.ids)
+        else:
+            queryset = Post.objects.using(alias).filter(pk__in=job.ids)
+        post_ids.extend(
+            (alias, pk)
+            for pk in queryset.order_by('pk').values_list('pk', flat=True)
+        )
+    return post_ids
+
+
+def chunk_rows(using, post_ids):
+    rows = Post.objects.using(using).filter(pk__in=post_ids).values_list(
+        'group_id', 'author_id'
+    )
+    group_ids = {group_id for group_id, _ in rows if group_id}
+    author_ids = {author_id for _, author_id in rows}
+    return group_ids, author_ids
+
+
+def delete_chunk(job, using, post_ids):
+    group_ids, author_ids = chunk_rows(using, post_ids)
+    comment_ids = list(Comment.objects.using(using).filter(
+        post__in=post_ids
+    ).values_list('pk', flat=True))
+    # к удалению постов и комментариев подключены сигналы, поэтому
+    # Django загружает их объекты; сигналы внутри batched() ничего
+    # не делают, кэши и подписи текстов чистятся здесь один раз на пачку
+    Post.objects.using(using).filter(pk__in=post_ids).delete()
+    duplicates.forget(TextSignature.POST, post_ids)
+    duplicates.forget(TextSignature.COMMENT, comment_ids)
+    return group_ids, author_ids
+
+
+def move_chunk(job, using, post_ids):
+    group_ids, author_ids = chunk_rows(using, post_ids)
+    Post.objects.using(using).filter(pk__in=post_ids).update(
+        group=job.group
+    )
+    PostRanking.objects.using(using).filter(post__in=post_ids).exclude(
+        group=None
+    ).delete()
+    if job.group_id:
+        group_ids.add(job.group_id)
+    return group_ids, author_ids
+
+
+HANDLERS = {
+    ModerationJob.DELETE: delete_chunk,
+    ModerationJob.DELETE_BY_AUTHOR: delete_chunk,
+    ModerationJob.MOVE: move_chunk,
+}
+
+
+def available_jobs():
+    """Задания в очереди и брошенные упавшими процессами."""
+    lease = getattr(settings, 'MODERATION_JOB_LEASE', 300)
+    stale = timezone.now() - timedelta(seconds=lease)
+    return ModerationJob.objects.filter(
+        Q(status=ModerationJob.PENDING)
+        | Q(status=ModerationJob.RUNNING, heartbeat__lt=stale)
+    )
+
+
+def run_job(job_id):
+    """Выполняет задание, если его ещё не взял другой процесс."""
+    claimed = available_jobs().filter(pk=job_id).update(
+        status=ModerationJob.RUNNING, heartbeat=timezone.now()
+    )
+    if not claimed:
+        return None
+    job = ModerationJob.objects.get(pk=job_id)
+    handler = HANDLERS[job.action]
+    chunk_size = getattr(settings, 'MODERATION_CHUNK_SIZE', 500)
+    try:
+        # взятое заново задание начинается с начала: удалённых постов
+        # уже нет, а повторный перенос ничего не меняет
+        post_ids = get_post_ids(job)
+        job.total = len(post_ids)
+        job.processed = 0
+        job.save(update_fields=('total', 'processed'))
+        for using, chunk in shard_chunks(post_ids, chunk_size):
+            with transaction.atomic(using=using), batched():
+                group_ids, author_ids = handler(job, using, chunk)
+            invalidate_feeds(group_ids, author_ids)
+            job.processed += len(chunk)
+            job.heartbeat = timezone.now()
+            job.save(update_fields=('processed', 'heartbeat'))
+    except Exception as error:
+        logger.exception('Задание модерации #%s упало', job_id)
+        job.status = ModerationJob.FAILED
+        job.error = repr(error)
+    else:
+        job.status = ModerationJob.DONE
+    job.finished = timezone.now()
+    job.save(update_fields=('status', 'error', 'finished'))
+    return job
+
+
+def run_pending():
+    """Выполняет все задания в очереди и брошенные задания.
+
+    Возвращает их число.
+    """
+    count = 0
+    for job_id in available_jobs().order_by('created').values_list(
+        'pk', flat=True
+    ):
+        if run_job(job_id) is not None:
+            count += 1
+    return count
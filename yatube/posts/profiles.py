@@ -0,0 +1,194 @@
+"""Снимок страницы профиля.
+
+Число постов, подписчиков и подписок, дата последней активности
+и первая страница постов автора считаются одним запросом
+с подзапросами плюс одним запросом страницы и хранятся в кэше.
+Снимок сбрасывается событиями: новый, изменённый или удалённый пост,
+комментарий автора, подписка и отписка (см. ``posts.signals``),
+перенос постов в архив. Архивные посты входят в число постов автора
+и дочитываются на дальних страницах (см. ``posts.feeds``).
+Снимок лежит под ключом от имени пользователя, поэтому страница профиля
+стоит одно чтение кэша и одну проверку подписки. Сигналы знают только
+id пользователей, поэтому рядом хранится ключ снимка по id: по нему
+сбрасывается снимок и после смены имени или удаления пользователя.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import (
+    Count, DateTimeField, IntegerField, Max, OuterRef, Subquery,
+)
+from django.db.models.functions import Coalesce
+from django.http import Http404
+
+from . import sharding
+from .feeds import TieredPosts
+from .models import ArchivedPost, Comment, Follow, Post, User
+
+POSTS_PER_PAGE = 10
+SNAPSHOT_KEY = 'profiles:snapshot:{username}'
+USER_KEY = 'profiles:user:{user_id}'
+
+
+def get_timeout():
+    return getattr(settings, 'PROFILE_CACHE_TIMEOUT', 300)
+
+
+def snapshot_key(username):
+    # имя приходит из адреса и может быть любым, а ключи memcached —
+    # только ASCII без пробелов
+    return SNAPSHOT_KEY.format(
+        username=hashlib.md5(username.encode()).hexdigest()
+    )
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by().values(field)
+            .annotate(count=Count('pk')).values('count'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def max_subquery(model, field, date_field):
+    return Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field)
+        .annotate(last=Max(date_field)).values('last'),
+        output_field=DateTimeField(),
+    )
+
+
+def get_author_posts(author, hot_count=None):
+    return TieredPosts(
+        sharding.posts(author=author),
+        ArchivedPost.objects.filter(author=author),
+        hot_count,
+    ).select_related('author', 'group')
+
+
+def add_sharded_stats(author):
+    """Счётчики постов и комментариев автора по шардам.
+
+    Посты автора лежат в одном шарде, а его комментарии — в шардах
+    прокомментированных постов.
+    """
+    stats = Post.objects.using(sharding.shard_for(author.pk)).filter(
+        author=author
+    ).aggregate(post_count=Count('pk'), last_post=Max('pub_date'))
+    author.post_count = stats['post_count']
+    author.last_post = stats['last_post']
+    comment_dates = [
+        Comment.objects.using(alias).filter(author=author).aggregate(
+            last=Max('created')
+        )['last']
+        for alias in sharding.get_shards()
+    ]
+    author.last_comment = max(filter(None, comment_dates), default=None)
+
+
+def build_snapshot(username):
+    """Считает снимок профиля; None, если пользователя нет."""
+    annotations = {
+        'archived_count': count_subquery(ArchivedPost, 'author'),
+        'follower_count': count_subquery(Follow, 'author'),
+        'following_count': count_subquery(Follow, 'user'),
+    }
+    if not sharding.is_sharded():
+        annotations.update(
+            post_count=count_subquery(Post, 'author'),
+            last_post=max_subquery(Post, 'author', 'pub_date'),
+            last_comment=max_subquery(Comment, 'author', 'created'),
+        )
+    author = User.objects.filter(username=username).annotate(
+        **annotations
+    ).first()
+    if author is None:
+        return None
+    if sharding.is_sharded():
+        add_sharded_stats(author)
+    last_post = author.last_post
+    if last_post is None and author.archived_count:
+        last_post = ArchivedPost.objects.filter(author=author).values_list(
+            'pub_date', flat=True
+        ).first()
+    activity = [date for date in (last_post, author.last_comment) if date]
+    first_page = []
+    if author.post_count or author.archived_count:
+        first_page = list(
+            get_author_posts(author, author.post_count)[:POSTS_PER_PAGE]
+        )
+    return {
+        'author': author,
+        'post_count': author.post_count + author.archived_count,
+        'hot_count': author.post_count,
+        'follower_count': author.follower_count,
+        'following_count': author.following_count,
+        'last_activity': max(activity) if activity else None,
+        'first_page': first_page,
+    }
+
+
+def get_snapshot(username):
+    """Снимок профиля из кэша; при промахе считается и кладётся в кэш."""
+    key = snapshot_key(username)
+    snapshot = cache.get(key)
+    if snapshot is not None:
+        return snapshot
+    snapshot = build_snapshot(username)
+    if snapshot is None:
+        raise Http404('Пользователь не найден')
+    cache.set_many({
+        key: snapshot,
+        USER_KEY.format(user_id=snapshot['author'].pk): key,
+    }, get_timeout())
+    return snapshot
+
+
+def get_profile_page(request, snapshot):
+    """Страница постов автора; первая берётся из снимка."""
+    paginator = Paginator(
+        get_author_posts(snapshot['author'], snapshot['hot_count']),
+        POSTS_PER_PAGE,
+    )
+    paginator.count = snapshot['post_count']
+    page_obj = paginator.get_page(request.GET.get('page'))
+    if page_obj.number == 1:
+        page_obj.object_list = snapshot['first_page']
+    return page_obj
+
+
+def is_following(user, author):
+    if not user.is_authenticated or user == author:
+        return False
+    return Follow.objects.filter(user=user, author=author).exists()
+
+
+def get_profile_context(request, username):
+    """Весь контекст страницы профиля."""
+    snapshot = get_snapshot(username)
+    author = snapshot['author']
+    return {
+        'author': author,
+        'page_obj': get_profile_page(request, snapshot),
+        'post_count': snapshot['post_count'],
+        'follower_count': snapshot['follower_count'],
+        'following_count': snapshot['following_count'],
+        'last_activity': snapshot['last_activity'],
+        'following': is_following(request.user, author),
+    }
+
+
+def invalidate_profiles(user_ids):
+    user_keys = [
+        USER_KEY.format(user_id=user_id) for user_id in user_ids if user_id
+    ]
+    if user_keys:
+        snapshot_keys = cache.get_many(user_keys).values()
+        cache.delete_many([*user_keys, *snapshot_keys])
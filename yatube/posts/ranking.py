@@ -0,0 +1,109 @@
+"""Расчёт лент «в тренде» и «популярное».
+
+* trending — скорость комментирования с экспоненциальным затуханием:
+  каждый комментарий за последние ``TRENDING_WINDOW_DAYS`` дней весит
+  ``0.5 ** (возраст / TRENDING_HALF_LIFE_HOURS)``;
+* popular — число комментариев за то же окно без затухания.
+
+К обеим оценкам добавляется ``TRENDING_FOLLOWER_WEIGHT * log(1 + подписчики)``
+автора. Результат записывается в ``PostRanking`` целиком за один проход,
+поэтому лента читается одним индексным запросом на страницу.
+При нескольких шардах оцениваются только посты из ``default``
+(``PostRanking`` ссылается на пост внешним ключом), см. ``posts.sharding``.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, PostRanking
+
+
+def score_posts(now=None):
+    """Возвращает ``{kind: {post_id: score}}`` и группы постов."""
+    if now is None:
+        now = timezone.now()
+    half_life = getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24) * 3600
+    since = now - timedelta(days=getattr(settings, 'TRENDING_WINDOW_DAYS', 7))
+    follower_weight = getattr(settings, 'TRENDING_FOLLOWER_WEIGHT', 0.5)
+
+    velocity = defaultdict(float)
+    comments = defaultdict(int)
+    for post_id, created in Comment.objects.filter(
+        created__gte=since, post__isnull=False
+    ).values_list('post_id', 'created').iterator():
+        age = (now - created).total_seconds()
+        velocity[post_id] += 0.5 ** (age / half_life)
+        comments[post_id] += 1
+
+    # окно фильтруется в SQL: список id в IN упёрся бы в лимит
+    # параметров SQLite
+    commented = Comment.objects.filter(created__gte=since).values('post')
+    posts = Post.objects.filter(
+        Q(pub_date__gte=since) | Q(pk__in=commented)
+    ).values_list('pk', 'author_id', 'group_id')
+    followers = dict(
+        Follow.objects.values('author').annotate(
+            count=Count('pk')
+        ).values_list('author', 'count')
+    )
+
+    scores = {PostRanking.TRENDING: {}, PostRanking.POPULAR: {}}
+    groups = {}
+    for post_id, author_id, group_id in posts.iterator():
+        author_score = follower_weight * math.log1p(
+            followers.get(author_id, 0)
+        )
+        scores[PostRanking.TRENDING][post_id] = (
+            velocity[post_id] + author_score
+        )
+        scores[PostRanking.POPULAR][post_id] = (
+            comments[post_id] + author_score
+        )
+        groups[post_id] = group_id
+    return scores, groups
+
+
+def build_rankings(scores, groups, size):
+    """Раскладывает оценки по общей ленте и лентам групп."""
+    rankings = []
+    for kind, kind_scores in scores.items():
+        feeds = defaultdict(list)
+        for post_id, score in kind_scores.items():
+            feeds[None].append((score, post_id))
+            if groups[post_id] is not None:
+                feeds[groups[post_id]].append((score, post_id))
+        for group_id, items in feeds.items():
+            items.sort(key=lambda item: (-item[0], -item[1]))
+            for position, (score, post_id) in enumerate(items[:size]):
+                rankings.append(PostRanking(
+                    kind=kind,
+                    group_id=group_id,
+                    position=position,
+                    post_id=post_id,
+                    score=score,
+                ))
+    return rankings
+
+
+def rank_posts(now=None):
+    """Пересчитывает все ленты. Возвращает число записанных позиций."""
+    scores, groups = score_posts(now)
+    rankings = build_rankings(
+        scores, groups, getattr(settings, 'TRENDING_SIZE', 100)
+    )
+    with transaction.atomic():
+        PostRanking.objects.all().delete()
+        PostRanking.objects.bulk_create(rankings, batch_size=500)
+    return len(rankings)
+
+
+def get_feed(kind, group=None):
+    """Queryset постов ленты в порядке рейтинга."""
+    return Post.objects.filter(
+        rankings__kind=kind, rankings__group=group
+    ).select_related('author', 'group').order_by('rankings__position')
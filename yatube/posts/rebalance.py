@@ -0,0 +1,120 @@
+"""Перенос постов между шардами после изменения ``POST_SHARDS``.
+
+Посты автора, лежащие не в его шарде (см. ``posts.sharding``), вместе
+с комментариями копируются пачками в нужный шард и затем удаляются из
+старого. Уже скопированные строки пропускаются, поэтому прерванный
+перенос можно просто запустить снова. Перед переносом постам,
+созданным до включения шардов, выдаются ключи ``PostKey``: по ним
+``posts.sharding.locate`` находит шард поста со старым id.
+"""
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+
+from .archive import COMMENT_FIELDS, POST_FIELDS
+from .invalidation import batched, invalidate_feeds
+from .models import Comment, Post, PostKey
+from .sharding import ID_BASE, get_shards, shard_for
+
+
+def backfill(queryset, make_key, size):
+    last = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last).order_by('pk')[:size])
+        if not rows:
+            return
+        make_key(rows)
+        last = rows[-1][0]
+
+
+def backfill_keys(alias, size):
+    """Выдаёт ключи постам шарда со старыми id, у которых их нет."""
+    backfill(
+        Post.objects.using(alias).filter(pk__lt=ID_BASE).values_list(
+            'pk', 'author_id'
+        ),
+        lambda rows: PostKey.objects.bulk_create(
+            (PostKey(pk=pk, author_id=author_id) for pk, author_id in rows),
+            ignore_conflicts=True,
+        ),
+        size,
+    )
+
+
+def copy_rows(model, rows, date_field, using):
+    """Вставляет строки как есть.
+
+    ``bulk_create`` заменил бы даты с ``auto_now_add`` на текущие,
+    поэтому они возвращаются одним UPDATE.
+    """
+    if not rows:
+        return
+    manager = model.objects.using(using)
+    manager.bulk_create(
+        (model(**row) for row in rows), ignore_conflicts=True
+    )
+    manager.filter(pk__in=[row['id'] for row in rows]).update(**{
+        date_field: Case(
+            *(When(pk=row['id'], then=Value(row[date_field])) for row in rows),
+            output_field=DateTimeField(),
+        ),
+    })
+
+
+def move_author(author_id, source, target, size):
+    """Переносит посты автора из ``source`` в ``target``.
+
+    Возвращает id групп перенесённых постов.
+    """
+    group_ids = set()
+    while True:
+        posts = list(
+            Post.objects.using(source).filter(author=author_id)
+            .order_by('pk').values(*POST_FIELDS)[:size]
+        )
+        if not posts:
+            return group_ids
+        post_ids = [post['id'] for post in posts]
+        comments = list(
+            Comment.objects.using(source).filter(post__in=post_ids)
+            .values(*COMMENT_FIELDS)
+        )
+        with transaction.atomic(using=target):
+            copy_rows(Post, posts, 'pub_date', target)
+            copy_rows(Comment, comments, 'created', target)
+        # комментарии удаляются каскадом; общие картинки остаются,
+        # потому что на них уже ссылается пост в новом шарде
+        with transaction.atomic(using=source), batched():
+            Post.objects.using(source).filter(pk__in=post_ids).delete()
+        group_ids.update(post['group_id'] for post in posts)
+
+
+def rebalance(sources=(), batch_size=500):
+    """Раскладывает посты по шардам. Возвращает число перенесённых.
+
+    ``sources`` — алиасы, которых уже нет в ``POST_SHARDS``, но из
+    которых нужно забрать посты.
+    """
+    shards = get_shards()
+    aliases = list(shards) + [
+        alias for alias in sources if alias not in shards
+    ]
+    for alias in aliases:
+        backfill_keys(alias, batch_size)
+    moved = 0
+    group_ids, author_ids = set(), set()
+    for alias in aliases:
+        authors = list(
+            Post.objects.using(alias).order_by()
+            .values_list('author', flat=True).distinct()
+        )
+        for author_id in authors:
+            target = shard_for(author_id)
+            if target == alias:
+                continue
+            count = Post.objects.using(alias).filter(author=author_id).count()
+            group_ids |= move_author(author_id, alias, target, batch_size)
+            author_ids.add(author_id)
+            moved += count
+    if moved:
+        invalidate_feeds(group_ids, author_ids)
+    return moved
@@ -0,0 +1,166 @@
+"""Расчёт блока «похожие посты».
+
+Текст поста разбивается на слова, слова хешируются в
+``RELATED_POSTS_FEATURES`` корзин (hashing trick — случайная проекция
+словаря в пространство фиксированной размерности, словарь хранить не
+нужно). Вес корзины — TF-IDF:
+``(1 + log tf) * (1 + log((1 + n) / (1 + df)))``; корзины, которые
+встречаются больше чем в ``RELATED_POSTS_MAX_DF`` доле постов,
+отбрасываются как стоп-слова. Векторы нормируются, и сходство постов —
+скалярное произведение.
+
+С NumPy векторы собираются в плотную матрицу, и сходства считаются
+блоками по ``RELATED_POSTS_BLOCK_SIZE`` строк умножением на всю
+матрицу (она занимает до ``4 * LIMIT * FEATURES`` байт); без него —
+через обратный индекс по корзинам. Берутся ``RELATED_POSTS_LIMIT``
+последних постов, каждому записываются
+``RELATED_POSTS_SIZE`` самых похожих со сходством не ниже
+``RELATED_POSTS_MIN_SCORE``. Таблица ``RelatedPost`` перезаписывается
+целиком за один проход, поэтому блок на странице поста читается одним
+индексным запросом. При нескольких шардах считаются только посты
+из ``default``, см. ``posts.sharding``.
+"""
+import heapq
+import math
+import re
+import zlib
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Post, RelatedPost
+
+try:
+    import numpy as np
+except ImportError:  # без NumPy (см. requirements.txt) — на словарях
+    np = None
+
+WORD_RE = re.compile(r'\w{3,}')
+
+
+def hash_words(text, features):
+    return Counter(
+        zlib.crc32(word.encode()) % features
+        for word in WORD_RE.findall(text.lower())
+    )
+
+
+def vectorize(texts):
+    """Нормированные TF-IDF векторы текстов: ``[{корзина: вес}]``."""
+    features = getattr(settings, 'RELATED_POSTS_FEATURES', 1 << 12)
+    max_df = getattr(settings, 'RELATED_POSTS_MAX_DF', 0.5)
+    counts = [hash_words(text, features) for text in texts]
+    total = len(counts)
+    df = Counter(bucket for count in counts for bucket in count)
+    idf = {
+        bucket: 1 + math.log((1 + total) / (1 + docs))
+        for bucket, docs in df.items()
+        if total < 2 or docs <= max_df * total
+    }
+    vectors = []
+    for count in counts:
+        vector = {
+            bucket: (1 + math.log(tf)) * idf[bucket]
+            for bucket, tf in count.items() if bucket in idf
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        vectors.append({
+            bucket: weight / norm for bucket, weight in vector.items()
+        })
+    return vectors
+
+
+def top_related(scores, size, min_score):
+    return heapq.nsmallest(size, (
+        (-score, index) for index, score in scores
+        if score >= min_score
+    ))
+
+
+def similar_dicts(vectors, size, min_score):
+    """Похожие посты без NumPy: ``[[(-score, index), ...]]``."""
+    index = defaultdict(list)
+    for number, vector in enumerate(vectors):
+        for bucket, weight in vector.items():
+            index[bucket].append((number, weight))
+    result = []
+    for number, vector in enumerate(vectors):
+        scores = defaultdict(float)
+        for bucket, weight in vector.items():
+            for other, other_weight in index[bucket]:
+                if other != number:
+                    scores[other] += weight * other_weight
+        result.append(top_related(scores.items(), size, min_score))
+    return result
+
+
+def similar_dense(vectors, size, min_score):
+    """Похожие посты блочным умножением матриц, формат как у
+    ``similar_dicts``."""
+    block_size = getattr(settings, 'RELATED_POSTS_BLOCK_SIZE', 256)
+    # столбцы только для встретившихся корзин: ширина матрицы не больше
+    # RELATED_POSTS_FEATURES
+    used = sorted({bucket for vector in vectors for bucket in vector})
+    columns = {bucket: column for column, bucket in enumerate(used)}
+    matrix = np.zeros((len(vectors), len(used)), dtype=np.float32)
+    for row, vector in enumerate(vectors):
+        for bucket, weight in vector.items():
+            matrix[row, columns[bucket]] = weight
+    result = []
+    for start in range(0, len(vectors), block_size):
+        scores = matrix[start:start + block_size] @ matrix.T
+        rows = np.arange(scores.shape[0])
+        scores[rows, start + rows] = -1.0
+        for row in scores:
+            candidates = np.flatnonzero(row >= min_score)
+            order = np.lexsort((candidates, -row[candidates]))[:size]
+            result.append([
+                (-float(row[candidates[i]]), int(candidates[i]))
+                for i in order
+            ])
+    return result
+
+
+def find_related(posts):
+    """``{post_id: [(score, related_id), ...]}`` для пар ``(pk, text)``."""
+    if not posts:
+        return {}
+    size = getattr(settings, 'RELATED_POSTS_SIZE', 5)
+    min_score = getattr(settings, 'RELATED_POSTS_MIN_SCORE', 0.1)
+    ids = [pk for pk, _ in posts]
+    vectors = vectorize([text for _, text in posts])
+    similar = similar_dicts if np is None else similar_dense
+    return {
+        ids[number]: [(-score, ids[other]) for score, other in top]
+        for number, top in enumerate(similar(vectors, size, min_score))
+    }
+
+
+def relate_posts():
+    """Пересчитывает похожие посты. Возвращает число записанных."""
+    limit = getattr(settings, 'RELATED_POSTS_LIMIT', 10000)
+    posts = list(
+        Post.objects.order_by('-pub_date').values_list('pk', 'text')[:limit]
+    )
+    links = [
+        RelatedPost(
+            post_id=post_id,
+            related_id=related_id,
+            position=position,
+            score=score,
+        )
+        for post_id, top in find_related(posts).items()
+        for position, (score, related_id) in enumerate(top)
+    ]
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        RelatedPost.objects.bulk_create(links, batch_size=500)
+    return len(links)
+
+
+def get_related_posts(post):
+    """Похожие посты в порядке сходства."""
+    return Post.objects.filter(related_to__post=post).order_by(
+        'related_to__position'
+    )
@@ -0,0 +1,306 @@
+"""Горизонтальное шардирование постов и комментариев по автору.
+
+``POST_SHARDS`` — алиасы баз из ``DATABASES``, ``default`` тоже может
+быть шардом. Посты автора лежат в шарде, который выбирает
+rendezvous-хеш от ``author_id``: при добавлении шарда переезжает только
+около 1/N авторов. Комментарии лежат в шарде своего поста. Поэтому
+профиль и ``post_detail`` читают один шард, а главная и группы
+собирают первые страницы со всех шардов и сливают их по дате.
+Пользователи, группы, подписки, архив и служебные таблицы живут
+в ``default``; JOIN с ними в шарде невозможен, поэтому связанные
+объекты догружаются отдельным запросом (``related``).
+
+Авторы делятся на ``BUCKETS`` корзин по ``author_id``, и шард
+выбирается по корзине. id выдаёт сам шард, без записи в ``default``:
+``ID_BASE | seq << 18 | номер шарда << 10 | корзина``, где ``seq`` —
+счётчик ``IdSequence`` шарда, а номер шарда — crc32 алиаса. Пара
+(шард, ``seq``) делает id уникальным между шардами, а корзина автора
+в младших битах ведёт к шарду поста и после переезда: корзина
+не меняется. У комментариев корзина 0, их ищут через пост. id меньше
+``ID_BASE`` выданы до шардирования; их шард находится по автору
+из ``PostKey``, которые заполняет ``rebalance_shards``. Все id меньше
+2 ** 53 и без потерь передаются в JavaScript.
+
+Связи постов и комментариев с пользователями и группами не проверяются
+базой, и каскад Django при удалении пользователя или группы доходит
+только до базы, где их удалили. Остальные шарды дочищают
+``delete_authored`` и ``detach_group`` из сигналов ``post_delete``.
+В шардах создаются только таблицы ``SHARD_TABLES``.
+
+После изменения ``POST_SHARDS`` посты переносит команда
+``rebalance_shards``. С одним шардом (по умолчанию) роутер ничего не
+меняет. Рейтинг (``posts.ranking``), похожие посты (``posts.related``),
+long-poll (``posts.updates``) и список постов в админке работают только
+с постами в ``default``; задания модерации (``posts.moderation``)
+обходят все шарды.
+"""
+import hashlib
+import heapq
+import zlib
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import QuerySet, prefetch_related_objects
+
+from .models import (
+    Comment, Group, IdSequence, Post, PostKey, PostRanking, RelatedPost, User,
+)
+
+SHARDED_MODELS = (Post, Comment)
+# удаление поста ищет его рейтинг и похожие посты в базе поста, а рейтинг
+# ссылается на группы с проверкой базой, поэтому эти таблицы в шардах
+# тоже есть, но остаются пустыми
+SHARD_TABLES = frozenset(
+    model._meta.model_name
+    for model in SHARDED_MODELS + (IdSequence, PostRanking, RelatedPost, Group)
+)
+AUTHOR_KEY = 'posts:author:{post_id}'
+
+
+def get_shards():
+    return tuple(getattr(settings, 'POST_SHARDS', (DEFAULT_DB_ALIAS,)))
+
+
+def is_sharded():
+    return len(get_shards()) > 1
+
+
+BUCKET_BITS = 10
+SHARD_BITS = 8
+BUCKETS = 1 << BUCKET_BITS
+ID_BASE = 1 << 52
+
+
+@lru_cache(maxsize=65536)
+def choose_shard(shards, bucket):
+    return max(shards, key=lambda alias: hashlib.md5(
+        f'{alias}:{bucket}'.encode()
+    ).digest())
+
+
+def bucket_for(author_id):
+    return int(getattr(author_id, 'pk', author_id)) % BUCKETS
+
+
+@lru_cache(maxsize=None)
+def shard_number(alias):
+    return zlib.crc32(alias.encode()) % (1 << SHARD_BITS)
+
+
+@lru_cache(maxsize=None)
+def check_shard_numbers(shards):
+    numbers = [shard_number(alias) for alias in shards]
+    if len(set(numbers)) != len(numbers):
+        raise ImproperlyConfigured(
+            f'У шардов {shards} совпадают номера в id, переименуйте шард'
+        )
+
+
+def other_shards(using):
+    return [alias for alias in get_shards() if alias != using]
+
+
+def shard_for(author_id, shards=None):
+    """Алиас шарда с постами автора."""
+    shards = tuple(shards or get_shards())
+    if len(shards) == 1:
+        return shards[0]
+    return choose_shard(shards, bucket_for(author_id))
+
+
+def locate(post_id):
+    """Шард поста по его id или None, если id не выдавался."""
+    if post_id >= ID_BASE:
+        shards = get_shards()
+        if len(shards) == 1:
+            return shards[0]
+        return choose_shard(shards, post_id % BUCKETS)
+    key = AUTHOR_KEY.format(post_id=post_id)
+    author_id = cache.get(key)
+    if author_id is None:
+        author_id = PostKey.objects.filter(pk=post_id).values_list(
+            'author', flat=True
+        ).first()
+        if author_id is None:
+            return None
+        # автор поста не меняется
+        cache.set(key, author_id, None)
+    return shard_for(author_id)
+
+
+def allocate_id(instance, using):
+    """id нового поста или комментария из счётчика шарда ``using``."""
+    check_shard_numbers(get_shards())
+    sequence = IdSequence.objects.using(using).create()
+    # AUTOINCREMENT не выдаёт номер повторно, строка больше не нужна
+    IdSequence.objects.using(using).filter(pk=sequence.pk).delete()
+    bucket = bucket_for(instance.author_id) if isinstance(
+        instance, Post
+    ) else 0
+    return (
+        ID_BASE
+        | sequence.pk << (SHARD_BITS + BUCKET_BITS)
+        | shard_number(using) << BUCKET_BITS
+        | bucket
+    )
+
+
+def instance_shard(model, instance):
+    if isinstance(instance, Post) and instance.author_id is not None:
+        return shard_for(instance.author_id)
+    if isinstance(instance, Comment):
+        post = instance._state.fields_cache.get('post')
+        if post is not None and post.author_id is not None:
+            return shard_for(post.author_id)
+        return instance._state.db
+    if model is Post and isinstance(instance, User) and instance.pk:
+        return shard_for(instance.pk)
+    return None
+
+
+class ShardRouter:
+    """Посты — в шард автора, комментарии — в шард поста,
+    остальные модели — в ``default``."""
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded():
+            return None
+        if not issubclass(model, SHARDED_MODELS):
+            return DEFAULT_DB_ALIAS
+        return instance_shard(model, hints.get('instance'))
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded() and (
+            isinstance(obj1, SHARDED_MODELS)
+            or isinstance(obj2, SHARDED_MODELS)
+        ):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """В шардах кроме ``default`` — только ``SHARD_TABLES``; миграции
+        данных без модели выполняются только в ``default``."""
+        if db == DEFAULT_DB_ALIAS or db not in get_shards():
+            return None
+        return app_label == Post._meta.app_label and model_name in SHARD_TABLES
+
+
+def delete_authored(user_id, using):
+    """Удаляет посты и комментарии пользователя в шардах кроме ``using``."""
+    for alias in other_shards(using):
+        Comment.objects.using(alias).filter(author_id=user_id).delete()
+        Post.objects.using(alias).filter(author_id=user_id).delete()
+
+
+def detach_group(group_id, using):
+    """Убирает группу у постов в шардах кроме ``using``.
+
+    Возвращает id авторов этих постов.
+    """
+    author_ids = set()
+    for alias in other_shards(using):
+        group_posts = Post.objects.using(alias).filter(group_id=group_id)
+        author_ids.update(group_posts.values_list('author_id', flat=True))
+        group_posts.update(group=None)
+    return author_ids
+
+
+def related(queryset, *fields):
+    """``select_related`` в ``default``, ``prefetch_related`` в шардах."""
+    if queryset.db == DEFAULT_DB_ALIAS:
+        return queryset.select_related(*fields)
+    return queryset.prefetch_related(*fields)
+
+
+class ShardedPosts:
+    """Посты из нескольких шардов для ``Paginator`` и ``TieredPosts``.
+
+    ``count`` складывает счётчики шардов. Срез ``[start:stop]`` берёт из
+    каждого шарда первые ``stop`` постов и сливает их по дате, поэтому
+    чем дальше страница, тем дороже запрос.
+    """
+    ordered = True
+
+    def __init__(self, shards, lookups, related=()):
+        self.shards = shards
+        self.lookups = lookups
+        self.related = related
+
+    def select_related(self, *fields):
+        return ShardedPosts(self.shards, self.lookups, self.related + fields)
+
+    def querysets(self):
+        for alias in self.shards:
+            yield Post.objects.using(alias).filter(**self.lookups).order_by(
+                '-pub_date', '-pk'
+            )
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets())
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            posts = self[key:key + 1]
+            if not posts:
+                raise IndexError(key)
+            return posts[0]
+        start, stop = key.start or 0, key.stop
+        parts = [
+            list(queryset if stop is None else queryset[:stop])
+            for queryset in self.querysets()
+        ]
+        posts = list(islice(
+            heapq.merge(
+                *parts, key=lambda post: (post.pub_date, post.pk),
+                reverse=True,
+            ),
+            start, stop,
+        ))
+        if self.related:
+            # связанные объекты лежат в default: один запрос на связь
+            prefetch_related_objects(posts, *self.related)
+        return posts
+
+
+def get_author_ids(value):
+    if isinstance(value, (list, tuple, set, QuerySet)):
+        return {getattr(item, 'pk', item) for item in value}
+    return {getattr(value, 'pk', value)}
+
+
+def posts(**lookups):
+    """Посты по условиям: запрос к одной базе или сборка по шардам.
+
+    Условие на автора сужает сборку до шардов этих авторов.
+    """
+    if not is_sharded():
+        return Post.objects.filter(**lookups)
+    lookups = {
+        key: list(value) if isinstance(value, QuerySet) else value
+        for key, value in lookups.items()
+    }
+    shards = get_shards()
+    for key in ('author', 'author_id', 'author__in', 'author_id__in'):
+        if key in lookups:
+            targets = {
+                shard_for(author_id)
+                for author_id in get_author_ids(lookups[key])
+            }
+            shards = tuple(alias for alias in shards if alias in targets)
+    return ShardedPosts(shards, lookups)
+
+
+def post_queryset(post_id):
+    """Запрос к шарду поста ``post_id``; пустой, если поста нет."""
+    if not is_sharded():
+        return Post.objects.all()
+    alias = locate(post_id)
+    if alias is None:
+        return Post.objects.none()
+    return Post.objects.using(alias)
@@ -0,0 +1,171 @@
+"""Сброс кэшей при изменении постов и групп.
+
+Фрагмент главной страницы здесь не сбрасывается: он кэшируется
+на 20 секунд и может показывать слегка устаревшие посты.
+"""
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_save,
+)
+from django.dispatch import receiver
+
+from . import duplicates, events, sharding
+from .groups import add_to_summary, invalidate_group, remove_from_summary
+from .images import schedule_variants
+from .invalidation import invalidate_feeds, is_batched
+from .models import (
+    ArchivedPost, Comment, Follow, Group, GroupSummary, Post, TextSignature,
+    User,
+)
+from .profiles import invalidate_profiles
+from .updates import post_data, recent_posts
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def allocate_id(sender, instance, using, **kwargs):
+    """id новых постов и комментариев при нескольких шардах."""
+    if instance.pk is None and sharding.is_sharded():
+        instance.pk = sharding.allocate_id(instance, using)
+
+
+@receiver(post_init, sender=Post)
+def remember_original(sender, instance, **kwargs):
+    """Запоминает исходные группу и картинку поста.
+
+    Группа нужна, чтобы сбросить её кэш при переносе, картинка — чтобы
+    перестроить варианты при замене. Значения берутся из ``__dict__``,
+    чтобы не загружать отложенные поля.
+    """
+    instance._original_group_id = instance.__dict__.get('group_id')
+    image = instance.__dict__.get('image')
+    instance._original_image = getattr(image, 'name', image)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    image = instance.__dict__.get('image')
+    name = getattr(image, 'name', image)
+    if image is not None and name != instance._original_image:
+        # картинку загрузили или заменили; старый файл может быть общим
+        # с другими постами, его удалит collect_orphan_images
+        schedule_variants(instance)
+        instance._original_image = name
+    if created:
+        # будим long-poll запросы и потоки событий после коммита
+        transaction.on_commit(lambda: post_published(instance))
+    if is_batched():
+        return
+    original_group_id = instance._original_group_id
+    if created:
+        add_to_summary(instance.group_id, instance.pub_date)
+    elif original_group_id != instance.group_id:
+        remove_from_summary(original_group_id, instance.pub_date)
+        add_to_summary(instance.group_id, instance.pub_date)
+    invalidate_feeds(
+        group_ids={original_group_id, instance.group_id},
+        author_ids={instance.author_id},
+        index=False,
+        summaries=False,
+    )
+    instance._original_group_id = instance.group_id
+
+
+def post_published(post):
+    recent_posts.add(post)
+    channels = [events.author_channel(post.author_id)]
+    if post.group_id:
+        channels.append(events.group_channel(post.group_id))
+    events.publish(channels, 'post', post_data(post))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def post_deleted(sender, instance, **kwargs):
+    if is_batched():
+        return
+    remove_from_summary(instance.group_id, instance.pub_date)
+    invalidate_feeds(
+        group_ids={instance.group_id},
+        author_ids={instance.author_id},
+        index=False,
+        summaries=False,
+    )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        GroupSummary.objects.get_or_create(group=instance)
+    invalidate_group(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    # дата последней активности автора комментария
+    invalidate_profiles({instance.author_id})
+    if created and instance.post_id:
+        transaction.on_commit(lambda: events.publish(
+            [events.post_channel(instance.post_id)],
+            'comment',
+            events.comment_data(instance),
+        ))
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=Comment)
+def remember_text(sender, instance, **kwargs):
+    """Исходный текст: подпись пересчитывается, только если он изменился."""
+    instance._original_text = instance.__dict__.get('text')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def text_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Подпись текста для поиска дубликатов, см. posts.duplicates."""
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    if not created and instance.text == instance._original_text:
+        return
+    text, sig = getattr(instance, '_text_signature', (None, None))
+    if text != instance.text:
+        sig = duplicates.signature(instance.text)
+    kind = TextSignature.POST if sender is Post else TextSignature.COMMENT
+    duplicates.remember(kind, instance.pk, sig)
+    instance._original_text = instance.text
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def text_deleted(sender, instance, **kwargs):
+    """Подпись удалённого текста; пакетные операции удаляют их сами."""
+    if is_batched():
+        return
+    kind = TextSignature.POST if sender is Post else TextSignature.COMMENT
+    duplicates.forget(kind, [instance.pk])
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_profiles({instance.user_id, instance.author_id})
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    invalidate_profiles({instance.pk})
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, using, **kwargs):
+    """Посты и комментарии пользователя в остальных шардах."""
+    sharding.delete_authored(instance.pk, using)
+    invalidate_feeds(author_ids={instance.pk})
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, using, **kwargs):
+    """Посты группы в остальных шардах остаются без группы."""
+    author_ids = sharding.detach_group(instance.pk, using)
+    invalidate_group(instance)
+    invalidate_feeds(author_ids=author_ids, summaries=False)
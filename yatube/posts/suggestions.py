@@ -0,0 +1,167 @@
+"""Расчёт блока «кого почитать».
+
+Граф подписок — матрица смежности ``F``: ``F[u, a] = 1``, если ``u``
+подписан на ``a``. Оценка автора ``b`` для пользователя ``u``
+складывается из двух частей:
+
+* друзья друзей — ``(F @ F)[u, b]``, сколько авторов из подписок ``u``
+  сами подписаны на ``b``;
+* совместные подписки — ``(F @ S)[u, b]``, где ``S = Fᵀ @ F`` без
+  диагонали, нормированная косинусом: насколько аудитория ``b``
+  совпадает с аудиторией авторов, которых ``u`` уже читает.
+
+Веса частей — ``FOLLOW_SUGGESTIONS_FOF_WEIGHT`` и
+``FOLLOW_SUGGESTIONS_COFOLLOW_WEIGHT``. Из кандидатов убираются сам
+пользователь и его подписки, первые ``FOLLOW_SUGGESTIONS_SIZE``
+записываются в ``FollowSuggestion`` целиком за один проход, поэтому
+блок читается одним индексным запросом.
+
+С SciPy матрицы считаются в разреженном формате CSR блоками по
+``FOLLOW_SUGGESTIONS_BLOCK_SIZE`` пользователей; без него то же самое
+считается на словарях, что годится только для небольших графов.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Follow, FollowSuggestion
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # без SciPy (см. requirements.txt) — на словарях
+    np = sparse = None
+
+
+def get_weights():
+    return (
+        getattr(settings, 'FOLLOW_SUGGESTIONS_FOF_WEIGHT', 1.0),
+        getattr(settings, 'FOLLOW_SUGGESTIONS_COFOLLOW_WEIGHT', 1.0),
+    )
+
+
+def top_authors(scores, excluded, size):
+    return heapq.nsmallest(size, (
+        (-score, author_id) for author_id, score in scores.items()
+        if author_id not in excluded and score > 0
+    ))
+
+
+def score_dicts(edges, size):
+    """Оценки без SciPy: ``{user_id: [(-score, author_id), ...]}``."""
+    fof_weight, cofollow_weight = get_weights()
+    following = defaultdict(set)
+    followers = Counter()
+    for user_id, author_id in edges:
+        following[user_id].add(author_id)
+        followers[author_id] += 1
+    shared = defaultdict(Counter)
+    for authors in following.values():
+        for author_id in authors:
+            for other_id in authors:
+                if other_id != author_id:
+                    shared[author_id][other_id] += 1
+    result = {}
+    for user_id, authors in following.items():
+        scores = defaultdict(float)
+        for author_id in authors:
+            for candidate in following.get(author_id, ()):
+                scores[candidate] += fof_weight
+            for candidate, count in shared[author_id].items():
+                scores[candidate] += cofollow_weight * count / math.sqrt(
+                    followers[author_id] * followers[candidate]
+                )
+        result[user_id] = top_authors(scores, authors | {user_id}, size)
+    return result
+
+
+def score_sparse(edges, size):
+    """Оценки на разреженных матрицах, тот же формат, что у
+    ``score_dicts``."""
+    fof_weight, cofollow_weight = get_weights()
+    block_size = getattr(settings, 'FOLLOW_SUGGESTIONS_BLOCK_SIZE', 1000)
+    pairs = np.array(edges, dtype=np.int64)
+    ids = np.unique(pairs)
+    rows, cols = np.searchsorted(ids, pairs).T
+    n = len(ids)
+    follows = sparse.csr_matrix(
+        (np.ones(len(pairs)), (rows, cols)), shape=(n, n)
+    )
+    followers = np.asarray(follows.sum(axis=0)).ravel()
+    shared = (follows.T @ follows).tocsr()
+    shared = (shared - sparse.diags(shared.diagonal())).tocsr()
+    shared.eliminate_zeros()
+    norm = sparse.diags(np.divide(
+        1.0, np.sqrt(followers), out=np.zeros(n), where=followers > 0
+    ))
+    similar = (norm @ shared @ norm).tocsr()
+
+    result = {}
+    for start in range(0, n, block_size):
+        block = follows[start:start + block_size]
+        scores = (
+            fof_weight * (block @ follows)
+            + cofollow_weight * (block @ similar)
+        ).tocsr()
+        for row in range(block.shape[0]):
+            followed = block.indices[block.indptr[row]:block.indptr[row + 1]]
+            if not len(followed):
+                continue
+            span = slice(scores.indptr[row], scores.indptr[row + 1])
+            candidates, values = scores.indices[span], scores.data[span]
+            keep = (
+                ~np.isin(candidates, followed)
+                & (candidates != start + row)
+                & (values > 0)
+            )
+            candidates, values = candidates[keep], values[keep]
+            # ids отсортированы, поэтому порядок индексов — порядок id
+            order = np.lexsort((candidates, -values))[:size]
+            result[int(ids[start + row])] = [
+                (-float(values[i]), int(ids[candidates[i]])) for i in order
+            ]
+    return result
+
+
+def score_follows(size):
+    edges = list(
+        Follow.objects.values_list('user_id', 'author_id').iterator()
+    )
+    if not edges:
+        return {}
+    if sparse is None:
+        return score_dicts(edges, size)
+    return score_sparse(edges, size)
+
+
+def suggest_follows():
+    """Пересчитывает рекомендации. Возвращает число записанных."""
+    size = getattr(settings, 'FOLLOW_SUGGESTIONS_SIZE', 20)
+    suggestions = [
+        FollowSuggestion(
+            user_id=user_id,
+            author_id=author_id,
+            position=position,
+            score=-score,
+        )
+        for user_id, top in score_follows(size).items()
+        for position, (score, author_id) in enumerate(top)
+    ]
+    with transaction.atomic():
+        FollowSuggestion.objects.all().delete()
+        FollowSuggestion.objects.bulk_create(suggestions, batch_size=500)
+    return len(suggestions)
+
+
+def get_suggestions(user, limit=None):
+    """Рекомендованные авторы без тех, на кого пользователь подписался
+    после расчёта."""
+    suggestions = FollowSuggestion.objects.filter(user=user).exclude(
+        author__in=Follow.objects.filter(user=user).values('author')
+    ).select_related('author')
+    if limit is not None:
+        suggestions = suggestions[:limit]
+    return suggestions
@@ -0,0 +1,69 @@
+import logging
+
+from django import template
+from django.conf import settings
+from django.utils.html import format_html, format_html_join
+from sorl.thumbnail import get_thumbnail
+
+register = template.Library()
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = '(max-width: 768px) 100vw, 720px'
+
+
+def srcset(storage, sources):
+    return ', '.join(
+        f'{storage.url(name)} {width}w' for width, name in sources
+    )
+
+
+def thumbnail_image(post, css_class):
+    """Уменьшенная копия ширины самого узкого варианта.
+
+    Её строит sorl-thumbnail при первом показе и дальше отдаёт из своего
+    кэша; на случай, пока фоновая сборка вариантов не закончилась.
+    """
+    width = min(getattr(settings, 'IMAGE_VARIANT_WIDTHS', (640,)))
+    try:
+        thumbnail = get_thumbnail(post.image, str(width), upscale=False)
+        size = (thumbnail.width, thumbnail.height)
+    except Exception:
+        logger.warning('Не удалось уменьшить картинку %s', post.image.name)
+        return ''
+    return format_html(
+        '<img class="{}" src="{}" width="{}" height="{}" alt="" '
+        'loading="lazy">',
+        css_class, thumbnail.url, *size,
+    )
+
+
+@register.simple_tag
+def responsive_image(post, sizes=DEFAULT_SIZES, css_class='card-img my-2'):
+    """Картинка поста с ``srcset`` по предрассчитанным вариантам.
+
+    Адреса строятся из ``Post.image_variants`` без обращения к диску;
+    пока вариантов нет, выводится уменьшенная копия, а не исходный файл.
+    """
+    if not post.image:
+        return ''
+    variants = post.variants
+    if not variants:
+        return thumbnail_image(post, css_class)
+    storage = post.image.storage
+    formats = list(variants['formats'].items())
+    # последний формат (JPEG) понимают все браузеры
+    fallback = formats[-1][1]
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (mime, srcset(storage, items), sizes)
+            for mime, items in formats[:-1]
+        ),
+    )
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" '
+        'width="{}" height="{}" alt="" loading="lazy"></picture>',
+        sources, css_class, storage.url(fallback[-1][1]),
+        srcset(storage, fallback), sizes,
+        variants['width'], variants['height'],
+    )
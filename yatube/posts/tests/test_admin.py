@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.admin import EstimatedCountPaginator
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+CHANGELIST_URL = '/admin/posts/post/'
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, path=CHANGELIST_URL):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка постов не зависит от числа строк."""
+        Post.objects.create(text='Пост', author=self.author, group=self.group)
+        self.changelist_queries()
+        few = self.changelist_queries()
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author, group=self.group)
+            for i in range(30)
+        )
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_indexed_search(self):
+        """Поиск по id, автору и группе; число ищется в начале текста."""
+        post = Post.objects.create(
+            text='Пост в группе', author=self.author, group=self.group
+        )
+        Post.objects.create(text='2021: пост без группы', author=self.admin)
+        searches = {
+            f'?q=id%3A{post.pk}': 1,
+            '?q=2021': 1,
+            '?q=%40author': 1,
+            '?q=%23test-slug': 1,
+            '?q=Пост': 1,
+            '?q=группы': 0,
+        }
+        for query, count in searches.items():
+            with self.subTest(query=query):
+                response = self.client.get(CHANGELIST_URL + query)
+                self.assertEqual(response.context['cl'].result_count, count)
+
+    def test_estimated_count_paginator(self):
+        """Нефильтрованная таблица со статистикой считается по оценке,
+        отфильтрованная и без статистики — точно."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author) for i in range(5)
+        )
+        first = Post.objects.order_by('pk').values_list('pk', flat=True)[:3]
+        Post.objects.filter(pk__in=list(first)).delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        paginator.exact_count_limit = 0
+        self.assertEqual(paginator.count, 2)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        paginator.exact_count_limit = 0
+        self.assertEqual(paginator.count, 2)
+        filtered = EstimatedCountPaginator(
+            Post.objects.filter(author=self.admin), 10
+        )
+        filtered.exact_count_limit = 0
+        self.assertEqual(filtered.count, 0)
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..images import release_image
+from ..models import ArchivedComment, ArchivedPost, Comment, Group, Post
+
+User = get_user_model()
+
+HOT_POSTS = 13
+OLD_POSTS = 12
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        now = timezone.now()
+        posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group
+            )
+            for i in range(HOT_POSTS + OLD_POSTS)
+        ]
+        for i, post in enumerate(posts):
+            age = timedelta(days=400 + i) if i < OLD_POSTS else timedelta(
+                minutes=len(posts) - i
+            )
+            Post.objects.filter(pk=post.pk).update(pub_date=now - age)
+        cls.old_post = posts[0]
+        cls.comment = Comment.objects.create(
+            post=cls.old_post, author=cls.author, text='Старый комментарий'
+        )
+        cls.expected = list(Post.objects.values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def archive(self):
+        out = StringIO()
+        call_command('archive_posts', batch_size=5, stdout=out)
+        return out.getvalue()
+
+    def page_ids(self, url, number):
+        response = self.client.get(url, {'page': number})
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_old_posts_and_comments_are_moved(self):
+        """Старые посты с комментариями переносятся с теми же id и датами."""
+        pub_date = Post.objects.get(pk=self.old_post.pk).pub_date
+        self.assertIn(f'постов: {OLD_POSTS}', self.archive())
+        self.assertEqual(Post.objects.count(), HOT_POSTS)
+        self.assertEqual(ArchivedPost.objects.count(), OLD_POSTS)
+        self.assertFalse(Comment.objects.exists())
+        archived = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived.pub_date, pub_date)
+        self.assertEqual(archived.group, self.group)
+        comment = ArchivedComment.objects.get()
+        self.assertEqual(
+            (comment.pk, comment.post_id, comment.text),
+            (self.comment.pk, self.old_post.pk, self.comment.text),
+        )
+        self.assertIn('постов: 0', self.archive())
+
+    def test_feeds_continue_into_archive(self):
+        """Ленты читают архив после рабочих постов в том же порядке."""
+        self.archive()
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        ):
+            with self.subTest(url=url):
+                ids = []
+                for number in (1, 2, 3):
+                    ids.extend(self.page_ids(url, number))
+                self.assertEqual(ids, self.expected)
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertEqual(response.context['post_count'], len(self.expected))
+
+    def test_first_page_reads_only_hot_table(self):
+        self.archive()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        archive_reads = [
+            query['sql'] for query in queries
+            if 'posts_archivedpost' in query['sql']
+            and 'COUNT' not in query['sql']
+        ]
+        self.assertEqual(archive_reads, [])
+
+    def test_archived_post_detail_is_read_only(self):
+        self.archive()
+        url = reverse('posts:post_detail', args=[self.old_post.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['post_count'], HOT_POSTS + OLD_POSTS)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [self.comment.text],
+        )
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.old_post.pk]),
+            {'text': 'Новый комментарий'},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_image_used_by_archive_is_kept(self):
+        """Общая картинка не удаляется, пока на неё ссылается архив."""
+        name = f'posts/ab/cd/{"ab" * 32}.gif'
+        self.archive()
+        ArchivedPost.objects.filter(pk=self.old_post.pk).update(image=name)
+        self.assertFalse(release_image(name))
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.core.wsgi import get_wsgi_application
+from django.http import Http404
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils.deprecation import MiddlewareMixin
+
+from core import asgi
+from core.asgi import ASGIHandler
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def asgi_request(application, path, query_string=b'', headers=()):
+    """Выполняет GET-запрос к ASGI-приложению и собирает сообщения.
+
+    После запроса ``receive`` ждёт, пока его не отменят: клиент
+    не отключается, пока ответ не закончится.
+    """
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query_string,
+        'headers': list(headers),
+    }
+    messages = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return messages
+
+
+def asgi_get(application, path, query_string=b'', headers=()):
+    """Выполняет GET-запрос к ASGI-приложению и собирает ответ."""
+    start, *bodies = asgi_request(application, path, query_string, headers)
+    body = b''.join(message['body'] for message in bodies)
+    return start['status'], dict(start['headers']), body.decode()
+
+
+def asgi_stream(application, path):
+    """Читает потоковый ответ ASGI-приложения до его завершения."""
+    return asgi_get(application, path)[2]
+
+
+class FailingMiddleware(MiddlewareMixin):
+    def process_request(self, request):
+        raise Http404('middleware не пустил')
+
+
+class HeaderMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        response['X-Plain-Middleware'] = 'yes'
+        return response
+
+
+class ASGIHandlerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(12):
+            Post.objects.create(
+                text=f'Тестовый пост {i}',
+                author=self.author,
+                group=self.group,
+            )
+        Follow.objects.create(user=self.user, author=self.author)
+        self.application = ASGIHandler(get_wsgi_application())
+
+    def test_feeds(self):
+        """Ленты под ASGI отдают страницы постов."""
+        post = Post.objects.first()
+        pages = {
+            '/': 'Тестовый пост 11',
+            '/group/test-slug/': 'Тестовое описание',
+            '/profile/author/': 'Всего постов',
+            f'/posts/{post.pk}/': post.text,
+        }
+        for path, text in pages.items():
+            with self.subTest(path=path):
+                status, _, body = asgi_get(self.application, path)
+                self.assertEqual(status, HTTPStatus.OK)
+                self.assertIn(text, body)
+
+    def test_pagination(self):
+        """Вторая страница содержит оставшиеся посты."""
+        status, _, body = asgi_get(
+            self.application, '/group/test-slug/', b'page=2'
+        )
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertIn('Тестовый пост 0', body)
+        self.assertNotIn('Тестовый пост 11', body)
+
+    def test_not_found(self):
+        """Несуществующая группа отдаёт 404."""
+        status, _, _ = asgi_get(self.application, '/group/missing/')
+        self.assertEqual(status, HTTPStatus.NOT_FOUND)
+
+    def test_follow_index_requires_login(self):
+        """Лента подписок перенаправляет анонима на страницу входа."""
+        status, headers, _ = asgi_get(self.application, '/follow/')
+        self.assertEqual(status, HTTPStatus.FOUND)
+        self.assertIn(b'/auth/login/', headers[b'location'])
+
+    def test_wsgi_fallback(self):
+        """Остальные страницы обслуживает WSGI-приложение."""
+        status, _, body = asgi_get(self.application, '/about/author/')
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertIn('Об авторе проекта', body)
+
+    @override_settings(LONGPOLL_INTERVAL=0.05)
+    def test_long_poll_returns_new_post(self):
+        """Long-poll возвращает пост, созданный во время ожидания."""
+        cursor = Post.objects.latest('pk').pk
+        timer = threading.Timer(0.2, lambda: Post.objects.create(
+            text='Свежий пост', author=self.author, group=self.group
+        ))
+        timer.start()
+        status, _, body = asgi_get(
+            self.application, '/group/test-slug/updates/',
+            f'after={cursor}&wait=5'.encode(),
+        )
+        timer.join()
+        self.assertEqual(status, HTTPStatus.OK)
+        posts = json.loads(body)['posts']
+        self.assertEqual([post['text'] for post in posts], ['Свежий пост'])
+
+    @override_settings(LIVE_POLL_INTERVAL=5, LIVE_STREAM_DURATION=1)
+    def test_event_stream_delivers_new_post(self):
+        """Новый пост приходит в поток группы без ожидания опроса."""
+        timer = threading.Timer(0.2, lambda: Post.objects.create(
+            text='Живой пост', author=self.author, group=self.group
+        ))
+        timer.start()
+        body = asgi_stream(self.application, '/group/test-slug/events/')
+        timer.join()
+        self.assertIn('event: post', body)
+        self.assertIn('Живой пост', body)
+
+    def test_middleware_exception_becomes_response(self):
+        """Исключение в middleware на асинхронном пути превращается
+        в ответ."""
+        middleware = settings.MIDDLEWARE + [
+            'posts.tests.test_asgi.FailingMiddleware'
+        ]
+        with override_settings(MIDDLEWARE=middleware):
+            application = ASGIHandler(get_wsgi_application())
+            status, headers, body = asgi_get(application, '/updates/')
+        self.assertEqual(status, HTTPStatus.NOT_FOUND)
+        self.assertIn('Custom 404', body)
+        # внешние middleware обработали ответ
+        self.assertIn(b'x-frame-options', headers)
+
+    def test_plain_middleware_is_not_skipped(self):
+        """Middleware без MiddlewareMixin переводят запросы на WSGI-путь."""
+        middleware = settings.MIDDLEWARE + [
+            'posts.tests.test_asgi.HeaderMiddleware'
+        ]
+        with override_settings(MIDDLEWARE=middleware):
+            with self.assertLogs('core.asgi', 'WARNING'):
+                application = ASGIHandler(get_wsgi_application())
+            status, headers, _ = asgi_get(application, '/')
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(headers[b'x-plain-middleware'], b'yes')
+
+    @override_settings(STREAMING_RENDER=True)
+    def test_wsgi_stream_is_sent_in_parts(self):
+        """Потоковый WSGI-ответ уходит клиенту частями."""
+        application = ASGIHandler(get_wsgi_application(), async_views={})
+        _, *bodies = asgi_request(application, '/')
+        self.assertGreater(len(bodies), 2)
+        self.assertTrue(all(body['more_body'] for body in bodies[:-1]))
+        self.assertFalse(bodies[-1].get('more_body', False))
+        html = b''.join(body['body'] for body in bodies).decode()
+        self.assertIn('Тестовый пост 11', html)
+
+
+class ConnectionTests(SimpleTestCase):
+    def test_connections_checked_around_each_call(self):
+        with mock.patch.object(asgi.db, 'close_old_connections') as close:
+            for _ in range(3):
+                asgi._call_with_connections(len, ())
+            self.assertEqual(close.call_count, 6)
@@ -0,0 +1,114 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import duplicates
+from ..models import Comment, Post, TextSignature
+
+User = get_user_model()
+
+SPAM = (
+    'Купите лучшие часы по самой низкой цене, только сегодня скидка '
+    'пятьдесят процентов, доставка по всей стране, пишите в личку!'
+)
+VARIANT = (
+    'Купите лучшие часы по самой низкой цене! Только сегодня скидка '
+    'пятьдесят процентов, доставка по всей стране, пишите в личку!!!'
+)
+OTHER = (
+    'Сегодня ходили в горы, погода была отличная, видели орла и много '
+    'разных цветов на склонах, вернулись только к вечеру.'
+)
+
+
+class DuplicateDetectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(text=SPAM, author=cls.spammer)
+
+    def setUp(self):
+        cache.clear()
+        duplicates.memory_index.clear()
+        self.addCleanup(duplicates.memory_index.clear)
+        self.client = Client()
+        self.client.force_login(self.other)
+
+    def create_post(self, text):
+        return self.client.post(reverse('posts:post_create'), {'text': text})
+
+    def test_near_duplicate_post_is_rejected(self):
+        response = self.create_post(VARIANT)
+        self.assertFormError(
+            response, 'form', 'text', 'Такой текст уже публиковали.'
+        )
+        self.assertFalse(Post.objects.filter(text=VARIANT).exists())
+        self.create_post(OTHER)
+        self.assertTrue(Post.objects.filter(text=OTHER).exists())
+
+    def test_near_duplicate_comment_is_rejected(self):
+        post = Post.objects.create(text='Пост', author=self.other)
+        url = reverse('posts:add_comment', args=[post.pk])
+        self.client.post(url, {'text': OTHER})
+        self.client.post(url, {'text': OTHER + ' Правда!'})
+        self.client.post(url, {'text': VARIANT})
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), [OTHER]
+        )
+
+    def test_short_texts_and_own_edits_are_allowed(self):
+        for _ in range(2):
+            self.create_post('Спасибо, отличный пост!')
+        self.assertEqual(
+            Post.objects.filter(text='Спасибо, отличный пост!').count(), 2
+        )
+        self.client.force_login(self.spammer)
+        self.client.post(
+            reverse('posts:post_edit', args=[self.post.pk]), {'text': VARIANT}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text, VARIANT)
+
+    def test_unchanged_text_keeps_signature(self):
+        """Сохранение без правки текста не переписывает подпись."""
+        post = Post.objects.get(pk=self.post.pk)
+        stored = TextSignature.objects.get(object_id=post.pk).pk
+        post.group = None
+        with self.assertNumQueries(1):
+            post.save()
+        post.text = VARIANT
+        post.save()
+        self.assertNotEqual(
+            TextSignature.objects.get(object_id=post.pk).pk, stored
+        )
+
+    @override_settings(DUPLICATE_ACTION='flag')
+    def test_flag_mode_saves_and_logs(self):
+        with self.assertLogs('posts.duplicates', 'WARNING') as logs:
+            self.create_post(VARIANT)
+        self.assertTrue(Post.objects.filter(text=VARIANT).exists())
+        self.assertIn(f'post {self.post.pk}', logs.output[0])
+
+    def test_memory_index_answers_without_queries(self):
+        sig = duplicates.signature(SPAM)
+        duplicates.memory_index.add(('post', 999), sig)
+        with self.assertNumQueries(0):
+            _, match = duplicates.check(VARIANT, TextSignature.POST)
+        self.assertEqual(match[0], ('post', 999))
+
+    def test_backfill_builds_missing_signatures(self):
+        TextSignature.objects.all().delete()
+        _, match = duplicates.check(VARIANT, TextSignature.POST)
+        self.assertIsNone(match)
+        out = StringIO()
+        call_command('backfill_signatures', stdout=out)
+        self.assertIn('подписей: 1', out.getvalue())
+        _, match = duplicates.check(VARIANT, TextSignature.POST)
+        self.assertEqual(match[0], (TextSignature.POST, self.post.pk))
+        call_command('backfill_signatures', stdout=out)
+        self.assertIn('подписей: 0', out.getvalue())
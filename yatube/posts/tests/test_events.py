@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import events
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(LIVE_POLL_INTERVAL=0.01, LIVE_STREAM_DURATION=0.1)
+class LiveEventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def read_stream(self, url, client=None, **headers):
+        response = (client or self.guest_client).get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return b''.join(response.streaming_content).decode()
+
+    def test_stream_sends_channel_events(self):
+        """Поток отдаёт события своих каналов с id для переподключения."""
+        events.publish(
+            [events.group_channel(self.group.pk)], 'post', {'text': 'Да'}
+        )
+        events.publish(
+            [events.group_channel(self.group.pk + 1)], 'post', {'text': 'Нет'}
+        )
+        body = self.read_stream(
+            reverse('posts:group_events', args=('test-slug',)),
+            HTTP_LAST_EVENT_ID='0',
+        )
+        self.assertIn('event: post\ndata: {"text": "Да"}', body)
+        self.assertNotIn('Нет', body)
+        self.assertTrue(body.startswith('retry: '))
+
+    def test_new_connection_skips_old_events(self):
+        events.publish([events.post_channel(self.post.pk)], 'comment', {})
+        body = self.read_stream(
+            reverse('posts:post_events', args=(self.post.pk,))
+        )
+        self.assertNotIn('event: comment', body)
+
+    def test_resume_after_last_event_id(self):
+        channels = [events.post_channel(self.post.pk)]
+        events.publish(channels, 'comment', {'text': 'первый'})
+        last_id = events.latest_id()
+        events.publish(channels, 'comment', {'text': 'второй'})
+        body = self.read_stream(
+            reverse('posts:post_events', args=(self.post.pk,)),
+            HTTP_LAST_EVENT_ID=str(last_id),
+        )
+        self.assertNotIn('первый', body)
+        self.assertIn('второй', body)
+
+    def test_follow_stream(self):
+        """Поток подписок содержит только посты отслеживаемых авторов."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        events.publish(
+            [events.author_channel(self.author.pk)], 'post', {'text': 'Да'}
+        )
+        events.publish(
+            [events.author_channel(self.reader.pk)], 'post', {'text': 'Нет'}
+        )
+        body = self.read_stream(
+            reverse('posts:follow_events'), self.reader_client,
+            HTTP_LAST_EVENT_ID='0',
+        )
+        self.assertIn('Да', body)
+        self.assertNotIn('Нет', body)
+
+    def test_follow_stream_requires_login(self):
+        response = self.guest_client.get(reverse('posts:follow_events'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_missing_post(self):
+        response = self.guest_client.get(
+            reverse('posts:post_events', args=(self.post.pk + 100,))
+        )
+        self.assertEqual(response.status_code, 404)
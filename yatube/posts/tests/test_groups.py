@@ -0,0 +1,126 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, GroupSummary, Post
+
+User = get_user_model()
+
+
+class GroupCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=self.user, group=self.group
+            )
+            for i in range(12)
+        ]
+        self.url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+
+    def test_summary_is_updated(self):
+        """Сводка группы пересчитывается при создании и переносе поста."""
+        summary = GroupSummary.objects.get(group=self.group)
+        self.assertEqual(summary.post_count, 12)
+        self.assertEqual(summary.last_post_date, self.posts[-1].pub_date)
+        post = self.posts[0]
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(
+            GroupSummary.objects.get(group=self.group).post_count, 11
+        )
+        self.assertEqual(
+            GroupSummary.objects.get(group=self.other_group).post_count, 1
+        )
+
+    def test_summary_is_updated_in_place(self):
+        """Новый пост меняет сводку без пересчёта постов группы."""
+        with CaptureQueriesContext(connection) as queries:
+            post = Post.objects.create(
+                text='Новый пост', author=self.user, group=self.group
+            )
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()]
+        )
+        summary = GroupSummary.objects.get(group=self.group)
+        self.assertEqual(summary.post_count, 13)
+        self.assertEqual(summary.last_post_date, post.pub_date)
+        post.delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.post_count, 12)
+        self.assertEqual(summary.last_post_date, self.posts[-1].pub_date)
+        self.posts[0].delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.post_count, 11)
+
+    def test_refresh_command_recounts_summaries(self):
+        """Команда исправляет разошедшиеся сводки."""
+        GroupSummary.objects.update(post_count=0, last_post_date=None)
+        out = StringIO()
+        call_command('refresh_group_summaries', stdout=out)
+        self.assertIn('Пересчитано групп: 2', out.getvalue())
+        summary = GroupSummary.objects.get(group=self.group)
+        self.assertEqual(summary.post_count, 12)
+        self.assertEqual(summary.last_post_date, self.posts[-1].pub_date)
+
+    def test_group_index(self):
+        """Каталог групп показывает число постов."""
+        response = self.guest_client.get(reverse('posts:group_index'))
+        groups = response.context['groups']
+        self.assertEqual(
+            [group.title for group in groups],
+            ['Другая группа', 'Тестовая группа'],
+        )
+        self.assertContains(response, 'Постов: 12')
+        with self.assertNumQueries(0):
+            self.guest_client.get(reverse('posts:group_index'))
+
+    def test_group_page_is_served_from_cache(self):
+        """Повторный запрос первой страницы группы не обращается к базе."""
+        first = self.guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(self.url)
+        self.assertEqual(
+            list(first.context['page_obj']), list(second.context['page_obj'])
+        )
+        self.assertEqual(second.context['page_obj'].paginator.count, 12)
+
+    def test_group_cache_is_invalidated(self):
+        """Новый, перенесённый и удалённый пост сразу видны в ленте группы."""
+        self.guest_client.get(self.url)
+        new_post = Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group
+        )
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.context['page_obj'][0], new_post)
+
+        new_post.group = self.other_group
+        new_post.save()
+        response = self.guest_client.get(self.url)
+        self.assertNotIn(new_post, response.context['page_obj'])
+
+        self.posts[-1].delete()
+        response = self.guest_client.get(self.url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 11)
@@ -0,0 +1,197 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .. import images
+from ..images import build_variants
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_upload(name='photo.png', size=(1000, 500)):
+    buffer = BytesIO()
+    Image.new('RGBA', size, (255, 0, 0, 128)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_VARIANT_WIDTHS=(320, 640, 1280),
+    IMAGE_VARIANT_FORMATS=('AVIF', 'WEBP', 'JPEG'),
+    IMAGE_VARIANTS_MODE='sync',
+)
+class ImageVariantsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def render(self, post):
+        template = Template(
+            '{% load post_images %}{% responsive_image post %}'
+        )
+        return template.render(Context({'post': post}))
+
+    def test_variants_built_on_upload(self):
+        """При загрузке строятся варианты не шире исходной картинки."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=make_upload()
+        )
+        variants = Post.objects.get(pk=post.pk).variants
+        self.assertEqual((variants['width'], variants['height']), (1000, 500))
+        formats = list(variants['formats'])
+        self.assertEqual(formats[-1], 'image/jpeg')
+        for mime in formats:
+            sources = variants['formats'][mime]
+            self.assertEqual(
+                [width for width, _ in sources], [320, 640, 1000]
+            )
+            for width, name in sources:
+                with Image.open(post.image.storage.path(name)) as image:
+                    self.assertEqual(image.width, width)
+
+    @override_settings(IMAGE_VARIANTS_MODE='thread')
+    def test_variants_are_built_after_commit(self):
+        """Загрузка не ждёт вариантов: они строятся после коммита."""
+        callbacks = []
+        with mock.patch(
+            'django.db.transaction.on_commit',
+            lambda func, using=None: callbacks.append(func),
+        ), mock.patch.object(images, 'build_variants') as build:
+            post = Post.objects.create(
+                text='Пост', author=self.user, image=make_upload()
+            )
+        build.assert_not_called()
+        self.assertEqual(Post.objects.get(pk=post.pk).variants, {})
+        with mock.patch.object(
+            images, 'start_thread', images.build_post_variants
+        ):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(Post.objects.get(pk=post.pk).variants['width'], 1000)
+
+    def test_tag_renders_srcset_without_filesystem(self):
+        """Тег строит srcset только по метаданным поста."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=make_upload()
+        )
+        post = Post.objects.get(pk=post.pk)
+        with mock.patch.object(
+            FileSystemStorage, 'exists', side_effect=AssertionError
+        ), mock.patch.object(
+            FileSystemStorage, 'open', side_effect=AssertionError
+        ):
+            html = self.render(post)
+        self.assertIn('srcset="', html)
+        self.assertIn('/1000w.jpg 1000w', html)
+        self.assertIn('width="1000" height="500"', html)
+
+    def test_replaced_image_rebuilds_variants(self):
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=make_upload()
+        )
+        post.image = make_upload('other.png', (400, 400))
+        post.save()
+        variants = Post.objects.get(pk=post.pk).variants
+        self.assertEqual(variants['width'], 400)
+
+    def test_broken_image_falls_back_to_original(self):
+        post = Post.objects.create(
+            text='Пост', author=self.user, image='posts/missing.jpg'
+        )
+        with self.assertLogs('posts.images', 'WARNING'):
+            self.assertEqual(build_variants(post.image), {})
+        with self.assertLogs('posts.templatetags.post_images', 'WARNING'):
+            html = self.render(post)
+        self.assertNotIn('missing.jpg', html)
+
+    def test_tag_without_variants_shows_thumbnail(self):
+        """Пока вариантов нет, выводится копия ширины самого узкого."""
+        with override_settings(IMAGE_VARIANTS_MODE='worker'):
+            post = Post.objects.create(
+                text='Пост', author=self.user, image=make_upload()
+            )
+        html = self.render(Post.objects.get(pk=post.pk))
+        self.assertNotIn(post.image.url, html)
+        self.assertIn('width="320" height="160"', html)
+
+    def test_duplicate_upload_shares_file_and_variants(self):
+        """Повторная загрузка не занимает места и не строит варианты."""
+        first = Post.objects.create(
+            text='Пост', author=self.user, image=make_upload('a.png')
+        )
+        with mock.patch('posts.images.encode') as encode:
+            second = Post.objects.create(
+                text='Мем', author=self.user, image=make_upload('b.png')
+            )
+        encode.assert_not_called()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(
+            Post.objects.get(pk=first.pk).variants,
+            Post.objects.get(pk=second.pk).variants,
+        )
+
+    def collect(self, grace=0):
+        out = StringIO()
+        call_command('collect_orphan_images', grace=grace, stdout=out)
+        return out.getvalue()
+
+    def test_shared_file_is_collected_after_last_post(self):
+        """Файл и варианты удаляются сборщиком после последнего поста."""
+        posts = [
+            Post.objects.create(
+                text='Пост', author=self.user, image=make_upload()
+            )
+            for _ in range(2)
+        ]
+        storage = posts[0].image.storage
+        name = posts[0].image.name
+        variant = Post.objects.get(pk=posts[0].pk).variants[
+            'formats']['image/jpeg'][0][1]
+        posts[0].delete()
+        self.collect()
+        self.assertTrue(storage.exists(name))
+        posts[1].delete()
+        self.assertTrue(storage.exists(name))
+        self.assertRegex(self.collect(), r'Удалено картинок: [1-9]')
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(storage.exists(variant))
+
+    def test_recent_upload_is_not_collected(self):
+        """Файл, который только что загрузили снова, сборщик не трогает.
+
+        Ссылка на него может быть в ещё не закоммиченной транзакции.
+        """
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=make_upload()
+        )
+        name = post.image.name
+        post.delete()
+        self.assertIn('Удалено картинок: 0', self.collect(grace=3600))
+        self.assertTrue(post.image.storage.exists(name))
+
+    def test_backfill_command(self):
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=make_upload()
+        )
+        Post.objects.filter(pk=post.pk).update(image_variants='')
+        call_command('build_image_variants', stdout=StringIO())
+        self.assertTrue(Post.objects.get(pk=post.pk).variants)
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Comment, Group, ModerationJob, Post, TextSignature
+
+User = get_user_model()
+
+CHANGELIST_URL = '/admin/posts/post/'
+
+
+@override_settings(MODERATION_JOBS_MODE='sync', MODERATION_CHUNK_SIZE=2)
+class ModerationActionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.posts = [
+            Post.objects.create(text=f'Спам {i}', author=self.spammer)
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=self.posts[0], author=self.admin, text='Комментарий'
+        )
+        self.own_post = Post.objects.create(text='Пост', author=self.admin)
+
+    def run_action(self, action, posts, **data):
+        return self.client.post(CHANGELIST_URL, {
+            'action': action,
+            '_selected_action': [post.pk for post in posts],
+            **data,
+        })
+
+    def test_bulk_delete(self):
+        """Выбранные посты и их комментарии удаляются пачками."""
+        self.run_action('bulk_delete', self.posts[:3])
+        self.assertEqual(Post.objects.filter(author=self.spammer).count(), 2)
+        self.assertFalse(Comment.objects.exists())
+        job = ModerationJob.objects.get()
+        self.assertEqual(job.status, ModerationJob.DONE)
+        self.assertEqual((job.processed, job.total), (3, 3))
+        self.assertEqual(job.progress, 100)
+
+    def test_bulk_delete_forgets_signatures(self):
+        """Подписи текстов удалённых постов и комментариев удаляются."""
+        text = 'Купите наши замечательные слоны по самой низкой цене'
+        post = Post.objects.create(text=text, author=self.spammer)
+        Comment.objects.create(post=post, author=self.spammer, text=text)
+        self.assertEqual(TextSignature.objects.count(), 2)
+        self.run_action('bulk_delete', [post])
+        self.assertFalse(TextSignature.objects.exists())
+
+    def test_bulk_move_to_group(self):
+        """Выбранные посты переносятся в группу из формы действия."""
+        self.run_action(
+            'bulk_move_to_group', self.posts, group=self.group.pk
+        )
+        self.assertEqual(self.group.posts.count(), 5)
+
+    def test_bulk_delete_by_author(self):
+        """Удаляются все посты авторов выбранных постов."""
+        self.run_action('bulk_delete_by_author', self.posts[:1])
+        self.assertEqual(list(Post.objects.all()), [self.own_post])
+
+    def test_default_delete_action_is_disabled(self):
+        """Стандартное удаление выбранных объектов недоступно."""
+        response = self.client.get(CHANGELIST_URL)
+        choices = response.context['action_form'].fields['action'].choices
+        names = [name for name, _ in choices]
+        self.assertIn('bulk_delete', names)
+        self.assertNotIn('delete_selected', names)
+
+    @override_settings(MODERATION_JOBS_MODE='worker')
+    def test_worker_mode_waits_for_command(self):
+        """В режиме worker задание ждёт команду run_moderation_jobs."""
+        self.run_action('bulk_delete', self.posts)
+        self.assertEqual(Post.objects.count(), 6)
+        call_command('run_moderation_jobs', stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 1)
+
+    @override_settings(MODERATION_JOB_LEASE=60)
+    def test_abandoned_job_is_reclaimed(self):
+        """Задание упавшего процесса доделывается после истечения аренды."""
+        ids = ','.join(str(post.pk) for post in self.posts)
+        now = timezone.now()
+        abandoned = ModerationJob.objects.create(
+            action=ModerationJob.DELETE,
+            object_ids=ids,
+            status=ModerationJob.RUNNING,
+            heartbeat=now - timedelta(minutes=5),
+        )
+        busy = ModerationJob.objects.create(
+            action=ModerationJob.DELETE,
+            object_ids=str(self.own_post.pk),
+            status=ModerationJob.RUNNING,
+            heartbeat=now,
+        )
+        call_command('run_moderation_jobs', stdout=StringIO())
+        abandoned.refresh_from_db()
+        busy.refresh_from_db()
+        self.assertEqual(abandoned.status, ModerationJob.DONE)
+        self.assertEqual(busy.status, ModerationJob.RUNNING)
+        self.assertEqual(list(Post.objects.all()), [self.own_post])
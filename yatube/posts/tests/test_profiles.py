@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import profiles
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class ProfileSnapshotTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        for i in range(12):
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.url = reverse('posts:profile', kwargs={'username': 'author'})
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_profile_context(self):
+        """Снимок профиля содержит счётчики и состояние подписки."""
+        response = self.reader_client.get(self.url)
+        context = response.context
+        self.assertEqual(context['author'], self.author)
+        self.assertEqual(context['post_count'], 12)
+        self.assertEqual(context['follower_count'], 1)
+        self.assertEqual(context['following_count'], 0)
+        self.assertTrue(context['following'])
+        self.assertEqual(len(context['page_obj']), 10)
+        self.assertEqual(context['page_obj'].paginator.num_pages, 2)
+        self.assertEqual(
+            context['last_activity'], Post.objects.first().pub_date
+        )
+
+    def test_cached_profile_costs_one_follow_check(self):
+        """Повторный просмотр: сессия, пользователь и проверка подписки."""
+        self.reader_client.get(self.url)
+        with self.assertNumQueries(3):
+            self.reader_client.get(self.url)
+        guest_client = Client()
+        guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            guest_client.get(self.url)
+
+    def test_cached_snapshot_is_one_cache_read(self):
+        """Снимок из кэша читается одним обращением к кэшу."""
+        profiles.get_snapshot('author')
+        with mock.patch.object(profiles, 'cache', wraps=cache) as spy:
+            profiles.get_snapshot('author')
+        self.assertEqual(spy.method_calls, [
+            mock.call.get(profiles.snapshot_key('author'))
+        ])
+
+    def test_renamed_user_snapshot_is_dropped(self):
+        """После смены имени по старому имени профиля нет."""
+        self.reader_client.get(self.url)
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'writer'
+        author.save()
+        self.assertEqual(self.reader_client.get(self.url).status_code, 404)
+
+    def test_snapshot_is_invalidated_by_events(self):
+        """Посты, комментарии и подписки сразу меняют снимок."""
+        self.reader_client.get(self.url)
+        Post.objects.create(text='Новый пост', author=self.author)
+        Follow.objects.filter(user=self.reader).delete()
+        response = self.reader_client.get(self.url)
+        self.assertEqual(response.context['post_count'], 13)
+        self.assertEqual(response.context['follower_count'], 0)
+        self.assertFalse(response.context['following'])
+
+        comment = Comment.objects.create(
+            post=Post.objects.last(), author=self.author, text='Комментарий'
+        )
+        response = self.reader_client.get(self.url)
+        self.assertEqual(response.context['last_activity'], comment.created)
+
+    def test_unknown_profile(self):
+        """Несуществующий профиль отдаёт 404."""
+        response = self.reader_client.get(
+            reverse('posts:profile', kwargs={'username': 'nobody'})
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, PostRanking
+from ..ranking import rank_posts
+
+User = get_user_model()
+
+
+class RankingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.famous = User.objects.create_user(username='famous')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.quiet_post = Post.objects.create(
+            text='Тихий пост', author=cls.user
+        )
+        cls.hot_post = Post.objects.create(
+            text='Горячий пост', author=cls.user, group=cls.group
+        )
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.user, group=cls.group
+        )
+        for _ in range(3):
+            Comment.objects.create(
+                post=cls.hot_post, author=cls.user, text='Свежий'
+            )
+        for _ in range(4):
+            comment = Comment.objects.create(
+                post=cls.old_post, author=cls.user, text='Старый'
+            )
+            Comment.objects.filter(pk=comment.pk).update(
+                created=timezone.now() - timedelta(days=3)
+            )
+
+    def test_trending_prefers_recent_comments(self):
+        """В тренде выше пост со свежими комментариями."""
+        rank_posts()
+        trending = list(PostRanking.objects.filter(
+            kind=PostRanking.TRENDING, group=None
+        ).values_list('post', flat=True))
+        self.assertEqual(trending[0], self.hot_post.pk)
+
+    def test_popular_counts_all_comments(self):
+        """В популярном выше пост с большим числом комментариев."""
+        rank_posts()
+        popular = list(PostRanking.objects.filter(
+            kind=PostRanking.POPULAR, group=self.group
+        ).values_list('post', flat=True))
+        self.assertEqual(popular, [self.old_post.pk, self.hot_post.pk])
+
+    def test_author_followers_raise_score(self):
+        """Подписчики автора поднимают пост в ленте."""
+        post = Post.objects.create(text='Пост звезды', author=self.famous)
+        for i in range(30):
+            follower = User.objects.create_user(username=f'fan{i}')
+            Follow.objects.create(user=follower, author=self.famous)
+        rank_posts()
+        ranked = PostRanking.objects.get(
+            kind=PostRanking.TRENDING, group=None, post=post
+        )
+        quiet = PostRanking.objects.get(
+            kind=PostRanking.TRENDING, group=None, post=self.quiet_post
+        )
+        self.assertLess(ranked.position, quiet.position)
+
+    def test_window_selects_posts(self):
+        """Старые посты попадают в ленты только со свежими комментариями."""
+        month_ago = timezone.now() - timedelta(days=30)
+        commented = Post.objects.create(text='Обсуждаемый', author=self.user)
+        forgotten = Post.objects.create(text='Забытый', author=self.user)
+        Post.objects.filter(pk__in=(commented.pk, forgotten.pk)).update(
+            pub_date=month_ago
+        )
+        Comment.objects.create(post=commented, author=self.user, text='Ещё')
+        rank_posts()
+        ranked = set(PostRanking.objects.values_list('post', flat=True))
+        self.assertIn(commented.pk, ranked)
+        self.assertNotIn(forgotten.pk, ranked)
+
+    def test_ranked_views(self):
+        """Ленты рейтинга показывают посты в порядке позиций."""
+        rank_posts()
+        client = Client()
+        pages = (
+            reverse('posts:trending'),
+            reverse('posts:popular'),
+            reverse('posts:group_trending', kwargs={'slug': 'test-slug'}),
+            reverse('posts:group_popular', kwargs={'slug': 'test-slug'}),
+        )
+        for address in pages:
+            with self.subTest(address=address):
+                response = client.get(address)
+                posts = list(response.context['page_obj'])
+                self.assertTrue(posts)
+                self.assertTemplateUsed(response, 'posts/ranked_list.html')
+        response = client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['page_obj'][0], self.hot_post)
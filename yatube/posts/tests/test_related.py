@@ -0,0 +1,82 @@
+import unittest
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import related
+from ..models import Post, RelatedPost
+
+User = get_user_model()
+
+TEXTS = (
+    'Рецепт яблочного пирога с корицей и ванилью',
+    'Пирог с корицей: рецепт без лишних хлопот',
+    'Сборная сыграла вничью, матч был нервным',
+    'Нервный матч сборной закончился вничью',
+    'Новая библиотека для обработки изображений',
+)
+
+
+class RelatedPostsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(text=text, author=cls.author)
+            for text in TEXTS
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def relate(self):
+        out = StringIO()
+        call_command('relate_posts', stdout=out)
+        return out.getvalue()
+
+    def test_similar_texts_are_linked(self):
+        self.assertIn('Записано похожих постов: 4', self.relate())
+        pie, other_pie, match, other_match, unrelated = self.posts
+        self.assertEqual(
+            list(related.get_related_posts(pie)), [other_pie]
+        )
+        self.assertEqual(
+            list(related.get_related_posts(other_match)), [match]
+        )
+        self.assertFalse(RelatedPost.objects.filter(post=unrelated).exists())
+
+    def test_post_detail_shows_related_block(self):
+        self.relate()
+        pie, other_pie = self.posts[:2]
+        response = self.client.get(
+            reverse('posts:post_detail', args=[pie.pk])
+        )
+        self.assertEqual(list(response.context['related_posts']), [other_pie])
+        self.assertContains(response, 'Похожие посты')
+        self.assertContains(
+            response, reverse('posts:post_detail', args=[other_pie.pk])
+        )
+
+    def test_deleted_post_leaves_block(self):
+        self.relate()
+        pie, other_pie = self.posts[:2]
+        Post.objects.filter(pk=other_pie.pk).delete()
+        self.assertEqual(list(related.get_related_posts(pie)), [])
+
+    @unittest.skipIf(related.np is None, 'нужен NumPy')
+    def test_dense_scores_match_dicts(self):
+        vectors = related.vectorize(TEXTS * 3)
+        expected = related.similar_dicts(vectors, 3, 0.05)
+        result = related.similar_dense(vectors, 3, 0.05)
+        for top, dense_top in zip(expected, result):
+            self.assertEqual(
+                sorted(index for _, index in top),
+                sorted(index for _, index in dense_top),
+            )
+            for (score, _), (dense_score, _) in zip(top, dense_top):
+                self.assertAlmostEqual(score, dense_score, places=5)
@@ -0,0 +1,272 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import moderation
+from ..models import Comment, Group, ModerationJob, Post
+from ..sharding import ID_BASE, locate, shard_for
+
+User = get_user_model()
+
+EXTRA_SHARDS = ('shard_a', 'shard_b')
+SHARDS = ('default',) + EXTRA_SHARDS
+
+
+class ShardingTests(TestCase):
+    databases = set(SHARDS)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        for alias in EXTRA_SHARDS:
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(cls.tmp_dir, f'{alias}.sqlite3'),
+            }
+            with override_settings(POST_SHARDS=list(SHARDS)):
+                call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in EXTRA_SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+        shutil.rmtree(cls.tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.authors = {}
+        number = 0
+        while len(cls.authors) < len(SHARDS):
+            user = User.objects.create_user(username=f'user{number}')
+            cls.authors.setdefault(shard_for(user.pk, SHARDS), user)
+            number += 1
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        settings = override_settings(POST_SHARDS=list(SHARDS))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def create_posts(self, count=4):
+        now = timezone.now()
+        posts = []
+        for i in range(count):
+            for author in self.authors.values():
+                post = Post.objects.create(
+                    text=f'Пост {author.username} {i}',
+                    author=author,
+                    group=self.group,
+                )
+                posts.append(post)
+        for age, post in enumerate(reversed(posts)):
+            Post.objects.using(post._state.db).filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=age)
+            )
+        return posts[::-1]
+
+    def test_adding_shard_moves_few_authors(self):
+        """Новый шард забирает авторов только себе и около 1/N."""
+        before = {pk: shard_for(pk, SHARDS) for pk in range(1, 1001)}
+        after = {pk: shard_for(pk, SHARDS + ('shard_c',)) for pk in before}
+        moved = [pk for pk in before if before[pk] != after[pk]]
+        self.assertLess(len(moved), 350)
+        self.assertEqual({after[pk] for pk in moved}, {'shard_c'})
+
+    def test_posts_and_comments_are_written_to_author_shard(self):
+        for alias, author in self.authors.items():
+            with self.subTest(alias=alias):
+                self.client.force_login(author)
+                self.client.post(
+                    reverse('posts:post_create'),
+                    {'text': f'Новый пост {alias}', 'group': self.group.pk},
+                )
+                post = Post.objects.using(alias).get(author=author)
+                self.client.post(
+                    reverse('posts:add_comment', args=[post.pk]),
+                    {'text': 'Комментарий'},
+                )
+                self.assertTrue(
+                    Comment.objects.using(alias).filter(post=post).exists()
+                )
+                for other in SHARDS:
+                    if other != alias:
+                        self.assertFalse(Post.objects.using(other).filter(
+                            author=author
+                        ).exists())
+        ids = [
+            pk for alias in SHARDS
+            for pk in Post.objects.using(alias).values_list('pk', flat=True)
+        ]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_ids_are_allocated_in_shard(self):
+        """id постов и комментариев выдаёт шард, а не default, и шард
+        поста находится по его id."""
+        author = self.authors['shard_b']
+        with CaptureQueriesContext(connections['default']) as queries:
+            post = Post.objects.create(text='Пост', author=author)
+            comment = Comment.objects.create(
+                post=post, author=author, text='Комментарий'
+            )
+        for query in queries.captured_queries:
+            self.assertNotIn('INSERT', query['sql'])
+        self.assertGreaterEqual(post.pk, ID_BASE)
+        self.assertLess(comment.pk, 1 << 53)
+        self.assertNotEqual(post.pk, comment.pk)
+        self.assertEqual(locate(post.pk), 'shard_b')
+        self.assertEqual(
+            Comment.objects.using('shard_b').get(pk=comment.pk).post_id,
+            post.pk,
+        )
+
+    def test_author_pages_read_one_shard(self):
+        """Профиль и страница поста читают посты только из шарда автора.
+
+        Дата последнего комментария в профиле собирается со всех шардов.
+        """
+        self.create_posts(1)
+        alias, author = 'shard_a', self.authors['shard_a']
+        post = Post.objects.using(alias).get(author=author)
+        for url in (
+            reverse('posts:profile', args=[author.username]),
+            reverse('posts:post_detail', args=[post.pk]),
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connections['shard_b']) as other:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [q['sql'] for q in other if 'posts_post' in q['sql']],
+                    [],
+                )
+
+    def test_index_merges_shards_by_date(self):
+        posts = self.create_posts()
+        ids = []
+        for number in (1, 2):
+            response = self.client.get(
+                reverse('posts:index'), {'page': number}
+            )
+            ids.extend(post.pk for post in response.context['page_obj'])
+        self.assertEqual(ids, [post.pk for post in posts])
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, len(posts)
+        )
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug])
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [post.pk for post in posts[:10]],
+        )
+
+    def test_rebalance_moves_posts_to_new_shards(self):
+        """После добавления шардов посты переезжают с комментариями
+        и прежними датами."""
+        with override_settings(POST_SHARDS=['default']):
+            posts = self.create_posts(2)
+            comment = Comment.objects.create(
+                post=posts[0], author=posts[0].author, text='Комментарий'
+            )
+        dates = dict(Post.objects.values_list('pk', 'pub_date'))
+        out = StringIO()
+        call_command('rebalance_shards', batch_size=1, stdout=out)
+        self.assertIn('постов: 4', out.getvalue())
+        for alias, author in self.authors.items():
+            with self.subTest(alias=alias):
+                moved = Post.objects.using(alias).filter(author=author)
+                self.assertEqual(moved.count(), 2)
+                for post in moved:
+                    self.assertEqual(post.pub_date, dates[post.pk])
+        home = shard_for(posts[0].author_id)
+        self.assertEqual(
+            Comment.objects.using(home).get(pk=comment.pk).post_id,
+            posts[0].pk,
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=[posts[0].pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        new_post = Post.objects.create(
+            text='После переноса', author=posts[0].author
+        )
+        self.assertNotIn(new_post.pk, dates)
+        call_command('rebalance_shards', stdout=out)
+        self.assertIn('постов: 0', out.getvalue())
+
+    def test_shards_get_only_post_tables(self):
+        tables = set(connections['shard_a'].introspection.table_names())
+        self.assertIn('posts_post', tables)
+        self.assertIn('posts_comment', tables)
+        self.assertNotIn('auth_user', tables)
+        self.assertNotIn('posts_follow', tables)
+        self.assertNotIn('django_session', tables)
+
+    def test_user_deletion_reaches_all_shards(self):
+        """Посты и комментарии удалённого пользователя пропадают
+        из всех шардов, главная открывается."""
+        posts = self.create_posts(1)
+        author = User.objects.get(pk=self.authors['shard_a'].pk)
+        for post in posts:
+            Comment.objects.create(post=post, author=author, text='Мой')
+        author.delete()
+        for alias in SHARDS:
+            with self.subTest(alias=alias):
+                self.assertFalse(Post.objects.using(alias).filter(
+                    author_id=self.authors['shard_a'].pk
+                ).exists())
+                self.assertFalse(Comment.objects.using(alias).filter(
+                    author_id=self.authors['shard_a'].pk
+                ).exists())
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    @override_settings(MODERATION_JOBS_MODE='sync', MODERATION_CHUNK_SIZE=2)
+    def test_moderation_reaches_all_shards(self):
+        """Задание модерации находит посты во всех шардах."""
+        posts = self.create_posts(2)
+        job = moderation.enqueue(
+            ModerationJob.DELETE, [post.pk for post in posts[:3]]
+        )
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), (ModerationJob.DONE, 3))
+        for alias in SHARDS:
+            with self.subTest(alias=alias):
+                self.assertEqual(Post.objects.using(alias).count(), 1)
+
+    def test_group_deletion_reaches_all_shards(self):
+        self.create_posts(1)
+        Group.objects.get(pk=self.group.pk).delete()
+        for alias in SHARDS:
+            with self.subTest(alias=alias):
+                self.assertFalse(Post.objects.using(alias).filter(
+                    group__isnull=False
+                ).exists())
+                self.assertEqual(Post.objects.using(alias).count(), 1)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
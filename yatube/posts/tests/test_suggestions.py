@@ -0,0 +1,82 @@
+import math
+import unittest
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import suggestions
+from ..models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('me', 'a', 'b', 'c', 'd', 'e', 'x')
+        }
+        for user, author in (
+            ('me', 'a'), ('me', 'b'),
+            ('a', 'c'), ('b', 'c'), ('a', 'd'),
+            ('x', 'a'), ('x', 'b'), ('x', 'e'),
+        ):
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.users['me'])
+
+    def suggest(self):
+        out = StringIO()
+        call_command('suggest_follows', stdout=out)
+        return out.getvalue()
+
+    def test_friends_of_friends_and_co_follows_are_ranked(self):
+        """c читают оба автора из подписок, у e общая с ними аудитория,
+        d читает один из них."""
+        self.assertIn('Записано рекомендаций', self.suggest())
+        rows = FollowSuggestion.objects.filter(user=self.users['me'])
+        self.assertEqual(
+            [row.author.username for row in rows], ['c', 'e', 'd']
+        )
+        self.assertAlmostEqual(rows[1].score, 2 / math.sqrt(2))
+        self.assertFalse(FollowSuggestion.objects.filter(
+            user=self.users['me'],
+            author__in=[self.users['me'], self.users['a'], self.users['b']],
+        ).exists())
+
+    def test_pages_read_precomputed_suggestions(self):
+        self.suggest()
+        response = self.client.get(reverse('posts:follow_suggestions'))
+        self.assertEqual(
+            [item.author.username for item in response.context['suggestions']],
+            ['c', 'e', 'd'],
+        )
+        self.client.get(reverse('posts:profile_follow', args=['c']))
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author.username for item in response.context['suggestions']],
+            ['e', 'd'],
+        )
+        self.assertContains(response, 'Кого почитать')
+
+    @unittest.skipIf(suggestions.sparse is None, 'нужен SciPy')
+    def test_sparse_scores_match_dicts(self):
+        edges = list(Follow.objects.values_list('user_id', 'author_id'))
+        expected = suggestions.score_dicts(edges, 10)
+        result = suggestions.score_sparse(edges, 10)
+        self.assertEqual(result.keys(), expected.keys())
+        for user_id, top in expected.items():
+            self.assertEqual(
+                [author_id for _, author_id in result[user_id]],
+                [author_id for _, author_id in top],
+            )
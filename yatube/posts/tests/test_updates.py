@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import updates
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedUpdatesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        updates.recent_posts.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.old_post = Post.objects.create(text='Старый', author=self.author)
+        self.cursor = self.get(reverse('posts:updates'))['cursor']
+
+    def get(self, url, client=None, **params):
+        response = (client or self.guest_client).get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_without_cursor_returns_current_cursor(self):
+        """Без курсора отдаётся id последнего поста и пустой список."""
+        data = self.get(reverse('posts:updates'))
+        self.assertEqual(data, {'cursor': self.old_post.pk, 'posts': []})
+
+    def test_new_posts_are_filtered_by_feed(self):
+        """Каждая лента отдаёт только свои новые посты."""
+        other = User.objects.create_user(username='other')
+        in_group = Post.objects.create(
+            text='В группе', author=other, group=self.group
+        )
+        by_author = Post.objects.create(text='Автора', author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        cases = (
+            (reverse('posts:updates'), [in_group.pk, by_author.pk]),
+            (
+                reverse('posts:group_updates', args=('test-slug',)),
+                [in_group.pk],
+            ),
+            (
+                reverse('posts:profile_updates', args=('author',)),
+                [by_author.pk],
+            ),
+            (reverse('posts:follow_updates'), [by_author.pk]),
+        )
+        for url, expected in cases:
+            with self.subTest(url=url):
+                data = self.get(url, self.reader_client, after=self.cursor)
+                self.assertEqual(
+                    [post['id'] for post in data['posts']], expected
+                )
+                self.assertEqual(data['cursor'], expected[-1])
+
+    def test_cursor_stays_without_new_posts(self):
+        data = self.get(reverse('posts:updates'), after=self.cursor)
+        self.assertEqual(data, {'cursor': self.cursor, 'posts': []})
+
+    def test_follow_feed_requires_login(self):
+        response = self.guest_client.get(
+            reverse('posts:follow_updates'), {'after': 0}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_recent_cursor_is_answered_from_buffer(self):
+        """Свежий курсор не требует запроса по ленте."""
+        Post.objects.create(text='Новый', author=self.author)
+        feed_filter = updates.get_filter(updates.GLOBAL)
+        # дочитывание буфера по первичному ключу
+        with self.assertNumQueries(1):
+            ids = updates.find_new_ids(self.cursor, feed_filter)
+        self.assertEqual(len(ids), 1)
+
+    def test_old_cursor_falls_back_to_query(self):
+        """Курсор старше буфера обслуживается индексным запросом."""
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            for i in range(5)
+        ]
+        with mock.patch.object(
+            updates, 'recent_posts', updates.RecentPosts(2)
+        ):
+            data = self.get(reverse('posts:updates'), after=self.cursor)
+        self.assertEqual(
+            [post['id'] for post in data['posts']],
+            [post.pk for post in posts],
+        )
+
+    @override_settings(LONGPOLL_INTERVAL=0.01)
+    def test_long_poll_times_out_empty(self):
+        data = self.get(reverse('posts:updates'), after=self.cursor, wait=0.05)
+        self.assertEqual(data['posts'], [])
+
+    def test_non_finite_wait_is_ignored(self):
+        """wait=nan и wait=inf не превращаются в бесконечное ожидание."""
+        factory = RequestFactory()
+        for value in ('nan', 'inf', '-inf', 'NaN'):
+            with self.subTest(wait=value):
+                request = factory.get('/', {'after': 1, 'wait': value})
+                self.assertEqual(updates.parse_params(request), (1, 0))
+        data = self.get(
+            reverse('posts:updates'), after=self.cursor, wait='nan'
+        )
+        self.assertEqual(data['posts'], [])
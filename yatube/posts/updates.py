@@ -0,0 +1,198 @@
+"""Новые посты после курсора для лент: общей, группы, профиля, подписок.
+
+Последние посты держатся в кольцевом буфере процесса
+(``RECENT_POSTS_BUFFER`` штук). Перед ответом буфер дочитывает из базы
+посты новее своего последнего id — это один запрос по первичному ключу,
+который обычно ничего не возвращает, зато посты из других воркеров
+тоже попадают в буфер. Если курсор старше начала буфера, ответ строится
+обычным индексным запросом.
+
+Курсор — id поста, а id из разных шардов не упорядочены по времени,
+поэтому при нескольких шардах в ответ попадают только посты
+из ``default``, см. ``posts.sharding``.
+"""
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.urls import reverse
+
+from .models import Follow, Post
+
+RecentPost = namedtuple('RecentPost', ('pk', 'author_id', 'group_id'))
+
+GLOBAL = 'global'
+GROUP = 'group'
+PROFILE = 'profile'
+FOLLOW = 'follow'
+MAX_POSTS = 50
+
+
+class RecentPosts:
+    """Кольцевой буфер id последних постов."""
+
+    def __init__(self, size):
+        self.posts = deque(maxlen=size)
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+        self.loaded = False
+
+    @property
+    def newest(self):
+        return self.posts[-1].pk if self.posts else 0
+
+    @property
+    def oldest(self):
+        return self.posts[0].pk if self.posts else 0
+
+    def add(self, post):
+        with self.condition:
+            if post.pk > self.newest:
+                self.posts.append(
+                    RecentPost(post.pk, post.author_id, post.group_id)
+                )
+            self.condition.notify_all()
+
+    def sync(self):
+        """Дочитывает из базы посты новее последнего в буфере."""
+        queryset = Post.objects.order_by('pk').values_list(
+            'pk', 'author_id', 'group_id'
+        )
+        if self.loaded:
+            rows = list(queryset.filter(pk__gt=self.newest))
+        else:
+            rows = list(reversed(
+                queryset.order_by('-pk')[:self.posts.maxlen]
+            ))
+        with self.lock:
+            for row in rows:
+                if row[0] > self.newest:
+                    self.posts.append(RecentPost(*row))
+            self.loaded = True
+
+    def covers(self, cursor):
+        """Можно ли ответить из буфера, не пропустив постов."""
+        with self.lock:
+            return self.loaded and (
+                not self.posts or cursor >= self.oldest - 1
+            )
+
+    def after(self, cursor):
+        with self.lock:
+            return [post for post in self.posts if post.pk > cursor]
+
+    def wait(self, timeout):
+        with self.condition:
+            self.condition.wait(timeout)
+
+    def clear(self):
+        with self.lock:
+            self.posts.clear()
+            self.loaded = False
+
+
+recent_posts = RecentPosts(getattr(settings, 'RECENT_POSTS_BUFFER', 1000))
+
+
+def get_filter(feed, user=None, group=None, author=None):
+    """Фильтр ленты: функция для буфера и условия для запроса."""
+    if feed == GROUP:
+        return (
+            lambda post: post.group_id == group.pk,
+            {'group': group},
+        )
+    if feed == PROFILE:
+        return (
+            lambda post: post.author_id == author.pk,
+            {'author': author},
+        )
+    if feed == FOLLOW:
+        authors = set(
+            Follow.objects.filter(user=user).values_list('author', flat=True)
+        )
+        return (
+            lambda post: post.author_id in authors,
+            {'author__in': authors},
+        )
+    return lambda post: True, {}
+
+
+def find_new_ids(cursor, feed_filter):
+    """Id постов ленты новее курсора, от старых к новым."""
+    matches, lookups = feed_filter
+    recent_posts.sync()
+    if recent_posts.covers(cursor):
+        return [
+            post.pk for post in recent_posts.after(cursor) if matches(post)
+        ][:MAX_POSTS]
+    return list(
+        Post.objects.filter(pk__gt=cursor, **lookups)
+        .order_by('pk').values_list('pk', flat=True)[:MAX_POSTS]
+    )
+
+
+def get_new_posts(cursor, feed_filter, wait=0):
+    """Новые посты ленты; при ``wait`` ждёт их появления (long-poll)."""
+    deadline = time.monotonic() + wait
+    interval = getattr(settings, 'LONGPOLL_INTERVAL', 1.0)
+    while True:
+        ids = find_new_ids(cursor, feed_filter)
+        remaining = deadline - time.monotonic()
+        if ids or remaining <= 0:
+            break
+        recent_posts.wait(min(interval, remaining))
+    return load_posts(ids)
+
+
+def load_posts(ids):
+    # удалённые после попадания в буфер посты отсеются здесь
+    return list(
+        Post.objects.filter(pk__in=ids)
+        .select_related('author', 'group').order_by('pk')
+    )
+
+
+def parse_params(request):
+    """Курсор и время ожидания из GET-параметров ``after`` и ``wait``.
+
+    Без курсора возвращается ``None``: клиент получит текущий курсор
+    и начнёт опрос с него.
+    """
+    try:
+        cursor = max(int(request.GET['after']), 0)
+    except (KeyError, ValueError):
+        cursor = None
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        wait = 0
+    if not math.isfinite(wait):
+        # с nan сравнения ложны, и ожидание никогда бы не кончилось
+        wait = 0
+    max_wait = getattr(settings, 'LONGPOLL_MAX_WAIT', 25)
+    return cursor, min(max(wait, 0), max_wait)
+
+
+def current_cursor():
+    recent_posts.sync()
+    return recent_posts.newest
+
+
+def post_data(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'pub_date': post.pub_date.isoformat(),
+        'url': reverse('posts:post_detail', args=(post.pk,)),
+    }
+
+
+def serialize(posts, cursor):
+    return {
+        'cursor': posts[-1].pk if posts else cursor,
+        'posts': [post_data(post) for post in posts],
+    }
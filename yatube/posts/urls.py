@@ -1,24 +1,79 @@
 from django.urls import path
 
-from . import views
+from core.lazy_urls import lazy_view
 
 app_name = 'posts'
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
-    path('group/<slug:slug>/', views.group_posts, name='group_list'),
-    path('create/', views.post_create, name='post_create'),
-    path('follow/', views.follow_index, name='follow_index'),
-    path(
-        'profile/<str:username>/follow/', views.profile_follow,
+    path('', lazy_view('posts.views.index'), name='index'),
+    path(
+        'profile/<str:username>/', lazy_view('posts.views.profile'),
+        name='profile'),
+    path(
+        'posts/<int:post_id>/', lazy_view('posts.views.post_detail'),
+        name='post_detail'),
+    path(
+        'group/', lazy_view('posts.views.group_index'),
+        name='group_index'),
+    path(
+        'group/<slug:slug>/', lazy_view('posts.views.group_posts'),
+        name='group_list'),
+    path(
+        'trending/', lazy_view('posts.views.ranked_feed'),
+        {'kind': 'trending'}, name='trending'),
+    path(
+        'popular/', lazy_view('posts.views.ranked_feed'),
+        {'kind': 'popular'}, name='popular'),
+    path(
+        'group/<slug:slug>/trending/', lazy_view('posts.views.ranked_feed'),
+        {'kind': 'trending'}, name='group_trending'),
+    path(
+        'group/<slug:slug>/popular/', lazy_view('posts.views.ranked_feed'),
+        {'kind': 'popular'}, name='group_popular'),
+    path(
+        'updates/', lazy_view('posts.views.feed_updates'),
+        {'feed': 'global'}, name='updates'),
+    path(
+        'group/<slug:slug>/updates/', lazy_view('posts.views.feed_updates'),
+        {'feed': 'group'}, name='group_updates'),
+    path(
+        'profile/<str:username>/updates/',
+        lazy_view('posts.views.feed_updates'),
+        {'feed': 'profile'}, name='profile_updates'),
+    path(
+        'follow/updates/', lazy_view('posts.views.feed_updates'),
+        {'feed': 'follow'}, name='follow_updates'),
+    path(
+        'group/<slug:slug>/events/', lazy_view('posts.views.live_events'),
+        {'feed': 'group'}, name='group_events'),
+    path(
+        'follow/events/', lazy_view('posts.views.live_events'),
+        {'feed': 'follow'}, name='follow_events'),
+    path(
+        'posts/<int:post_id>/events/', lazy_view('posts.views.live_events'),
+        {'feed': 'post'}, name='post_events'),
+    path(
+        'create/', lazy_view('posts.views.post_create'),
+        name='post_create'),
+    path(
+        'follow/', lazy_view('posts.views.follow_index'),
+        name='follow_index'),
+    path(
+        'follow/suggestions/', lazy_view('posts.views.follow_suggestions'),
+        name='follow_suggestions'),
+    path(
+        'profile/<str:username>/follow/',
+        lazy_view('posts.views.profile_follow'),
         name='profile_follow'),
     path(
-        'profile/<str:username>/unfollow/', views.profile_unfollow,
+        'profile/<str:username>/unfollow/',
+        lazy_view('posts.views.profile_unfollow'),
         name='profile_unfollow'),
     path(
-        'posts/<int:post_id>/comment/', views.add_comment,
+        'posts/<int:post_id>/comment/',
+        lazy_view('posts.views.add_comment'),
         name='add_comment'),
-    path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/edit/', lazy_view('posts.views.post_edit'),
+        name='post_edit'),
 ]
@@ -1,10 +1,22 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.decorators.cache import cache_page
 
-from .models import Post, Group, User, Comment, Follow
+from core.streaming import stream_render
+from core.throttling import throttle
+
+from .models import Group, User, Follow, PostRanking
+from .feeds import count_author_posts, find_post, is_archived, posts_feed
 from .forms import PostForm, CommentForm
+from .groups import get_directory, get_group, get_group_page
+from .profiles import get_profile_context
+from .ranking import get_feed
+from .related import get_related_posts
+from .suggestions import get_suggestions
+from . import events, sharding, updates
 
 
 def page(request, posts):
@@ -15,54 +27,144 @@ def page(request, posts):
 
 def index(request):
     templates = 'posts/index.html'
-    posts = Post.objects.all()
+    posts = posts_feed()
     page_obj = page(request, posts)
     context = {
         'page_obj': page_obj,
 
     }
-    return render(request, templates, context)
+    return stream_render(request, templates, context)
 
 
 def group_posts(request, slug):
     templates = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = page(request, posts)
+    group = get_group(slug)
+    page_obj = get_group_page(request, group)
     context = {
         'page_obj': page_obj,
         'group': group
     }
-    return render(request, templates, context)
+    return stream_render(request, templates, context)
 
 
-def profile(request, username):
-    template = "posts/profile.html"
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all().order_by("-pub_date")
-    page_obj = page(request, posts)
+def group_index(request):
+    """Каталог групп с числом постов и датой последнего поста"""
+    template = 'posts/group_index.html'
     context = {
-        'page_obj': page_obj,
-        'author': author,
+        'groups': get_directory(),
     }
     return render(request, template, context)
 
 
+def profile(request, username):
+    template = "posts/profile.html"
+    context = get_profile_context(request, username)
+    return stream_render(request, template, context)
+
+
 def post_detail(request, post_id):
     template = "posts/post_detail.html"
-    post = get_object_or_404(Post, pk=post_id)
+    # старые посты читаются из архива, см. posts.archive
+    post = find_post(post_id)
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post_id)
-    post_count = Post.objects.filter(author=post.author).count()
+    comments = sharding.related(post.comments.all(), 'author')
+    post_count = count_author_posts(post.author_id)
+    archived = is_archived(post)
     context = {
         'post': post,
         'post_count': post_count,
         'form': form,
         'comments': comments,
+        'archived': archived,
+        'related_posts': [] if archived else get_related_posts(post),
+    }
+    return stream_render(request, template, context)
+
+
+def ranked_feed(request, kind, slug=None):
+    """Лента «в тренде» или «популярное», общая или для группы"""
+    template = 'posts/ranked_list.html'
+    group = None
+    if slug is not None:
+        group = get_object_or_404(Group, slug=slug)
+    page_obj = page(request, get_feed(kind, group))
+    context = {
+        'page_obj': page_obj,
+        'group': group,
+        'kind': kind,
+        'title': dict(PostRanking.KINDS)[kind],
     }
     return render(request, template, context)
 
 
+def get_updates_filter(request, feed, slug=None, username=None):
+    group = author = None
+    if feed == updates.GROUP:
+        group = get_group(slug)
+    elif feed == updates.PROFILE:
+        author = get_object_or_404(User, username=username)
+    return updates.get_filter(
+        feed, user=request.user, group=group, author=author
+    )
+
+
+def feed_updates(request, feed, slug=None, username=None):
+    """Новые посты ленты после курсора ``after`` в JSON.
+
+    С параметром ``wait`` запрос ждёт новых постов до указанного числа
+    секунд. Под WSGI ожидание занимает поток воркера, под ASGI
+    используется ``posts.async_views.feed_updates``.
+    """
+    if feed == updates.FOLLOW and not request.user.is_authenticated:
+        return JsonResponse({'error': 'login required'}, status=403)
+    cursor, wait = updates.parse_params(request)
+    if cursor is None:
+        return JsonResponse(updates.serialize([], updates.current_cursor()))
+    feed_filter = get_updates_filter(request, feed, slug, username)
+    posts = updates.get_new_posts(cursor, feed_filter, wait)
+    return JsonResponse(updates.serialize(posts, cursor))
+
+
+def get_event_channels(request, feed, slug=None, post_id=None):
+    """Каналы потока событий или None, если поток недоступен."""
+    if feed == 'group':
+        return [events.group_channel(get_group(slug).pk)]
+    if feed == 'post':
+        post = get_object_or_404(
+            sharding.post_queryset(post_id).only('pk'), pk=post_id
+        )
+        return [events.post_channel(post.pk)]
+    if not request.user.is_authenticated:
+        return None
+    authors = Follow.objects.filter(
+        user=request.user
+    ).values_list('author', flat=True)
+    return [events.author_channel(author) for author in authors]
+
+
+def event_stream_response(response):
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def live_events(request, feed, slug=None, post_id=None):
+    """Поток server-sent events для группы, подписок или комментариев.
+
+    Под WSGI поток занимает поток воркера до ``LIVE_STREAM_DURATION``
+    секунд, под ASGI используется ``posts.async_views.live_events``.
+    """
+    channels = get_event_channels(request, feed, slug, post_id)
+    if channels is None:
+        return JsonResponse({'error': 'login required'}, status=403)
+    return event_stream_response(StreamingHttpResponse(
+        events.stream(channels, events.get_last_id(request)),
+        content_type='text/event-stream',
+    ))
+
+
+@throttle('post_create')
 @login_required
 def post_create(request):
     form = PostForm(
@@ -80,7 +182,10 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post.objects.select_related('author'), pk=post_id)
+    post = get_object_or_404(
+        sharding.related(sharding.post_queryset(post_id), 'author'),
+        pk=post_id,
+    )
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -97,9 +202,10 @@ def post_edit(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@throttle('add_comment')
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(sharding.post_queryset(post_id), id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -114,19 +220,36 @@ def my_view(request):
     ...
 
 
+def get_followed_authors(user):
+    return Follow.objects.filter(user=user).values_list('author', flat=True)
+
+
 @login_required
 def follow_index(request):
     """Страница с постами авторов на которые подписан пользователь"""
     template = "posts/follow.html"
-    user = get_object_or_404(User, username=request.user)
-    posts = Post.objects.filter(author__following__user=user).all()
+    posts = posts_feed(author__in=get_followed_authors(request.user))
     page_obj = page(request, posts)
     context = {
         'page_obj': page_obj,
+        'suggestions': get_suggestions(
+            request.user, settings.FOLLOW_SUGGESTIONS_SHOWN
+        ),
+    }
+    return stream_render(request, template, context)
+
+
+@login_required
+def follow_suggestions(request):
+    """Рекомендованные пользователю авторы"""
+    template = 'posts/follow_suggestions.html'
+    context = {
+        'suggestions': get_suggestions(request.user),
     }
     return render(request, template, context)
 
 
+@throttle('follow', methods=('GET', 'POST'))
 @login_required
 def profile_follow(request, username):
     """Функция для подписки на автора"""
@@ -1,21 +1,25 @@
-from django.contrib.auth.views import LoginView, LogoutView
 from django.urls import path
 
-
-from . import views
+from core.lazy_urls import lazy_view
 
 app_name = 'users'
 
 urlpatterns = [
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path('signup/', lazy_view('users.views.SignUp'), name='signup'),
     path(
         'logout/',
-        LogoutView.as_view(template_name='users/logged_out.html'),
+        lazy_view(
+            'django.contrib.auth.views.LogoutView',
+            template_name='users/logged_out.html',
+        ),
         name='logout'
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        lazy_view(
+            'django.contrib.auth.views.LoginView',
+            template_name='users/login.html',
+        ),
         name='login'
     ),
 ]
@@ -0,0 +1,4 @@
+"""URLconf админки, подключается лениво из ``yatube.urls``."""
+from django.contrib import admin
+
+urlpatterns, app_name, _ = admin.site.urls
@@ -0,0 +1,17 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Запуск, например: ``uvicorn yatube.asgi:application``.
+"""
+
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+from core.asgi import get_asgi_application  # noqa: E402
+from core.warmup import warm_templates_on_boot  # noqa: E402
+
+application = get_asgi_application()
+
+warm_templates_on_boot()
@@ -0,0 +1,16 @@
+"""
+Выбор профиля настроек по переменной окружения ``DJANGO_PROFILE``.
+
+* ``dev`` (по умолчанию) — локальная разработка с debug_toolbar;
+* ``prod`` — облегчённый профиль для воркеров в продакшене.
+"""
+import os
+
+PROFILE = os.environ.get('DJANGO_PROFILE', 'dev')
+
+if PROFILE == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif PROFILE == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ImportError(f'Неизвестный профиль настроек: {PROFILE}')
@@ -0,0 +1,342 @@
+"""
+Django settings for yatube project.
+
+Общие настройки для всех профилей, см. ``yatube.settings``.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'fjo%c*h9-@9_76m^j&h&vm5^9q#vd!4rb12@-t9&p#w&f6v@m_'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'about.apps.AboutConfig',
+    'core.apps.CoreConfig',
+    'sorl.thumbnail',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+# gzip для HTML и других текстовых ответов (см. core.middleware)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVEL = 6
+COMPRESSION_TYPES = (
+    'text/html',
+    'text/plain',
+    'text/css',
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+)
+
+# ленты и страница поста отдаются по частям (см. core.streaming)
+STREAMING_RENDER = False
+
+# отчёт о стоимости контекст-процессоров в заголовке Server-Timing
+CONTEXT_PROCESSOR_TIMING = False
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'core.loaders.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# мелкие include, которые подставляются в родительский шаблон
+TEMPLATES_INLINE_INCLUDES = (
+    'posts/includes/switcher.html',
+    'posts/includes/paginator.html',
+)
+# компилировать все шаблоны при старте воркера
+TEMPLATES_WARMUP = False
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
+            # стандартные процессоры вызываются только при обращении
+            # шаблона к их переменным, см. core.context_processors.lazy
+            'context_processors': [
+                'core.context_processors.lazy.debug',
+                'core.context_processors.lazy.request',
+                'core.context_processors.lazy.auth',
+                'core.context_processors.lazy.messages',
+                'core.context_processors.lazy.year',
+            ]
+        },
+    }
+]
+
+# app_directories подключён явно в TEMPLATE_LOADERS,
+# процессоры auth и messages подключены через ленивые обёртки
+SILENCED_SYSTEM_CHECKS = [
+    'debug_toolbar.W006',
+    'admin.E402',
+    'admin.E404',
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+# ASGI-путь: размер пула потоков и представления, которые ждут событий
+ASGI_THREADS = 8
+ASYNC_VIEWS = {
+    'posts:updates': 'posts.async_views.feed_updates',
+    'posts:group_updates': 'posts.async_views.feed_updates',
+    'posts:profile_updates': 'posts.async_views.feed_updates',
+    'posts:follow_updates': 'posts.async_views.feed_updates',
+    'posts:group_events': 'posts.async_views.live_events',
+    'posts:follow_events': 'posts.async_views.live_events',
+    'posts:post_events': 'posts.async_views.live_events',
+}
+
+# Опрос новых постов: размер кольцевого буфера id в процессе,
+# предел ожидания long-poll и шаг проверки базы во время ожидания
+RECENT_POSTS_BUFFER = 1000
+LONGPOLL_MAX_WAIT = 25
+LONGPOLL_INTERVAL = 1.0
+
+# Server-sent events: как часто поток проверяет общий журнал событий
+# (события других воркеров), интервал пинга, время жизни соединения
+# и срок хранения событий в журнале
+LIVE_POLL_INTERVAL = 2.0
+LIVE_HEARTBEAT = 15.0
+LIVE_STREAM_DURATION = 300
+LIVE_RETRY = 3000
+LIVE_EVENTS_RETENTION = 600
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+# Шарды постов и комментариев (posts.sharding): алиасы из DATABASES.
+# После изменения списка посты переносит команда rebalance_shards.
+POST_SHARDS = ['default']
+DATABASE_ROUTERS = ['posts.sharding.ShardRouter']
+
+
+# Сессии в базе, пользователь загружается обычным ModelBackend: кэш
+# здесь у каждого процесса свой, и выход или смена пароля сбросили бы
+# запись только в одном из них. Кэшировать сессии (cached_db)
+# и пользователей (core.auth.CachedModelBackend) можно только с общим
+# кэшем, см. MEMCACHED_LOCATION в prod.py. Без обращений к базе вообще:
+# 'core.sessions' (подписанная кука с ротацией ключа, старые ключи —
+# в SESSION_SIGNING_FALLBACK_KEYS)
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+SESSION_SIGNING_FALLBACK_KEYS = []
+
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Загрузки из этих каталогов хранятся один раз под хешем содержимого
+# (см. core.storage); файлы без ссылок, которые не загружали дольше
+# IMAGE_GC_GRACE секунд, удаляет команда collect_orphan_images
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+MEDIA_HASHED_DIRS = ('posts',)
+IMAGE_GC_GRACE = 3600
+
+# Отдача медиа (см. core.media): 'sendfile' — сам Django через
+# wsgi.file_wrapper, 'x-accel' — nginx, 'x-sendfile' — Apache/lighttpd
+MEDIA_SERVE_MODE = 'sendfile'
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# каталоги MEDIA_ROOT, доступные только вошедшим пользователям
+MEDIA_PRIVATE_DIRS = ()
+
+# Адаптивные варианты картинок постов (см. posts.images): ширины
+# в пикселях и форматы в порядке предпочтения; недоступные в Pillow
+# форматы пропускаются, JPEG строится всегда
+IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1280)
+IMAGE_VARIANT_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+IMAGE_VARIANT_QUALITY = 80
+# thread — фоновый поток, worker — команда build_image_variants, sync — сразу
+IMAGE_VARIANTS_MODE = 'thread'
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+#  LOGOUT_REDIRECT_URL = 'posts:index'
+
+# письма складываются в очередь и уходят в фоне, см. core.mail
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_OUTBOX_MODE = 'thread'
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+# секунды: первая пауза после ошибки, её предел и время на отправку пачки
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 3600
+EMAIL_OUTBOX_LEASE = 300
+#  из очереди письма отправляет движок filebased.EmailBackend
+EMAIL_OUTBOX_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# указываем директорию, в которую будут складываться файлы писем
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Ограничение частоты запросов (core.throttling): лимиты по пользователю
+# и по IP для каждого scope. THROTTLE_CACHE = None — локальный словарь.
+THROTTLE_ENABLED = True
+THROTTLE_CACHE = 'default'
+THROTTLE_RATES = {
+    'post_create': {'user': '10/m', 'ip': '30/m'},
+    'add_comment': {'user': '20/m', 'ip': '60/m'},
+    'follow': {'user': '30/m', 'ip': '90/m'},
+    'signup': {'ip': '5/h'},
+}
+
+# Ленты «в тренде» и «популярное» (posts.ranking, команда rank_posts)
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_WINDOW_DAYS = 7
+TRENDING_FOLLOWER_WEIGHT = 0.5
+TRENDING_SIZE = 100
+
+# Блок «кого почитать» (posts.suggestions, команда suggest_follows):
+# сколько авторов хранить на пользователя и показывать на странице
+# подписок, веса друзей друзей и совместных подписок
+FOLLOW_SUGGESTIONS_SIZE = 20
+FOLLOW_SUGGESTIONS_SHOWN = 5
+FOLLOW_SUGGESTIONS_FOF_WEIGHT = 1.0
+FOLLOW_SUGGESTIONS_COFOLLOW_WEIGHT = 1.0
+FOLLOW_SUGGESTIONS_BLOCK_SIZE = 1000
+
+# Блок «похожие посты» (posts.related, команда relate_posts): сколько
+# последних постов сравнивать, размерность хешированных векторов,
+# отсечение частых слов и слабых совпадений
+RELATED_POSTS_SIZE = 5
+RELATED_POSTS_LIMIT = 10000
+RELATED_POSTS_FEATURES = 4096
+RELATED_POSTS_MAX_DF = 0.5
+RELATED_POSTS_MIN_SCORE = 0.1
+RELATED_POSTS_BLOCK_SIZE = 256
+
+# Почти одинаковые посты и комментарии (posts.duplicates): reject —
+# отклонять, flag — только писать в лог; порог сходства, минимальная
+# длина текста в 5-символьных кусках, число подписей в памяти процесса
+DUPLICATE_ACTION = 'reject'
+DUPLICATE_THRESHOLD = 0.7
+DUPLICATE_MIN_SHINGLES = 30
+DUPLICATE_MEMORY_SIZE = 10000
+
+# Массовая модерация из админки (posts.moderation):
+# thread — фоновый поток, worker — команда run_moderation_jobs, sync — сразу
+MODERATION_JOBS_MODE = 'thread'
+MODERATION_CHUNK_SIZE = 500
+# задание без отметки о прогрессе дольше стольких секунд считается
+# брошенным, и run_moderation_jobs берёт его заново
+MODERATION_JOB_LEASE = 300
+
+# Архив старых постов (posts.archive): команда archive_posts переносит
+# посты старше ARCHIVE_AFTER_DAYS дней пачками по ARCHIVE_BATCH_SIZE
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
+
+# сколько первых страниц главной сбрасывается при изменении постов
+INDEX_CACHED_PAGES = 5
+
+# кэш групп (posts.groups): сколько первых страниц ленты группы хранить
+GROUP_CACHED_PAGES = 3
+GROUP_CACHE_TIMEOUT = 300
+
+# снимок страницы профиля (posts.profiles), сбрасывается событиями
+PROFILE_CACHE_TIMEOUT = 300
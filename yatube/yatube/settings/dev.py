@@ -0,0 +1,23 @@
+"""Настройки для локальной разработки."""
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + [
+    'debug_toolbar',
+]
+
+MIDDLEWARE = MIDDLEWARE + [
+    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.middleware.ContextProcessorTimingMiddleware',
+]
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+CONTEXT_PROCESSOR_TIMING = True
+
+# при разработке лимиты только мешают
+THROTTLE_ENABLED = False
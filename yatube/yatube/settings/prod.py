@@ -0,0 +1,91 @@
+"""Облегчённые настройки для продакшена.
+
+Без приложений и middleware для разработки, с кэширующим загрузчиком
+шаблонов, прогревом шаблонов при старте воркера и статикой
+с отпечатками в именах (нужен ``collectstatic``).
+"""
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASES, TEMPLATE_LOADERS, TEMPLATES
+
+DEBUG = False
+
+# ключ из base.py лежит в репозитории, а SECRET_KEY подписывает сессии
+SECRET_KEY = os.environ.get('SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Не задана переменная окружения SECRET_KEY')
+
+ALLOWED_HOSTS = os.environ.get(
+    'ALLOWED_HOSTS', 'localhost,127.0.0.1'
+).split(',')
+
+# прежние SECRET_KEY через запятую: подписанные ими сессии принимаются
+# и переподписываются (для SESSION_ENGINE = 'core.sessions')
+SESSION_SIGNING_FALLBACK_KEYS = [
+    key for key in os.environ.get('OLD_SECRET_KEYS', '').split(',') if key
+]
+
+# MEMCACHED_LOCATION=host:port[,host:port] — общий кэш воркеров. Только
+# с ним сессии и пользователи берутся из кэша: выход и смена пароля
+# сбрасывают запись сразу для всех воркеров.
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': MEMCACHED_LOCATION.split(','),
+        }
+    }
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    # в сессиях, открытых до включения кэша, записан путь ModelBackend
+    # (_auth_user_backend): без него в списке они бы разлогинились
+    AUTHENTICATION_BACKENDS = [
+        'core.auth.CachedModelBackend',
+        'django.contrib.auth.backends.ModelBackend',
+    ]
+
+# POST_SHARDS=N: посты делятся между default и N - 1 дополнительными
+# базами db.shardK.sqlite3
+DATABASES = copy.deepcopy(DATABASES)
+for number in range(1, int(os.environ.get('POST_SHARDS', '1'))):
+    DATABASES[f'shard{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.shard{number}.sqlite3'),
+    }
+POST_SHARDS = list(DATABASES)
+
+# Middleware упорядочены по стоимости: дешёвые проверки и редиректы
+# срабатывают раньше, чем читается сессия и загружается пользователь.
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.StaticFilesMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+# шаблоны компилируются один раз и хранятся в памяти воркера
+TEMPLATE_LOADERS = [
+    ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+]
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['OPTIONS']['loaders'] = TEMPLATE_LOADERS
+TEMPLATES_WARMUP = True
+STREAMING_RENDER = True
+
+CONTEXT_PROCESSOR_TIMING = False
+
+# очередь писем разбирает отдельный процесс: manage.py send_queued_mail
+EMAIL_OUTBOX_MODE = 'worker'
+
+# collectstatic пишет имена с отпечатком и сжатые копии; без фронтового
+# прокси их отдаёт core.staticfiles.StaticFilesMiddleware
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
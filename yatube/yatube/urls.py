@@ -1,15 +1,16 @@
-from django.contrib import admin
 from django.urls import include, path
 
 from django.conf import settings
-from django.conf.urls.static import static
 
+from core.lazy_urls import lazy_include, lazy_view
+
+# вложенные URLconf импортируются при первом обращении к ним
 urlpatterns = [
-    path('', include('posts.urls', namespace='posts')),
-    path('admin/', admin.site.urls),
-    path('auth/', include('users.urls')),
-    path('about/', include('about.urls', namespace='about')),
-    path('auth/', include('django.contrib.auth.urls')),
+    lazy_include('', 'posts.urls', namespace='posts'),
+    lazy_include('admin/', 'yatube.admin_urls', namespace='admin'),
+    lazy_include('auth/', 'users.urls', namespace='users'),
+    lazy_include('about/', 'about.urls', namespace='about'),
+    lazy_include('auth/', 'django.contrib.auth.urls'),
 ]
 
 
@@ -17,10 +18,16 @@ handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+# медиафайлы, если их не отдаёт фронтовый сервер (см. core.media)
+urlpatterns += (
+    path(
+        settings.MEDIA_URL.lstrip('/') + '<path:path>',
+        lazy_view('core.media.serve'),
+        name='media',
+    ),
+)
+
+if 'debug_toolbar' in settings.INSTALLED_APPS:
     import debug_toolbar
 
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)